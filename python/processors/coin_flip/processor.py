@@ -1,19 +1,26 @@
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
 from processors.coin_flip.models import CoinFlipEvent
-from typing import List
+from typing import Any, Dict, List
 from utils.transactions_processor import ProcessingResult
 from utils import general_utils
 from utils.transactions_processor import TransactionsProcessor
 from utils.models.schema_names import COIN_FLIP_SCHEMA_NAME
+from utils.bulk_writer import upsert_rows
+from utils.event_filter import EventTypeFilter
 from utils.session import Session
+from utils.transaction_filter import TransactionFilter
 from utils.processor_name import ProcessorName
-import json
+from utils import json_utils
 from datetime import datetime
 from time import perf_counter
 
 MODULE_ADDRESS = general_utils.standardize_address(
     "0xe57752173bc7c57e9b61c84895a75e53cd7c0ef0855acd81d31cb39b0e87e1d0"
 )
+# If someone deploys a different version of our contract with the same event type, we may want to index it one day.
+# For our sake, match the full type string: module address, module name and event type
+EVENT_TYPE_FILTER = EventTypeFilter([(MODULE_ADDRESS, "coin_flip", "CoinFlipEvent")])
+TRANSACTION_FILTER = TransactionFilter([MODULE_ADDRESS])
 
 
 class CoinFlipProcessor(TransactionsProcessor):
@@ -23,13 +30,17 @@ class CoinFlipProcessor(TransactionsProcessor):
     def schema(self) -> str:
         return COIN_FLIP_SCHEMA_NAME
 
+    def transaction_filter(self) -> TransactionFilter:
+        return TRANSACTION_FILTER
+
     def process_transactions(
         self,
         transactions: list[transaction_pb2.Transaction],
         start_version: int,
         end_version: int,
     ) -> ProcessingResult:
-        event_db_objs: List[CoinFlipEvent] = []
+        # Rows of the CoinFlipEvent table, keyed by column name
+        event_db_objs: List[Dict[str, Any]] = []
         start_time = perf_counter()
         for transaction in transactions:
             # Custom filtering
@@ -66,7 +77,7 @@ class CoinFlipProcessor(TransactionsProcessor):
                 #   }
                 # These values are stored in the `data` field of the event as JSON fields/values
                 # Load the data into a json object and then use it as a regular dictionary
-                data = json.loads(event.data)
+                data = json_utils.loads(event.data)
                 prediction = bool(data["prediction"])
                 result = bool(data["result"])
                 wins = int(data["wins"])
@@ -76,20 +87,20 @@ class CoinFlipProcessor(TransactionsProcessor):
                 # Calculate the total
                 win_percentage = wins / (wins + losses)
 
-                # Create an instance of CoinFlipEvent
-                event_db_obj = CoinFlipEvent(
-                    sequence_number=sequence_number,
-                    creation_number=creation_number,
-                    account_address=account_address,
-                    transaction_version=transaction_version,
-                    transaction_timestamp=transaction_timestamp,
-                    losses=losses,
-                    prediction=prediction,
-                    result=result,
-                    wins=wins,
-                    win_percentage=win_percentage,
-                    event_index=event_index,  # when multiple events of the same type are emitted in a single transaction, this is the index of the event in the transaction
-                )
+                # Create a CoinFlipEvent row
+                event_db_obj = {
+                    "sequence_number": sequence_number,
+                    "creation_number": creation_number,
+                    "account_address": account_address,
+                    "transaction_version": transaction_version,
+                    "transaction_timestamp": transaction_timestamp,
+                    "losses": losses,
+                    "prediction": prediction,
+                    "result": result,
+                    "wins": wins,
+                    "win_percentage": win_percentage,
+                    "event_index": event_index,  # when multiple events of the same type are emitted in a single transaction, this is the index of the event in the transaction
+                }
                 event_db_objs.append(event_db_obj)
 
         processing_duration_in_secs = perf_counter() - start_time
@@ -103,24 +114,11 @@ class CoinFlipProcessor(TransactionsProcessor):
             db_insertion_duration_in_secs=db_insertion_duration_in_secs,
         )
 
-    def insert_to_db(self, parsed_objs: List[CoinFlipEvent]) -> None:
+    def insert_to_db(self, parsed_objs: List[Dict[str, Any]]) -> None:
         with Session() as session, session.begin():
-            for obj in parsed_objs:
-                session.merge(obj)
+            upsert_rows(session, CoinFlipEvent, parsed_objs)
 
     @staticmethod
     def included_event_type(event_type: str) -> bool:
-        parsed_tag = event_type.split("::")
-        module_address = general_utils.standardize_address(parsed_tag[0])
-        module_name = parsed_tag[1]
-        event_type = parsed_tag[2]
         # Now we can filter out events that are not of type CoinFlipEvent
-        # We can filter by the module address, module name, and event type
-        # If someone deploys a different version of our contract with the same event type, we may want to index it one day.
-        # So we could only check the event type instead of the full string
-        # For our sake, check the full string
-        return (
-            module_address == MODULE_ADDRESS
-            and module_name == "coin_flip"
-            and event_type == "CoinFlipEvent"
-        )
+        return EVENT_TYPE_FILTER.match(event_type) is not None
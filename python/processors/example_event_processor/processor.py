@@ -1,10 +1,11 @@
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
 from processors.example_event_processor.models import Event
-from typing import List
+from typing import Any, Dict, List
 from utils.transactions_processor import ProcessingResult
 from utils import general_utils
 from utils.transactions_processor import TransactionsProcessor
 from utils.models.schema_names import EXAMPLE
+from utils.bulk_writer import upsert_rows
 from utils.session import Session
 from utils.processor_name import ProcessorName
 from time import perf_counter
@@ -23,7 +24,8 @@ class ExampleEventProcessor(TransactionsProcessor):
         start_version: int,
         end_version: int,
     ) -> ProcessingResult:
-        event_db_objs: List[Event] = []
+        # Rows of the Event table, keyed by column name
+        event_db_objs: List[Dict[str, Any]] = []
         start_time = perf_counter()
         for transaction in transactions:
             # Custom filtering
@@ -49,18 +51,18 @@ class ExampleEventProcessor(TransactionsProcessor):
                 type = event.type_str
                 data = event.data
 
-                # Create an instance of Event
-                event_db_obj = Event(
-                    creation_number=creation_number,
-                    sequence_number=sequence_number,
-                    account_address=account_address,
-                    transaction_version=transaction_version,
-                    transaction_block_height=transaction_block_height,
-                    type=type,
-                    data=data,
-                    transaction_timestamp=transaction_timestamp,
-                    event_index=event_index,
-                )
+                # Create a Event row
+                event_db_obj = {
+                    "creation_number": creation_number,
+                    "sequence_number": sequence_number,
+                    "account_address": account_address,
+                    "transaction_version": transaction_version,
+                    "transaction_block_height": transaction_block_height,
+                    "type": type,
+                    "data": data,
+                    "transaction_timestamp": transaction_timestamp,
+                    "event_index": event_index,
+                }
                 event_db_objs.append(event_db_obj)
         processing_duration_in_secs = perf_counter() - start_time
         start_time = perf_counter()
@@ -73,7 +75,6 @@ class ExampleEventProcessor(TransactionsProcessor):
             db_insertion_duration_in_secs=db_insertion_duration_in_secs,
         )
 
-    def insert_to_db(self, parsed_objs: List[Event]) -> None:
+    def insert_to_db(self, parsed_objs: List[Dict[str, Any]]) -> None:
         with Session() as session, session.begin():
-            for obj in parsed_objs:
-                session.merge(obj)
+            upsert_rows(session, Event, parsed_objs)
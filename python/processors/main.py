@@ -3,26 +3,20 @@ import logging
 from pythonjsonlogger import jsonlogger
 from utils.config import Config
 from utils.worker import IndexerProcessorServer
-from utils.logging import JsonFormatter, CustomLogger
+from utils.logging import configure_logger
 
 if __name__ == "__main__":
-    # Configure the logger
-    logger = CustomLogger("default_python_logger")
-    logger.setLevel(logging.INFO)
-
-    # Create a stream handler for stdout
-    stream_handler = logging.StreamHandler()
-    stream_handler.setFormatter(JsonFormatter())
-
-    # Add the stream handler to the logger
-    logger.addHandler(stream_handler)
-    logging.root = logger
-
     parser = argparse.ArgumentParser()
     parser.add_argument("-c", "--config", help="Path to config file", required=True)
     args = parser.parse_args()
     config = Config.from_yaml_file(args.config)
 
+    # Configure the logger
+    configure_logger(
+        config.server_config.max_parser_log_records_per_interval,
+        config.server_config.parser_log_interval_in_secs,
+    )
+
     indexer_server = IndexerProcessorServer(
         config,
     )
@@ -0,0 +1,297 @@
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Tuple, Type
+
+from sqlalchemy import Boolean, Numeric
+from utils import json_utils
+from utils.models.general_models import Base
+from processors.merkle_lt.models import (
+    MerkleDelegateAccountClaimEvent,
+    MerkleDelegateAccountDelegateAccountVaultEvent,
+    MerkleDelegateAccountRebateEvent,
+    MerkleDelegateAccountRegisterEvent,
+    MerkleFeeDistributorDepositFeeEvent,
+    MerkleGearEquipEvent,
+    MerkleGearForgeEvent,
+    MerkleGearGearEffectEvent,
+    MerkleGearMintEvent,
+    MerkleGearRepairEvent,
+    MerkleGearSalvageEvent,
+    MerkleGearUnequipEvent,
+    MerkleHouseLpDepositEvent,
+    MerkleHouseLpFeeEvent,
+    MerkleHouseLpRedeemCancelEvent,
+    MerkleHouseLpRedeemEvent,
+    MerkleLiquidityAuctionDepositAssetEvent,
+    MerkleLiquidityAuctionDepositPreMklEvent,
+    MerkleLiquidityAuctionWithdrawAssetEvent,
+    MerkleLootboxLootBoxEvent,
+    MerkleLootboxLootBoxOpenEvent,
+    MerkleLootboxV2FtuLootBoxEvent,
+    MerkleLootboxV2LootBoxEvent,
+    MerkleLootboxV2LootBoxOpenEvent,
+    MerkleMklTokenDelegateAccountVaultEvent,
+    MerklePmklClaimEvent,
+    MerklePmklMintEvent,
+    MerklePreTgeRewardClaimEvent,
+    MerkleProfileIncreaseBoostEvent,
+    MerkleProfileIncreaseXPEvent,
+    MerkleProfileSoftResetEvent,
+    MerkleTradingCancelOrderEvent,
+    MerkleTradingPlaceOrderEvent,
+    MerkleTradingPositionEvent,
+    MerkleTradingUpdateTPSLEvent,
+    MerkleUsernameTicketIssueEvent,
+    MerkleUsernameUsernameDeleteEvent,
+    MerkleUsernameUsernameRegisterEvent,
+    MerklereferralProtocolRevenueEvent,
+    MerkleshardsTokenBurnEvent,
+    MerkleshardsTokenMintEvent,
+    MerklestakingLockEvent,
+    MerklestakingUnlockEvent,
+)
+
+# msgspec is optional. With it, each event payload is decoded straight into a typed struct.
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Columns every Merkle event table has that don't come from the event payload
+COMMON_COLUMNS = {
+    "sequence_number",
+    "creation_number",
+    "account_address",
+    "sender_address",
+    "transaction_version",
+    "identifier",
+    "event_index",
+    "transaction_timestamp",
+    "inserted_at",
+}
+# A Move TypeInfo payload field such as pair_type is stored as <field>_account_address,
+# <field>_module_name and <field>_struct_name columns
+TYPE_INFO_KEYS = ("account_address", "module_name", "struct_name")
+TYPE_INFO = object()
+
+
+# Raised when an event payload no longer matches the columns of its model
+class EventSchemaError(Exception):
+    pass
+
+
+# Vectors such as lootbox go into string columns as their string representation
+def to_str(value: Any) -> str:
+    return value if type(value) is str else str(value)
+
+
+# Works out the payload fields of a model from its column types: numeric columns hold u64 strings,
+# boolean columns bools, string columns strings or vectors, and column triples for TypeInfo fields.
+def get_field_spec(model: Type[Base]) -> Dict[str, Any]:
+    columns = [
+        column
+        for column in model.__table__.columns
+        if column.name not in COMMON_COLUMNS
+    ]
+    column_names = {column.name for column in columns}
+    # Maps each TypeInfo column to the payload field it comes from
+    type_info_columns: Dict[str, str] = {}
+    for column in columns:
+        field_name = column.name.removesuffix("_account_address")
+        type_info_column_names = [
+            f"{field_name}_{type_info_key}" for type_info_key in TYPE_INFO_KEYS
+        ]
+        if field_name != column.name and column_names.issuperset(
+            type_info_column_names
+        ):
+            for type_info_column_name in type_info_column_names:
+                type_info_columns[type_info_column_name] = field_name
+
+    field_spec: Dict[str, Any] = {}
+    for column in columns:
+        if column.name in type_info_columns:
+            field_spec[type_info_columns[column.name]] = TYPE_INFO
+        elif isinstance(column.type, Boolean):
+            field_spec[column.name] = bool
+        elif isinstance(column.type, Numeric):
+            field_spec[column.name] = int
+        else:
+            field_spec[column.name] = to_str
+    return field_spec
+
+
+def get_field(
+    field_name: str, coerce: Callable[[Any], Any]
+) -> Callable[[Dict[str, Any]], Any]:
+    return lambda data: coerce(data[field_name])
+
+
+def get_type_info_field(
+    field_name: str, type_info_key: str
+) -> Callable[[Dict[str, Any]], Any]:
+    return lambda data: data[field_name][type_info_key]
+
+
+def get_struct_field(field_name: str) -> Callable[[Any], Any]:
+    return lambda struct: to_str(getattr(struct, field_name))
+
+
+# Builds the row of one Merkle event from its JSON payload, following the field spec derived
+# from the model's columns. With msgspec the payload is decoded and coerced in a single pass into a
+# struct generated from the spec, otherwise it's decoded to a dict and coerced field by field.
+class EventDecoder:
+    def __init__(self, model: Type[Base]):
+        self.model = model
+        field_spec = get_field_spec(model)
+        self.column_getters: List[Tuple[str, Callable[[Any], Any]]] = []
+        if msgspec is not None:
+            type_info_struct = msgspec.defstruct(
+                "TypeInfo", [(type_info_key, str) for type_info_key in TYPE_INFO_KEYS]
+            )
+            struct_fields: List[Tuple[str, Any]] = []
+            for field_name, coerce in field_spec.items():
+                if coerce is TYPE_INFO:
+                    struct_fields.append((field_name, type_info_struct))
+                    for type_info_key in TYPE_INFO_KEYS:
+                        self.column_getters.append(
+                            (
+                                f"{field_name}_{type_info_key}",
+                                attrgetter(f"{field_name}.{type_info_key}"),
+                            )
+                        )
+                elif coerce is to_str:
+                    struct_fields.append((field_name, Any))
+                    self.column_getters.append(
+                        (field_name, get_struct_field(field_name))
+                    )
+                else:
+                    struct_fields.append((field_name, coerce))
+                    self.column_getters.append((field_name, attrgetter(field_name)))
+            # Lax mode turns u64 strings into ints
+            self.struct_decoder = msgspec.json.Decoder(
+                msgspec.defstruct(model.__name__, struct_fields), strict=False
+            )
+        else:
+            for field_name, coerce in field_spec.items():
+                if coerce is TYPE_INFO:
+                    for type_info_key in TYPE_INFO_KEYS:
+                        self.column_getters.append(
+                            (
+                                f"{field_name}_{type_info_key}",
+                                get_type_info_field(field_name, type_info_key),
+                            )
+                        )
+                else:
+                    self.column_getters.append(
+                        (field_name, get_field(field_name, coerce))
+                    )
+
+    # common_fields holds the columns every Merkle event table shares, such as identifier and
+    # transaction_version. Raises ValueError if event_data isn't valid JSON.
+    def decode(
+        self, event_data: str | bytes, common_fields: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        if msgspec is not None:
+            try:
+                payload = self.struct_decoder.decode(event_data)
+            except msgspec.ValidationError as e:
+                raise EventSchemaError(
+                    f"[Parser] {self.model.__name__} payload doesn't match its schema: {e}"
+                ) from e
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+        else:
+            payload = json_utils.loads(event_data)
+        columns = dict(common_fields)
+        try:
+            for column_name, get_column in self.column_getters:
+                columns[column_name] = get_column(payload)
+        except (KeyError, TypeError, ValueError) as e:
+            raise EventSchemaError(
+                f"[Parser] {self.model.__name__} payload doesn't match its schema: "
+                f"{type(e).__name__} {e}"
+            ) from e
+        return columns
+
+
+# Maps (module name, event struct name) to the decoder for that event
+EVENT_DECODERS: Dict[Tuple[str, str], EventDecoder] = {
+    # delegate_account events
+    ("delegate_account", "DelegateAccountVaultEvent"): EventDecoder(
+        MerkleDelegateAccountDelegateAccountVaultEvent
+    ),
+    ("delegate_account", "RegisterEvent"): EventDecoder(
+        MerkleDelegateAccountRegisterEvent
+    ),
+    ("delegate_account", "ClaimEvent"): EventDecoder(MerkleDelegateAccountClaimEvent),
+    ("delegate_account", "RebateEvent"): EventDecoder(MerkleDelegateAccountRebateEvent),
+    # fee_distributor events
+    ("fee_distributor", "DepositFeeEvent"): EventDecoder(
+        MerkleFeeDistributorDepositFeeEvent
+    ),
+    # gear events
+    ("gear", "EquipEvent"): EventDecoder(MerkleGearEquipEvent),
+    ("gear", "GearEffectEvent"): EventDecoder(MerkleGearGearEffectEvent),
+    ("gear", "UnequipEvent"): EventDecoder(MerkleGearUnequipEvent),
+    ("gear", "SalvageEvent"): EventDecoder(MerkleGearSalvageEvent),
+    ("gear", "RepairEvent"): EventDecoder(MerkleGearRepairEvent),
+    ("gear", "MintEvent"): EventDecoder(MerkleGearMintEvent),
+    ("gear", "ForgeEvent"): EventDecoder(MerkleGearForgeEvent),
+    # house_lp events
+    ("house_lp", "RedeemEvent"): EventDecoder(MerkleHouseLpRedeemEvent),
+    ("house_lp", "FeeEvent"): EventDecoder(MerkleHouseLpFeeEvent),
+    ("house_lp", "DepositEvent"): EventDecoder(MerkleHouseLpDepositEvent),
+    ("house_lp", "RedeemCancelEvent"): EventDecoder(MerkleHouseLpRedeemCancelEvent),
+    # liquidity_auction events
+    ("liquidity_auction", "WithdrawAssetEvent"): EventDecoder(
+        MerkleLiquidityAuctionWithdrawAssetEvent
+    ),
+    ("liquidity_auction", "DepositPreMklEvent"): EventDecoder(
+        MerkleLiquidityAuctionDepositPreMklEvent
+    ),
+    ("liquidity_auction", "DepositAssetEvent"): EventDecoder(
+        MerkleLiquidityAuctionDepositAssetEvent
+    ),
+    # lootbox events
+    ("lootbox", "LootBoxOpenEvent"): EventDecoder(MerkleLootboxLootBoxOpenEvent),
+    ("lootbox", "LootBoxEvent"): EventDecoder(MerkleLootboxLootBoxEvent),
+    # lootbox_v2 events
+    ("lootbox_v2", "LootBoxOpenEvent"): EventDecoder(MerkleLootboxV2LootBoxOpenEvent),
+    ("lootbox_v2", "FtuLootBoxEvent"): EventDecoder(MerkleLootboxV2FtuLootBoxEvent),
+    ("lootbox_v2", "LootBoxEvent"): EventDecoder(MerkleLootboxV2LootBoxEvent),
+    # mkl_token events
+    ("mkl_token", "DelegateAccountVaultEvent"): EventDecoder(
+        MerkleMklTokenDelegateAccountVaultEvent
+    ),
+    # pMKL events
+    ("pMKL", "ClaimEvent"): EventDecoder(MerklePmklClaimEvent),
+    ("pMKL", "MintEvent"): EventDecoder(MerklePmklMintEvent),
+    # pre_tge_reward events
+    ("pre_tge_reward", "ClaimEvent"): EventDecoder(MerklePreTgeRewardClaimEvent),
+    # profile events
+    ("profile", "IncreaseBoostEvent"): EventDecoder(MerkleProfileIncreaseBoostEvent),
+    ("profile", "IncreaseXPEvent"): EventDecoder(MerkleProfileIncreaseXPEvent),
+    ("profile", "SoftResetEvent"): EventDecoder(MerkleProfileSoftResetEvent),
+    # referral events
+    ("referral", "ProtocolRevenueEvent"): EventDecoder(
+        MerklereferralProtocolRevenueEvent
+    ),
+    # shard_token events
+    ("shard_token", "BurnEvent"): EventDecoder(MerkleshardsTokenBurnEvent),
+    ("shard_token", "MintEvent"): EventDecoder(MerkleshardsTokenMintEvent),
+    # staking events
+    ("staking", "UnlockEvent"): EventDecoder(MerklestakingUnlockEvent),
+    ("staking", "LockEvent"): EventDecoder(MerklestakingLockEvent),
+    # trading events
+    ("trading", "UpdateTPSLEvent"): EventDecoder(MerkleTradingUpdateTPSLEvent),
+    ("trading", "PlaceOrderEvent"): EventDecoder(MerkleTradingPlaceOrderEvent),
+    ("trading", "PositionEvent"): EventDecoder(MerkleTradingPositionEvent),
+    ("trading", "CancelOrderEvent"): EventDecoder(MerkleTradingCancelOrderEvent),
+    # username events
+    ("username", "UsernameRegisterEvent"): EventDecoder(
+        MerkleUsernameUsernameRegisterEvent
+    ),
+    ("username", "TicketIssueEvent"): EventDecoder(MerkleUsernameTicketIssueEvent),
+    ("username", "UsernameDeleteEvent"): EventDecoder(
+        MerkleUsernameUsernameDeleteEvent
+    ),
+}
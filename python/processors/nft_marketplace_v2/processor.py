@@ -1,6 +1,6 @@
-import json
+from utils import json_utils
 
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
 from processors.nft_orderbooks.nft_marketplace_enums import MarketplaceName
 from processors.nft_marketplace_v2.nft_marketplace_models import (
@@ -10,7 +10,7 @@ from processors.nft_marketplace_v2.nft_marketplace_models import (
     CurrentNFTMarketplaceAuction,
     NFTMarketplaceActivities,
 )
-from utils.object_utils import get_object_core, ObjectCore
+from utils.object_utils import OBJECT_CORE_TYPE, get_object_core, ObjectCore
 from utils.token_utils import TokenStandard
 from utils.transactions_processor import TransactionsProcessor, ProcessingResult
 from utils import event_utils, transaction_utils, write_set_change_utils
@@ -53,11 +53,24 @@ from utils.processor_name import ProcessorName
 from utils.token_utils import TokenStandard
 from utils.models.schema_names import NFT_MARKETPLACE_V2_SCHEMA_NAME
 from utils.session import Session
-from sqlalchemy.dialects.postgresql import insert
-from utils.config import NFTMarketplaceV2Config
+from sqlalchemy.orm import Session as SessionType
+from utils.bulk_writer import copy_rows, upsert_rows
+from utils.config import DBWriteMode, NFTMarketplaceV2Config
 from time import perf_counter
 
 
+# Decodes the object core of an offer from the object resources indexed by the write set scan
+def get_indexed_object_core(
+    object_resources: Dict[str, transaction_pb2.WriteResource], address: str
+) -> Optional[ObjectCore]:
+    object_resource = object_resources.get(address)
+    if not object_resource:
+        return None
+    return get_object_core(
+        object_resource.type_str, json_utils.loads(object_resource.data)
+    )
+
+
 class NFTMarketplaceV2Processor(TransactionsProcessor):
     config: NFTMarketplaceV2Config
 
@@ -79,6 +92,15 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
         marketplace_contract_address = str(self.config.marketplace_contract_address)
         processing_duration_in_secs = 0.0
         db_insertion_duration_in_secs = 0.0
+
+        # Rows are gathered across the whole batch and written in one DB transaction at the end.
+        # They are plain dicts keyed by column name, the models are only used for their tables.
+        nft_marketplace_activities: List[Dict[str, Any]] = []
+        current_nft_marketplace_listings: List[Dict[str, Any]] = []
+        current_token_offers: List[Dict[str, Any]] = []
+        current_collection_offers: List[Dict[str, Any]] = []
+        current_auctions: List[Dict[str, Any]] = []
+
         for transaction in transactions:
             start_time = perf_counter()
             user_transaction = transaction_utils.get_user_transaction(transaction)
@@ -93,19 +115,14 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
             # and collection address for token v2.
             collection_metadatas: Dict[str, CollectionMetadata] = {}
 
-            nft_marketplace_activities: List[NFTMarketplaceActivities] = []
-            current_nft_marketplace_listings: List[CurrentNFTMarketplaceListing] = []
-            current_token_offers: List[CurrentNFTMarketplaceTokenOffer] = []
-            current_collection_offers: List[CurrentNFTMarketplaceCollectionOffer] = []
-            current_auctions: List[CurrentNFTMarketplaceAuction] = []
-
             collection_offer_filled_metadatas: Dict[
                 str, CollectionOfferEventMetadata
             ] = {}
 
             transaction_metadata = parse_transaction_metadata(transaction)
             events = user_transaction.events
-            write_set_changes = transaction_utils.get_write_set_changes(transaction)
+            # Scanned in place, get_write_set_changes would copy the repeated field
+            write_set_changes = transaction.info.changes
 
             # Get coin type
             type_args = (
@@ -140,7 +157,7 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
                 ]:
                     continue
 
-                data = json.loads(event.data)
+                data = json_utils.loads(event.data)
                 price = data.get("price")
                 offer_or_listing_id = standardize_address(
                     data.get("listing")
@@ -172,232 +189,242 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
                         listing_type = data.get("type")
                         assert listing_type
 
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=token_metadata["collection_id"],
-                            token_data_id=token_metadata["token_data_id"],
-                            creator_address=token_metadata["creator_address"],
-                            collection_name=token_metadata["collection_name"],
-                            token_name=token_metadata["token_name"],
-                            property_version=token_metadata["property_version"],
-                            price=price,
-                            token_amount=1,
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=standardize_address(data.get("seller")),
-                            buyer=standardize_address(data.get("purchaser")),
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.LISTING_FILLED.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "token_data_id": token_metadata["token_data_id"],
+                            "creator_address": token_metadata["creator_address"],
+                            "collection_name": token_metadata["collection_name"],
+                            "token_name": token_metadata["token_name"],
+                            "property_version": token_metadata["property_version"],
+                            "price": price,
+                            "token_amount": 1,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": standardize_address(data.get("seller")),
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.LISTING_FILLED.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
 
                         if listing_type == "auction":
-                            current_auction = CurrentNFTMarketplaceAuction(
-                                listing_id=offer_or_listing_id,
-                                token_data_id=token_metadata["token_data_id"],
-                                collection_id=token_metadata["collection_id"],
-                                fee_schedule_id=fee_schedule_id,
-                                seller=standardize_address(data.get("seller")),
-                                current_bid_price=price,
-                                current_bidder=standardize_address(
+                            current_auction = {
+                                "listing_id": offer_or_listing_id,
+                                "token_data_id": token_metadata["token_data_id"],
+                                "collection_id": token_metadata["collection_id"],
+                                "fee_schedule_id": fee_schedule_id,
+                                "seller": standardize_address(data.get("seller")),
+                                "current_bid_price": price,
+                                "current_bidder": standardize_address(
                                     data.get("purchaser")
                                 ),
-                                starting_bid_price=0,
-                                buy_it_now_price=None,
-                                token_amount=1,
-                                expiration_time=0,
-                                is_deleted=True,
-                                token_standard=TokenStandard.V2.value,
-                                marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                coin_type=coin_type,
-                                contract_address=transaction_metadata.contract_address,
-                                entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                last_transaction_version=transaction.version,
-                                last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                            )
+                                "starting_bid_price": 0,
+                                "buy_it_now_price": None,
+                                "token_amount": 1,
+                                "expiration_time": 0,
+                                "is_deleted": True,
+                                "token_standard": TokenStandard.V2.value,
+                                "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                                "coin_type": coin_type,
+                                "contract_address": transaction_metadata.contract_address,
+                                "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                                "last_transaction_version": transaction.version,
+                                "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                            }
                         else:
-                            current_listing = CurrentNFTMarketplaceListing(
-                                token_data_id=token_metadata["token_data_id"],
-                                listing_id=offer_or_listing_id,
-                                fee_schedule_id=fee_schedule_id,
-                                collection_id=token_metadata["collection_id"],
-                                price=price,
-                                token_amount=0,
-                                token_standard=token_metadata["token_standard"].value,
-                                seller=standardize_address(data.get("seller")),
-                                is_deleted=True,
-                                coin_type=coin_type,
-                                marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                contract_address=transaction_metadata.contract_address,
-                                entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                last_transaction_version=transaction.version,
-                                last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                            )
+                            current_listing = {
+                                "token_data_id": token_metadata["token_data_id"],
+                                "listing_id": offer_or_listing_id,
+                                "fee_schedule_id": fee_schedule_id,
+                                "collection_id": token_metadata["collection_id"],
+                                "price": price,
+                                "token_amount": 0,
+                                "token_standard": token_metadata[
+                                    "token_standard"
+                                ].value,
+                                "seller": standardize_address(data.get("seller")),
+                                "is_deleted": True,
+                                "coin_type": coin_type,
+                                "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                                "contract_address": transaction_metadata.contract_address,
+                                "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                                "last_transaction_version": transaction.version,
+                                "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                            }
                     case "events::ListingCanceledEvent":
                         assert token_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=token_metadata["collection_id"],
-                            token_data_id=token_metadata["token_data_id"],
-                            creator_address=token_metadata["creator_address"],
-                            collection_name=token_metadata["collection_name"],
-                            token_name=token_metadata["token_name"],
-                            property_version=token_metadata["property_version"],
-                            price=price,
-                            token_amount=1,
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=standardize_address(data.get("seller")),
-                            buyer=None,
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.LISTING_CANCEL.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
-                        current_listing = CurrentNFTMarketplaceListing(
-                            token_data_id=token_metadata["token_data_id"],
-                            listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=token_metadata["collection_id"],
-                            price=price,
-                            token_amount=0,
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=standardize_address(data.get("seller")),
-                            is_deleted=True,
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            last_transaction_version=transaction.version,
-                            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "token_data_id": token_metadata["token_data_id"],
+                            "creator_address": token_metadata["creator_address"],
+                            "collection_name": token_metadata["collection_name"],
+                            "token_name": token_metadata["token_name"],
+                            "property_version": token_metadata["property_version"],
+                            "price": price,
+                            "token_amount": 1,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": standardize_address(data.get("seller")),
+                            "buyer": None,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.LISTING_CANCEL.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                        current_listing = {
+                            "token_data_id": token_metadata["token_data_id"],
+                            "listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "price": price,
+                            "token_amount": 0,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": standardize_address(data.get("seller")),
+                            "is_deleted": True,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
                     case "events::ListingPlacedEvent":
                         assert token_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=token_metadata["collection_id"],
-                            token_data_id=token_metadata["token_data_id"],
-                            creator_address=token_metadata["creator_address"],
-                            collection_name=token_metadata["collection_name"],
-                            token_name=token_metadata["token_name"],
-                            property_version=token_metadata["property_version"],
-                            price=price,
-                            token_amount=1,
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=standardize_address(data.get("seller")),
-                            buyer=None,
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.LISTING_PLACE.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "token_data_id": token_metadata["token_data_id"],
+                            "creator_address": token_metadata["creator_address"],
+                            "collection_name": token_metadata["collection_name"],
+                            "token_name": token_metadata["token_name"],
+                            "property_version": token_metadata["property_version"],
+                            "price": price,
+                            "token_amount": 1,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": standardize_address(data.get("seller")),
+                            "buyer": None,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.LISTING_PLACE.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
                     case "events::CollectionOfferPlacedEvent":
                         assert collection_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=collection_metadata["collection_id"],
-                            token_data_id=None,
-                            creator_address=collection_metadata["creator_address"],
-                            collection_name=collection_metadata["collection_name"],
-                            token_name=None,
-                            property_version=None,
-                            price=price,
-                            token_amount=data.get("token_amount"),
-                            token_standard=collection_metadata["token_standard"].value,
-                            seller=None,
-                            buyer=standardize_address(data.get("purchaser")),
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.BID_PLACE.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": collection_metadata["collection_id"],
+                            "token_data_id": None,
+                            "creator_address": collection_metadata["creator_address"],
+                            "collection_name": collection_metadata["collection_name"],
+                            "token_name": None,
+                            "property_version": None,
+                            "price": price,
+                            "token_amount": data.get("token_amount"),
+                            "token_standard": collection_metadata[
+                                "token_standard"
+                            ].value,
+                            "seller": None,
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.BID_PLACE.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
                     case "events::CollectionOfferCanceledEvent":
                         assert collection_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=collection_metadata["collection_id"],
-                            token_data_id=None,
-                            creator_address=collection_metadata["creator_address"],
-                            collection_name=collection_metadata["collection_name"],
-                            token_name=None,
-                            property_version=None,
-                            price=price,
-                            token_amount=data.get("remaining_token_amount"),
-                            token_standard=collection_metadata["token_standard"].value,
-                            seller=None,
-                            buyer=standardize_address(data.get("purchaser")),
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.BID_CHANGE.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
-                        current_collection_offer = CurrentNFTMarketplaceCollectionOffer(
-                            collection_offer_id=offer_or_listing_id,
-                            collection_id=collection_metadata["collection_id"],
-                            fee_schedule_id=fee_schedule_id,
-                            buyer=standardize_address(data.get("purchaser")),
-                            item_price=price,
-                            remaining_token_amount=data.get("remaining_token_amount"),
-                            expiration_time=0,
-                            is_deleted=True,
-                            token_standard=collection_metadata["token_standard"].value,
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            last_transaction_version=transaction.version,
-                            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": collection_metadata["collection_id"],
+                            "token_data_id": None,
+                            "creator_address": collection_metadata["creator_address"],
+                            "collection_name": collection_metadata["collection_name"],
+                            "token_name": None,
+                            "property_version": None,
+                            "price": price,
+                            "token_amount": data.get("remaining_token_amount"),
+                            "token_standard": collection_metadata[
+                                "token_standard"
+                            ].value,
+                            "seller": None,
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.BID_CHANGE.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                        current_collection_offer = {
+                            "collection_offer_id": offer_or_listing_id,
+                            "collection_id": collection_metadata["collection_id"],
+                            "fee_schedule_id": fee_schedule_id,
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "item_price": price,
+                            "remaining_token_amount": data.get(
+                                "remaining_token_amount"
+                            ),
+                            "expiration_time": 0,
+                            "is_deleted": True,
+                            "token_standard": collection_metadata[
+                                "token_standard"
+                            ].value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
                         current_collection_offers.append(current_collection_offer)
                     case "events::CollectionOfferFilledEvent":
                         assert token_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            collection_id=token_metadata["collection_id"],
-                            fee_schedule_id=fee_schedule_id,
-                            token_data_id=token_metadata["token_data_id"],
-                            creator_address=token_metadata["creator_address"],
-                            collection_name=token_metadata["collection_name"],
-                            token_name=token_metadata["token_name"],
-                            property_version=token_metadata["property_version"],
-                            price=price,
-                            token_amount=data.get("remaining_token_amount", 0),
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=standardize_address(data.get("seller")),
-                            buyer=standardize_address(data.get("purchaser")),
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.BID_CHANGE.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "fee_schedule_id": fee_schedule_id,
+                            "token_data_id": token_metadata["token_data_id"],
+                            "creator_address": token_metadata["creator_address"],
+                            "collection_name": token_metadata["collection_name"],
+                            "token_name": token_metadata["token_name"],
+                            "property_version": token_metadata["property_version"],
+                            "price": price,
+                            "token_amount": data.get("remaining_token_amount", 0),
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": standardize_address(data.get("seller")),
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.BID_CHANGE.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
 
                         # The collection offer resource may be deleted after it is filled,
                         # so we need to parse collection offer metadata from the event
@@ -418,140 +445,140 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
                         ] = collection_offer_filled_metadata
                     case "events::TokenOfferPlacedEvent":
                         assert token_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=token_metadata["collection_id"],
-                            token_data_id=token_metadata["token_data_id"],
-                            creator_address=token_metadata["creator_address"],
-                            collection_name=token_metadata["collection_name"],
-                            token_name=token_metadata["token_name"],
-                            property_version=token_metadata["property_version"],
-                            price=price,
-                            token_amount=1,
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=None,
-                            buyer=standardize_address(data.get("purchaser")),
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.BID_PLACE.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "token_data_id": token_metadata["token_data_id"],
+                            "creator_address": token_metadata["creator_address"],
+                            "collection_name": token_metadata["collection_name"],
+                            "token_name": token_metadata["token_name"],
+                            "property_version": token_metadata["property_version"],
+                            "price": price,
+                            "token_amount": 1,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": None,
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.BID_PLACE.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
                     case "events::TokenOfferCanceledEvent":
                         assert token_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=token_metadata["collection_id"],
-                            token_data_id=token_metadata["token_data_id"],
-                            creator_address=token_metadata["creator_address"],
-                            collection_name=token_metadata["collection_name"],
-                            token_name=token_metadata["token_name"],
-                            property_version=token_metadata["property_version"],
-                            price=price,
-                            token_amount=0,
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=None,
-                            buyer=standardize_address(data.get("purchaser")),
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.BID_CHANGE.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
-                        current_token_offer = CurrentNFTMarketplaceTokenOffer(
-                            offer_id=offer_or_listing_id,
-                            token_data_id=token_metadata["token_data_id"],
-                            collection_id=token_metadata["collection_id"],
-                            fee_schedule_id=fee_schedule_id,
-                            buyer=standardize_address(data.get("purchaser")),
-                            price=price,
-                            token_amount=0,
-                            expiration_time=0,
-                            is_deleted=True,
-                            token_standard=token_metadata["token_standard"].value,
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            last_transaction_version=transaction.version,
-                            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "token_data_id": token_metadata["token_data_id"],
+                            "creator_address": token_metadata["creator_address"],
+                            "collection_name": token_metadata["collection_name"],
+                            "token_name": token_metadata["token_name"],
+                            "property_version": token_metadata["property_version"],
+                            "price": price,
+                            "token_amount": 0,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": None,
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.BID_CHANGE.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                        current_token_offer = {
+                            "offer_id": offer_or_listing_id,
+                            "token_data_id": token_metadata["token_data_id"],
+                            "collection_id": token_metadata["collection_id"],
+                            "fee_schedule_id": fee_schedule_id,
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "price": price,
+                            "token_amount": 0,
+                            "expiration_time": 0,
+                            "is_deleted": True,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
                     case "events::TokenOfferFilledEvent":
                         assert token_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=token_metadata["collection_id"],
-                            token_data_id=token_metadata["token_data_id"],
-                            creator_address=token_metadata["creator_address"],
-                            collection_name=token_metadata["collection_name"],
-                            token_name=token_metadata["token_name"],
-                            property_version=token_metadata["property_version"],
-                            price=price,
-                            token_amount=1,
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=standardize_address(data.get("seller")),
-                            buyer=standardize_address(data.get("purchaser")),
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.BID_FILLED.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
-                        current_token_offer = CurrentNFTMarketplaceTokenOffer(
-                            offer_id=offer_or_listing_id,
-                            token_data_id=token_metadata["token_data_id"],
-                            collection_id=token_metadata["collection_id"],
-                            fee_schedule_id=fee_schedule_id,
-                            buyer=standardize_address(data.get("purchaser")),
-                            price=price,
-                            token_amount=0,
-                            expiration_time=0,
-                            is_deleted=True,
-                            token_standard=token_metadata["token_standard"].value,
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            last_transaction_version=transaction.version,
-                            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "token_data_id": token_metadata["token_data_id"],
+                            "creator_address": token_metadata["creator_address"],
+                            "collection_name": token_metadata["collection_name"],
+                            "token_name": token_metadata["token_name"],
+                            "property_version": token_metadata["property_version"],
+                            "price": price,
+                            "token_amount": 1,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": standardize_address(data.get("seller")),
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.BID_FILLED.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                        current_token_offer = {
+                            "offer_id": offer_or_listing_id,
+                            "token_data_id": token_metadata["token_data_id"],
+                            "collection_id": token_metadata["collection_id"],
+                            "fee_schedule_id": fee_schedule_id,
+                            "buyer": standardize_address(data.get("purchaser")),
+                            "price": price,
+                            "token_amount": 0,
+                            "expiration_time": 0,
+                            "is_deleted": True,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
                     case "events::AuctionBidEvent":
                         assert token_metadata
-                        activity = NFTMarketplaceActivities(
-                            transaction_version=transaction.version,
-                            event_index=event_index,
-                            offer_or_listing_id=offer_or_listing_id,
-                            fee_schedule_id=fee_schedule_id,
-                            collection_id=token_metadata["collection_id"],
-                            token_data_id=token_metadata["token_data_id"],
-                            creator_address=token_metadata["creator_address"],
-                            collection_name=token_metadata["collection_name"],
-                            token_name=token_metadata["token_name"],
-                            property_version=token_metadata["property_version"],
-                            price=data.get("new_bid"),
-                            token_amount=1,
-                            token_standard=token_metadata["token_standard"].value,
-                            seller=None,
-                            buyer=standardize_address(data.get("new_bidder")),
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            event_type=StandardMarketplaceEventType.BID_PLACE.value,
-                            transaction_timestamp=transaction_metadata.transaction_timestamp,
-                        )
+                        activity = {
+                            "transaction_version": transaction.version,
+                            "event_index": event_index,
+                            "offer_or_listing_id": offer_or_listing_id,
+                            "fee_schedule_id": fee_schedule_id,
+                            "collection_id": token_metadata["collection_id"],
+                            "token_data_id": token_metadata["token_data_id"],
+                            "creator_address": token_metadata["creator_address"],
+                            "collection_name": token_metadata["collection_name"],
+                            "token_name": token_metadata["token_name"],
+                            "property_version": token_metadata["property_version"],
+                            "price": data.get("new_bid"),
+                            "token_amount": 1,
+                            "token_standard": token_metadata["token_standard"].value,
+                            "seller": None,
+                            "buyer": standardize_address(data.get("new_bidder")),
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "event_type": StandardMarketplaceEventType.BID_PLACE.value,
+                            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
                     case _:
                         continue
 
@@ -564,7 +591,7 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
                     current_auctions.append(current_auction)
 
             # Object, listing and offer models. The key is the resource address
-            object_metadatas: Dict[str, ObjectCore] = {}
+            object_resources: Dict[str, transaction_pb2.WriteResource] = {}
             listing_metadatas: Dict[str, ListingMetadata] = {}
             fixed_price_listings: Dict[str, FixedPriceListing] = {}
             listing_token_v1_containers: Dict[str, ListingTokenV1Container] = {}
@@ -575,28 +602,33 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
             collection_offer_v1s: Dict[str, CollectionOfferV1] = {}
             collection_offer_v2s: Dict[str, CollectionOfferV2] = {}
             auction_listings: Dict[str, AuctionListing] = {}
+            # Address and type of every marketplace resource, in write set order
+            marketplace_resources: List[Tuple[str, str]] = []
 
             # Loop 2
-            # Parse out all the listing, auction, bid, and offer data from write set changes.
-            # This is a bit more complicated than the other parsers because the data is spread out across multiple write set changes,
-            # so we need a first loop to get all the data.
-            for wsc_index, wsc in enumerate(write_set_changes):
+            # Scan the write set changes once. The listing, auction, bid, and offer data is spread out
+            # across multiple resources, so they're indexed by address here and put together below.
+            # Only marketplace resources are decoded. Object cores are kept as is and only decoded for
+            # the offers that need their owner.
+            for wsc in write_set_changes:
                 write_resource = write_set_change_utils.get_write_resource(wsc)
                 if write_resource:
-                    move_resource_address = standardize_address(write_resource.address)
                     move_resource_type = write_resource.type_str
-                    move_resource_type_address = write_resource.type.address
-                    data = json.loads(write_resource.data)
-
-                    # Parse object metadata
-                    object_core = get_object_core(move_resource_type, data)
-
-                    if object_core:
-                        object_metadatas[move_resource_address] = object_core
+                    if move_resource_type == OBJECT_CORE_TYPE:
+                        object_resources[
+                            standardize_address(write_resource.address)
+                        ] = write_resource
+                        continue
 
-                    if move_resource_type_address != marketplace_contract_address:
+                    if write_resource.type.address != marketplace_contract_address:
                         continue
 
+                    move_resource_address = standardize_address(write_resource.address)
+                    data = json_utils.loads(write_resource.data)
+                    marketplace_resources.append(
+                        (move_resource_address, move_resource_type)
+                    )
+
                     # Parse listing metadata
                     listing_metadata = get_listing_metadata(
                         move_resource_type, data, marketplace_contract_address
@@ -671,327 +703,327 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
                     if auction_listing:
                         auction_listings[move_resource_address] = auction_listing
 
+                delete_resource = write_set_change_utils.get_delete_resource(wsc)
+                if delete_resource:
+                    move_resource_address = standardize_address(delete_resource.address)
+
+                    # If a collection offer resource gets deleted, that means it the offer was filled completely
+                    # and we handle that here.
+                    maybe_collection_offer_filled_metadata = (
+                        collection_offer_filled_metadatas.get(move_resource_address)
+                    )
+                    if maybe_collection_offer_filled_metadata:
+                        collection_metadata = maybe_collection_offer_filled_metadata[
+                            "collection_metadata"
+                        ]
+                        current_collection_offer = {
+                            "collection_offer_id": move_resource_address,
+                            "collection_id": collection_metadata["collection_id"],
+                            "fee_schedule_id": maybe_collection_offer_filled_metadata[
+                                "fee_schedule_id"
+                            ],
+                            "buyer": maybe_collection_offer_filled_metadata["buyer"],
+                            "item_price": maybe_collection_offer_filled_metadata[
+                                "item_price"
+                            ],
+                            "remaining_token_amount": 0,
+                            "expiration_time": 0,
+                            "is_deleted": True,
+                            "token_standard": collection_metadata[
+                                "token_standard"
+                            ].value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                        current_collection_offers.append(current_collection_offer)
+
             # Loop 3
             # Reconstruct the full listing and offer models and create DB objects
-            for _, wsc in enumerate(write_set_changes):
-                write_resource = write_set_change_utils.get_write_resource(wsc)
-                if write_resource:
-                    move_type_address = write_resource.type.address
-                    if move_type_address != marketplace_contract_address:
-                        continue
+            for move_resource_address, move_resource_type in marketplace_resources:
+                if (
+                    move_resource_type
+                    == f"{marketplace_contract_address}::listing::Listing"
+                ):
+                    # Get the data related to this listing that was parsed from the write set scan
+                    listing_metadata = listing_metadatas.get(move_resource_address)
+                    fixed_price_listing = fixed_price_listings.get(
+                        move_resource_address
+                    )
+                    auction_listing = auction_listings.get(move_resource_address)
 
-                    move_resource_address = standardize_address(write_resource.address)
-                    move_resource_type = write_resource.type_str
+                    assert (
+                        listing_metadata
+                    ), f"Listing metadata not found for txn {transaction.version}"
 
-                    if (
-                        move_resource_type
-                        == f"{marketplace_contract_address}::listing::Listing"
-                    ):
-                        # Get the data related to this listing that was parsed from loop 2
-                        listing_metadata = listing_metadatas.get(move_resource_address)
-                        fixed_price_listing = fixed_price_listings.get(
-                            move_resource_address
+                    # If the listing is an auction, it will have an coin_listing::AuctionListing resource, otherwise
+                    # it's a fixed price listing.
+                    if auction_listing:
+                        token_metadata = token_metadatas.get(
+                            listing_metadata["token_address"]
                         )
-                        auction_listing = auction_listings.get(move_resource_address)
-
                         assert (
-                            listing_metadata
-                        ), f"Listing metadata not found for txn {transaction.version}"
-
-                        # If the listing is an auction, it will have an coin_listing::AuctionListing resource, otherwise
-                        # it's a fixed price listing.
-                        if auction_listing:
-                            token_metadata = token_metadatas.get(
-                                listing_metadata["token_address"]
-                            )
-                            assert (
-                                token_metadata
-                            ), f"Token metadata not found for txn {transaction.version}"
-
-                            # Parses when auction is placed and when a bid is placed on an auction
-                            current_auction = CurrentNFTMarketplaceAuction(
-                                listing_id=move_resource_address,
-                                token_data_id=listing_metadata["token_address"],
-                                collection_id=token_metadata["collection_id"],
-                                fee_schedule_id=listing_metadata["fee_schedule_id"],
-                                seller=listing_metadata["seller"],
-                                current_bid_price=auction_listing["current_bid_price"],
-                                current_bidder=auction_listing["current_bidder"],
-                                starting_bid_price=auction_listing[
-                                    "starting_bid_price"
-                                ],
-                                buy_it_now_price=auction_listing["buy_it_now_price"],
-                                token_amount=1,
-                                expiration_time=auction_listing["auction_end_time"],
-                                is_deleted=False,
-                                token_standard=TokenStandard.V2.value,
-                                coin_type=coin_type,
-                                marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                contract_address=transaction_metadata.contract_address,
-                                entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                last_transaction_version=transaction.version,
-                                last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                            )
-                            current_auctions.append(current_auction)
-                        else:
-                            assert (
-                                fixed_price_listing
-                            ), f"Fixed price listing not found for txn {transaction.version}"
-
-                            token_address = listing_metadata["token_address"]
-                            token_v1_container = listing_token_v1_containers.get(
-                                token_address
-                            )
-
-                            current_listing = None
-
-                            if token_v1_container:
-                                token_v1_metadata = token_v1_container["token_metadata"]
-                                current_listing = CurrentNFTMarketplaceListing(
-                                    token_data_id=token_v1_metadata["token_data_id"],
-                                    listing_id=move_resource_address,
-                                    fee_schedule_id=listing_metadata["fee_schedule_id"],
-                                    collection_id=token_v1_metadata["collection_id"],
-                                    price=fixed_price_listing["price"],
-                                    token_amount=token_v1_container["amount"],
-                                    token_standard=TokenStandard.V1.value,
-                                    seller=listing_metadata["seller"],
-                                    is_deleted=False,
-                                    coin_type=coin_type,
-                                    marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                    contract_address=transaction_metadata.contract_address,
-                                    entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                    last_transaction_version=transaction.version,
-                                    last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                                )
-                            else:
-                                token_v2_metadata = token_metadatas.get(token_address)
-
-                                assert (
-                                    token_v2_metadata
-                                ), f"Token v2 metadata not found for txn {transaction.version}"
-
-                                current_listing = CurrentNFTMarketplaceListing(
-                                    token_data_id=token_v2_metadata["token_data_id"],
-                                    listing_id=move_resource_address,
-                                    fee_schedule_id=listing_metadata["fee_schedule_id"],
-                                    collection_id=token_v2_metadata["collection_id"],
-                                    price=fixed_price_listing["price"],
-                                    token_amount=1,
-                                    token_standard=TokenStandard.V2.value,
-                                    seller=listing_metadata["seller"],
-                                    is_deleted=False,
-                                    coin_type=coin_type,
-                                    marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                    contract_address=transaction_metadata.contract_address,
-                                    entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                    last_transaction_version=transaction.version,
-                                    last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                                )
-
-                            current_nft_marketplace_listings.append(current_listing)
-
-                    elif (
-                        move_resource_type
-                        == f"{marketplace_contract_address}::token_offer::TokenOffer"
-                    ):
-                        # Get the data related to this token offer that was parsed from loop 2
-                        token_offer_object = object_metadatas.get(move_resource_address)
-                        token_offer_metadata = token_offer_metadatas.get(
-                            move_resource_address
+                            token_metadata
+                        ), f"Token metadata not found for txn {transaction.version}"
+
+                        # Parses when auction is placed and when a bid is placed on an auction
+                        current_auction = {
+                            "listing_id": move_resource_address,
+                            "token_data_id": listing_metadata["token_address"],
+                            "collection_id": token_metadata["collection_id"],
+                            "fee_schedule_id": listing_metadata["fee_schedule_id"],
+                            "seller": listing_metadata["seller"],
+                            "current_bid_price": auction_listing["current_bid_price"],
+                            "current_bidder": auction_listing["current_bidder"],
+                            "starting_bid_price": auction_listing["starting_bid_price"],
+                            "buy_it_now_price": auction_listing["buy_it_now_price"],
+                            "token_amount": 1,
+                            "expiration_time": auction_listing["auction_end_time"],
+                            "is_deleted": False,
+                            "token_standard": TokenStandard.V2.value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                        current_auctions.append(current_auction)
+                    else:
+                        assert (
+                            fixed_price_listing
+                        ), f"Fixed price listing not found for txn {transaction.version}"
+
+                        token_address = listing_metadata["token_address"]
+                        token_v1_container = listing_token_v1_containers.get(
+                            token_address
                         )
-                        token_offer_v1 = token_offer_v1s.get(move_resource_address)
 
-                        assert (
-                            token_offer_object
-                        ), f"Token offer object not found for txn {transaction.version}"
-                        assert (
-                            token_offer_metadata
-                        ), f"Token offer metadata not found for txn {transaction.version}"
-
-                        current_token_offer = None
-
-                        if token_offer_v1:
-                            token_metadata = token_offer_v1["token_metadata"]
-                            current_token_offer = CurrentNFTMarketplaceTokenOffer(
-                                offer_id=move_resource_address,
-                                token_data_id=token_metadata["token_data_id"],
-                                collection_id=token_metadata["collection_id"],
-                                fee_schedule_id=token_offer_metadata["fee_schedule_id"],
-                                buyer=token_offer_object["owner"],
-                                price=token_offer_metadata["price"],
-                                token_amount=1,
-                                expiration_time=token_offer_metadata["expiration_time"],
-                                is_deleted=False,
-                                token_standard=TokenStandard.V1.value,
-                                coin_type=coin_type,
-                                marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                contract_address=transaction_metadata.contract_address,
-                                entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                last_transaction_version=transaction.version,
-                                last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                            )
+                        current_listing = None
+
+                        if token_v1_container:
+                            token_v1_metadata = token_v1_container["token_metadata"]
+                            current_listing = {
+                                "token_data_id": token_v1_metadata["token_data_id"],
+                                "listing_id": move_resource_address,
+                                "fee_schedule_id": listing_metadata["fee_schedule_id"],
+                                "collection_id": token_v1_metadata["collection_id"],
+                                "price": fixed_price_listing["price"],
+                                "token_amount": token_v1_container["amount"],
+                                "token_standard": TokenStandard.V1.value,
+                                "seller": listing_metadata["seller"],
+                                "is_deleted": False,
+                                "coin_type": coin_type,
+                                "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                                "contract_address": transaction_metadata.contract_address,
+                                "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                                "last_transaction_version": transaction.version,
+                                "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                            }
                         else:
-                            token_offer_v2 = token_offer_v2s.get(move_resource_address)
+                            token_v2_metadata = token_metadatas.get(token_address)
 
-                            assert (
-                                token_offer_v2
-                            ), f"Token offer v2 metadata not found for txn {transaction.version}"
-
-                            token_v2_metadata = token_metadatas.get(
-                                token_offer_v2["token_address"]
-                            )
                             assert (
                                 token_v2_metadata
                             ), f"Token v2 metadata not found for txn {transaction.version}"
 
-                            current_token_offer = CurrentNFTMarketplaceTokenOffer(
-                                offer_id=move_resource_address,
-                                token_data_id=token_offer_v2["token_address"],
-                                collection_id=token_v2_metadata["collection_id"],
-                                fee_schedule_id=token_offer_metadata["fee_schedule_id"],
-                                buyer=token_offer_object["owner"],
-                                price=token_offer_metadata["price"],
-                                token_amount=1,
-                                expiration_time=token_offer_metadata["expiration_time"],
-                                is_deleted=False,
-                                token_standard=TokenStandard.V2.value,
-                                coin_type=coin_type,
-                                marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                contract_address=transaction_metadata.contract_address,
-                                entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                last_transaction_version=transaction.version,
-                                last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                            )
-
-                        current_token_offers.append(current_token_offer)
-                    elif (
-                        move_resource_type
-                        == f"{marketplace_contract_address}::collection_offer::CollectionOffer"
-                    ):
-                        # Get the data related to this collection offer that was parsed from loop 2
-                        collection_offer_metadata = collection_offer_metadatas.get(
-                            move_resource_address
-                        )
-                        collection_object = object_metadatas.get(move_resource_address)
-                        collection_offer_v1 = collection_offer_v1s.get(
-                            move_resource_address
-                        )
+                            current_listing = {
+                                "token_data_id": token_v2_metadata["token_data_id"],
+                                "listing_id": move_resource_address,
+                                "fee_schedule_id": listing_metadata["fee_schedule_id"],
+                                "collection_id": token_v2_metadata["collection_id"],
+                                "price": fixed_price_listing["price"],
+                                "token_amount": 1,
+                                "token_standard": TokenStandard.V2.value,
+                                "seller": listing_metadata["seller"],
+                                "is_deleted": False,
+                                "coin_type": coin_type,
+                                "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                                "contract_address": transaction_metadata.contract_address,
+                                "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                                "last_transaction_version": transaction.version,
+                                "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                            }
+
+                        current_nft_marketplace_listings.append(current_listing)
+
+                elif (
+                    move_resource_type
+                    == f"{marketplace_contract_address}::token_offer::TokenOffer"
+                ):
+                    # Get the data related to this token offer that was parsed from the write set scan
+                    token_offer_object = get_indexed_object_core(
+                        object_resources, move_resource_address
+                    )
+                    token_offer_metadata = token_offer_metadatas.get(
+                        move_resource_address
+                    )
+                    token_offer_v1 = token_offer_v1s.get(move_resource_address)
+
+                    assert (
+                        token_offer_object
+                    ), f"Token offer object not found for txn {transaction.version}"
+                    assert (
+                        token_offer_metadata
+                    ), f"Token offer metadata not found for txn {transaction.version}"
+
+                    current_token_offer = None
+
+                    if token_offer_v1:
+                        token_metadata = token_offer_v1["token_metadata"]
+                        current_token_offer = {
+                            "offer_id": move_resource_address,
+                            "token_data_id": token_metadata["token_data_id"],
+                            "collection_id": token_metadata["collection_id"],
+                            "fee_schedule_id": token_offer_metadata["fee_schedule_id"],
+                            "buyer": token_offer_object["owner"],
+                            "price": token_offer_metadata["price"],
+                            "token_amount": 1,
+                            "expiration_time": token_offer_metadata["expiration_time"],
+                            "is_deleted": False,
+                            "token_standard": TokenStandard.V1.value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                    else:
+                        token_offer_v2 = token_offer_v2s.get(move_resource_address)
 
                         assert (
-                            collection_offer_metadata
-                        ), f"Collection offer metadata not found for txn {transaction.version}"
-                        assert (
-                            collection_object
-                        ), f"Collection object not found for txn {transaction.version}"
-
-                        current_collection_offer = None
-
-                        if collection_offer_v1:
-                            current_collection_offer = CurrentNFTMarketplaceCollectionOffer(
-                                collection_offer_id=move_resource_address,
-                                collection_id=collection_offer_v1[
-                                    "collection_metadata"
-                                ]["collection_id"],
-                                fee_schedule_id=collection_offer_metadata[
-                                    "fee_schedule_id"
-                                ],
-                                buyer=collection_object["owner"],
-                                item_price=collection_offer_metadata["item_price"],
-                                remaining_token_amount=collection_offer_metadata[
-                                    "remaining_token_amount"
-                                ],
-                                expiration_time=collection_offer_metadata[
-                                    "expiration_time"
-                                ],
-                                is_deleted=False,
-                                token_standard=TokenStandard.V1.value,
-                                coin_type=coin_type,
-                                marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                contract_address=transaction_metadata.contract_address,
-                                entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                last_transaction_version=transaction.version,
-                                last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                            )
-                        else:
-                            collection_offer_v2 = collection_offer_v2s.get(
-                                move_resource_address
-                            )
-                            assert (
-                                collection_offer_v2
-                            ), f"Collection offer v2 not found for txn {transaction.version}"
-
-                            current_collection_offer = CurrentNFTMarketplaceCollectionOffer(
-                                collection_offer_id=move_resource_address,
-                                collection_id=collection_offer_v2["collection_address"],
-                                fee_schedule_id=collection_offer_metadata[
-                                    "fee_schedule_id"
-                                ],
-                                buyer=collection_object["owner"],
-                                item_price=collection_offer_metadata["item_price"],
-                                remaining_token_amount=collection_offer_metadata[
-                                    "remaining_token_amount"
-                                ],
-                                expiration_time=collection_offer_metadata[
-                                    "expiration_time"
-                                ],
-                                is_deleted=False,
-                                token_standard=TokenStandard.V2.value,
-                                coin_type=coin_type,
-                                marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                                contract_address=transaction_metadata.contract_address,
-                                entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                                last_transaction_version=transaction.version,
-                                last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-                            )
-                        current_collection_offers.append(current_collection_offer)
+                            token_offer_v2
+                        ), f"Token offer v2 metadata not found for txn {transaction.version}"
 
-                delete_resource = write_set_change_utils.get_delete_resource(wsc)
-                if delete_resource:
-                    move_resource_address = standardize_address(delete_resource.address)
+                        token_v2_metadata = token_metadatas.get(
+                            token_offer_v2["token_address"]
+                        )
+                        assert (
+                            token_v2_metadata
+                        ), f"Token v2 metadata not found for txn {transaction.version}"
+
+                        current_token_offer = {
+                            "offer_id": move_resource_address,
+                            "token_data_id": token_offer_v2["token_address"],
+                            "collection_id": token_v2_metadata["collection_id"],
+                            "fee_schedule_id": token_offer_metadata["fee_schedule_id"],
+                            "buyer": token_offer_object["owner"],
+                            "price": token_offer_metadata["price"],
+                            "token_amount": 1,
+                            "expiration_time": token_offer_metadata["expiration_time"],
+                            "is_deleted": False,
+                            "token_standard": TokenStandard.V2.value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
 
-                    # If a collection offer resource gets deleted, that means it the offer was filled completely
-                    # and we handle that here.
-                    maybe_collection_offer_filled_metadata = (
-                        collection_offer_filled_metadatas.get(move_resource_address)
+                    current_token_offers.append(current_token_offer)
+                elif (
+                    move_resource_type
+                    == f"{marketplace_contract_address}::collection_offer::CollectionOffer"
+                ):
+                    # Get the data related to this collection offer that was parsed from the write set scan
+                    collection_offer_metadata = collection_offer_metadatas.get(
+                        move_resource_address
                     )
-                    if maybe_collection_offer_filled_metadata:
-                        collection_metadata = maybe_collection_offer_filled_metadata[
-                            "collection_metadata"
-                        ]
-                        current_collection_offer = CurrentNFTMarketplaceCollectionOffer(
-                            collection_offer_id=move_resource_address,
-                            collection_id=collection_metadata["collection_id"],
-                            fee_schedule_id=maybe_collection_offer_filled_metadata[
+                    collection_object = get_indexed_object_core(
+                        object_resources, move_resource_address
+                    )
+                    collection_offer_v1 = collection_offer_v1s.get(
+                        move_resource_address
+                    )
+
+                    assert (
+                        collection_offer_metadata
+                    ), f"Collection offer metadata not found for txn {transaction.version}"
+                    assert (
+                        collection_object
+                    ), f"Collection object not found for txn {transaction.version}"
+
+                    current_collection_offer = None
+
+                    if collection_offer_v1:
+                        current_collection_offer = {
+                            "collection_offer_id": move_resource_address,
+                            "collection_id": collection_offer_v1["collection_metadata"][
+                                "collection_id"
+                            ],
+                            "fee_schedule_id": collection_offer_metadata[
                                 "fee_schedule_id"
                             ],
-                            buyer=maybe_collection_offer_filled_metadata["buyer"],
-                            item_price=maybe_collection_offer_filled_metadata[
-                                "item_price"
+                            "buyer": collection_object["owner"],
+                            "item_price": collection_offer_metadata["item_price"],
+                            "remaining_token_amount": collection_offer_metadata[
+                                "remaining_token_amount"
+                            ],
+                            "expiration_time": collection_offer_metadata[
+                                "expiration_time"
                             ],
-                            remaining_token_amount=0,
-                            expiration_time=0,
-                            is_deleted=True,
-                            token_standard=collection_metadata["token_standard"].value,
-                            coin_type=coin_type,
-                            marketplace=MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
-                            contract_address=transaction_metadata.contract_address,
-                            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                            last_transaction_version=transaction.version,
-                            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
+                            "is_deleted": False,
+                            "token_standard": TokenStandard.V1.value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                    else:
+                        collection_offer_v2 = collection_offer_v2s.get(
+                            move_resource_address
                         )
-                        current_collection_offers.append(current_collection_offer)
+                        assert (
+                            collection_offer_v2
+                        ), f"Collection offer v2 not found for txn {transaction.version}"
 
-            processing_duration_in_secs += perf_counter() - start_time
+                        current_collection_offer = {
+                            "collection_offer_id": move_resource_address,
+                            "collection_id": collection_offer_v2["collection_address"],
+                            "fee_schedule_id": collection_offer_metadata[
+                                "fee_schedule_id"
+                            ],
+                            "buyer": collection_object["owner"],
+                            "item_price": collection_offer_metadata["item_price"],
+                            "remaining_token_amount": collection_offer_metadata[
+                                "remaining_token_amount"
+                            ],
+                            "expiration_time": collection_offer_metadata[
+                                "expiration_time"
+                            ],
+                            "is_deleted": False,
+                            "token_standard": TokenStandard.V2.value,
+                            "coin_type": coin_type,
+                            "marketplace": MarketplaceName.EXAMPLE_V2_MARKETPLACE.value,
+                            "contract_address": transaction_metadata.contract_address,
+                            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                            "last_transaction_version": transaction.version,
+                            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+                        }
+                    current_collection_offers.append(current_collection_offer)
 
-            start_time = perf_counter()
-            self.insert_nft_activities(nft_marketplace_activities)
-            self.insert_nft_listings(current_nft_marketplace_listings)
-            self.insert_nft_token_offers(current_token_offers)
-            self.insert_nft_collection_offers(current_collection_offers)
-            self.insert_nft_auctions(current_auctions)
+            processing_duration_in_secs += perf_counter() - start_time
 
-            db_insertion_duration_in_secs += perf_counter() - start_time
+        start_time = perf_counter()
+        with Session() as session, session.begin():
+            self.insert_nft_activities(session, nft_marketplace_activities)
+            # Keep the latest row per key within the batch, and never overwrite a newer row in the DB
+            upsert_rows(
+                session, CurrentNFTMarketplaceListing, current_nft_marketplace_listings
+            )
+            upsert_rows(session, CurrentNFTMarketplaceTokenOffer, current_token_offers)
+            upsert_rows(
+                session, CurrentNFTMarketplaceCollectionOffer, current_collection_offers
+            )
+            upsert_rows(session, CurrentNFTMarketplaceAuction, current_auctions)
+        db_insertion_duration_in_secs += perf_counter() - start_time
 
         return ProcessingResult(
             start_version=start_version,
@@ -1002,220 +1034,10 @@ class NFTMarketplaceV2Processor(TransactionsProcessor):
 
     def insert_nft_activities(
         self,
-        activities: List[NFTMarketplaceActivities],
-    ) -> None:
-        if not activities:
-            return
-
-        # Sort by pk to avoid postgres deadlock since we're doing multi threaded db writes
-        activities = sorted(
-            activities, key=lambda x: (x.transaction_version, x.event_index)
-        )
-        activites_dict = [
-            {
-                "transaction_version": activity.transaction_version,
-                "event_index": activity.event_index,
-                "offer_or_listing_id": activity.offer_or_listing_id,
-                "fee_schedule_id": activity.fee_schedule_id,
-                "collection_id": activity.collection_id,
-                "token_data_id": activity.token_data_id,
-                "creator_address": activity.creator_address,
-                "collection_name": activity.collection_name,
-                "token_name": activity.token_name,
-                "property_version": activity.property_version,
-                "price": activity.price,
-                "token_amount": activity.token_amount,
-                "token_standard": activity.token_standard,
-                "seller": activity.seller,
-                "buyer": activity.buyer,
-                "coin_type": activity.coin_type,
-                "marketplace": activity.marketplace,
-                "contract_address": activity.contract_address,
-                "entry_function_id_str": activity.entry_function_id_str,
-                "event_type": activity.event_type,
-                "transaction_timestamp": activity.transaction_timestamp,
-            }
-            for activity in activities
-        ]
-        with Session() as session, session.begin():
-            insert_stmt = insert(NFTMarketplaceActivities).values(activites_dict)
-            do_update_stmt = insert_stmt.on_conflict_do_update(
-                constraint="nft_marketplace_activities_pkey",
-                set_=dict(insert_stmt.excluded.items()),
-            )
-            session.execute(do_update_stmt)
-
-    def insert_nft_listings(
-        self,
-        listings: List[CurrentNFTMarketplaceListing],
-    ) -> None:
-        if not listings:
-            return
-
-        # Sort by pk to avoid postgres deadlock since we're doing multi threaded db writes
-        listings = sorted(listings, key=lambda x: (x.listing_id, x.token_data_id))
-        listings_dict = [
-            {
-                "listing_id": listing.listing_id,
-                "token_data_id": listing.token_data_id,
-                "collection_id": listing.collection_id,
-                "fee_schedule_id": listing.fee_schedule_id,
-                "seller": listing.seller,
-                "price": listing.price,
-                "token_amount": listing.token_amount,
-                "is_deleted": listing.is_deleted,
-                "token_standard": listing.token_standard,
-                "coin_type": listing.coin_type,
-                "marketplace": listing.marketplace,
-                "contract_address": listing.contract_address,
-                "entry_function_id_str": listing.entry_function_id_str,
-                "last_transaction_version": listing.last_transaction_version,
-                "last_transaction_timestamp": listing.last_transaction_timestamp,
-            }
-            for listing in listings
-        ]
-        with Session() as session, session.begin():
-            insert_stmt = insert(CurrentNFTMarketplaceListing).values(listings_dict)
-            # Only update if the new transaction version is greater than the current one
-            do_update_stmt = insert_stmt.on_conflict_do_update(
-                constraint="current_nft_marketplace_listings_pkey",
-                set_=dict(insert_stmt.excluded.items()),
-                where=(
-                    insert_stmt.excluded["last_transaction_version"]
-                    > CurrentNFTMarketplaceListing.last_transaction_version
-                ),
-            )
-            session.execute(do_update_stmt)
-
-    def insert_nft_token_offers(
-        self,
-        offers: List[CurrentNFTMarketplaceTokenOffer],
+        session: SessionType,
+        activities: List[Dict[str, Any]],
     ) -> None:
-        if not offers:
-            return
-
-        # Sort by pk to avoid postgres deadlock since we're doing multi threaded db writes
-        offers = sorted(offers, key=lambda x: (x.offer_id, x.token_data_id))
-        offers_dict = [
-            {
-                "offer_id": offer.offer_id,
-                "token_data_id": offer.token_data_id,
-                "collection_id": offer.collection_id,
-                "fee_schedule_id": offer.fee_schedule_id,
-                "buyer": offer.buyer,
-                "price": offer.price,
-                "token_amount": offer.token_amount,
-                "expiration_time": offer.expiration_time,
-                "is_deleted": offer.is_deleted,
-                "token_standard": offer.token_standard,
-                "coin_type": offer.coin_type,
-                "marketplace": offer.marketplace,
-                "contract_address": offer.contract_address,
-                "entry_function_id_str": offer.entry_function_id_str,
-                "last_transaction_version": offer.last_transaction_version,
-                "last_transaction_timestamp": offer.last_transaction_timestamp,
-            }
-            for offer in offers
-        ]
-        with Session() as session, session.begin():
-            insert_stmt = insert(CurrentNFTMarketplaceTokenOffer).values(offers_dict)
-            # Only update if the new transaction version is greater than the current one
-            do_update_stmt = insert_stmt.on_conflict_do_update(
-                constraint="current_nft_marketplace_token_offers_pkey",
-                set_=dict(insert_stmt.excluded.items()),
-                where=(
-                    insert_stmt.excluded["last_transaction_version"]
-                    > CurrentNFTMarketplaceTokenOffer.last_transaction_version
-                ),
-            )
-            session.execute(do_update_stmt)
-
-    def insert_nft_collection_offers(
-        self,
-        offers: List[CurrentNFTMarketplaceCollectionOffer],
-    ) -> None:
-        if not offers:
-            return
-
-        # Sort by pk to avoid postgres deadlock since we're doing multi threaded db writes
-        offers = sorted(offers, key=lambda x: (x.collection_offer_id, x.collection_id))
-        offers_dict = [
-            {
-                "collection_offer_id": offer.collection_offer_id,
-                "collection_id": offer.collection_id,
-                "fee_schedule_id": offer.fee_schedule_id,
-                "buyer": offer.buyer,
-                "item_price": offer.item_price,
-                "remaining_token_amount": offer.remaining_token_amount,
-                "expiration_time": offer.expiration_time,
-                "is_deleted": offer.is_deleted,
-                "token_standard": offer.token_standard,
-                "coin_type": offer.coin_type,
-                "marketplace": offer.marketplace,
-                "contract_address": offer.contract_address,
-                "entry_function_id_str": offer.entry_function_id_str,
-                "last_transaction_version": offer.last_transaction_version,
-                "last_transaction_timestamp": offer.last_transaction_timestamp,
-            }
-            for offer in offers
-        ]
-        with Session() as session, session.begin():
-            insert_stmt = insert(CurrentNFTMarketplaceCollectionOffer).values(
-                offers_dict
-            )
-            # Only update if the new transaction version is greater than the current one
-            do_update_stmt = insert_stmt.on_conflict_do_update(
-                constraint="current_nft_marketplace_collection_offers_pkey",
-                set_=dict(insert_stmt.excluded.items()),
-                where=(
-                    insert_stmt.excluded["last_transaction_version"]
-                    > CurrentNFTMarketplaceCollectionOffer.last_transaction_version
-                ),
-            )
-            session.execute(do_update_stmt)
-
-    def insert_nft_auctions(
-        self,
-        auctions: List[CurrentNFTMarketplaceAuction],
-    ) -> None:
-        if not auctions:
-            return
-
-        # Sort by pk to avoid postgres deadlock since we're doing multi threaded db writes
-        auctions = sorted(auctions, key=lambda x: (x.listing_id, x.token_data_id))
-        auctions_dict = [
-            {
-                "listing_id": auction.listing_id,
-                "token_data_id": auction.token_data_id,
-                "collection_id": auction.collection_id,
-                "fee_schedule_id": auction.fee_schedule_id,
-                "seller": auction.seller,
-                "current_bid_price": auction.current_bid_price,
-                "current_bidder": auction.current_bidder,
-                "starting_bid_price": auction.starting_bid_price,
-                "buy_it_now_price": auction.buy_it_now_price,
-                "token_amount": auction.token_amount,
-                "expiration_time": auction.expiration_time,
-                "is_deleted": auction.is_deleted,
-                "token_standard": auction.token_standard,
-                "coin_type": auction.coin_type,
-                "marketplace": auction.marketplace,
-                "contract_address": auction.contract_address,
-                "entry_function_id_str": auction.entry_function_id_str,
-                "last_transaction_version": auction.last_transaction_version,
-                "last_transaction_timestamp": auction.last_transaction_timestamp,
-            }
-            for auction in auctions
-        ]
-        with Session() as session, session.begin():
-            insert_stmt = insert(CurrentNFTMarketplaceAuction).values(auctions_dict)
-            # Only update if the new transaction version is greater than the current one
-            do_update_stmt = insert_stmt.on_conflict_do_update(
-                constraint="current_nft_marketplace_auctions_pkey",
-                set_=dict(insert_stmt.excluded.items()),
-                where=(
-                    insert_stmt.excluded["last_transaction_version"]
-                    > CurrentNFTMarketplaceAuction.last_transaction_version
-                ),
-            )
-            session.execute(do_update_stmt)
+        if self.config.db_write_mode == DBWriteMode.COPY.value:
+            copy_rows(session, NFTMarketplaceActivities, activities)
+        else:
+            upsert_rows(session, NFTMarketplaceActivities, activities)
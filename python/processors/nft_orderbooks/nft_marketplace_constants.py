@@ -1,3 +1,5 @@
+import re
+
 from processors.nft_orderbooks.nft_marketplace_enums import MarketplaceName
 
 MARKETPLACE_SMART_CONTRACT_ADDRESSES = {
@@ -111,6 +113,11 @@ MARKETPLACE_ADDRESS_MATCH_REGEX_STRINGS = {
     MarketplaceName.APTOMINGOS_AUCTION: "^0x98937acca8bc2c164dff158156ab06f9c99bbbb050129d7a514a37ccb1b8e49e.*$",
 }
 
+# Compiled once at import rather than on every event
+MARKETPLACE_ADDRESS_MATCH_REGEXES = {
+    k: re.compile(v) for k, v in MARKETPLACE_ADDRESS_MATCH_REGEX_STRINGS.items()
+}
+
 # Topaz
 TOPAZ_MARKETPLACE_EVENT_TYPES = set(
     [
@@ -78,9 +78,11 @@ class CollectionBidMetadata:
     is_cancelled: Optional[bool]
 
 
+# Decoded once per transaction and shared by every parser of the transaction
 @dataclass
 class TransactionMetadata:
     transaction_version: int
     transaction_timestamp: datetime.datetime
     contract_address: str
     entry_function_id_str_short: str
+    sender: str
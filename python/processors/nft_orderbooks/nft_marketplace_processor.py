@@ -1,4 +1,5 @@
-from typing import List
+from collections import defaultdict
+from typing import Any, Dict, List, Set, Type
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
 from processors.nft_orderbooks.nft_marketplace_enums import MarketplaceName
 from processors.nft_orderbooks.nft_marketplace_constants import (
@@ -17,42 +18,108 @@ from processors.nft_orderbooks.parsers import (
 from processors.nft_orderbooks.models.nft_marketplace_activities_model import (
     NFTMarketplaceEvent,
 )
-from processors.nft_orderbooks.models.nft_marketplace_bid_models import (
-    NFTMarketplaceBid,
-    CurrentNFTMarketplaceBid,
-    NFTMarketplaceCollectionBid,
-    CurrentNFTMarketplaceCollectionBid,
+from processors.nft_orderbooks.nft_orderbooks_parser_utils import (
+    MarketplaceName,
+    OrderbookState,
+    ParsedRow,
+    cache_current_rows,
+    parse_transaction_metadata,
+    set_lookup_cache_size,
 )
-from processors.nft_orderbooks.models.nft_marketplace_listings_models import (
-    CurrentNFTMarketplaceListing,
-    NFTMarketplaceListing,
-)
-from processors.nft_orderbooks.nft_orderbooks_parser_utils import MarketplaceName
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from utils.transactions_processor import TransactionsProcessor, ProcessingResult
 from utils import event_utils, general_utils, transaction_utils, write_set_change_utils
+from utils.models.general_models import Base
 from utils.models.schema_names import NFT_MARKETPLACE_SCHEMA_NAME
+from utils.bulk_writer import copy_rows, upsert_rows_by_model
+from utils.config import DBWriteMode, ProcessorConfig
 from utils.session import Session
+from utils.transaction_filter import TransactionFilter
 from utils.processor_name import ProcessorName
 from time import perf_counter
 
+# Marketplace activity shows up either as an event from a marketplace contract or as a write to one
+# of the marketplace tables
+TRANSACTION_FILTER = TransactionFilter(
+    MARKETPLACE_SMART_CONTRACT_ADDRESSES_INV, MARKETPLACE_TABLE_HANDLES_INV
+)
+
+# Marketplaces whose parsers take the whole transaction rather than a single event
+TRANSACTION_SCOPED_MARKETPLACE_NAMES = set(
+    [MarketplaceName.OKX, MarketplaceName.OZOZOZ, MarketplaceName.ITSRARE]
+)
+
+
+# First pass over a batch: every token whose previous listing or bid the parsers will look up
+def get_lookup_token_data_ids(
+    transactions: list[transaction_pb2.Transaction],
+) -> Set[str]:
+    token_data_ids = set()
+    for transaction in transactions:
+        user_transaction = transaction_utils.get_user_transaction(transaction)
+        if not user_transaction:
+            continue
+
+        for event in user_transaction.events:
+            contract_address = general_utils.standardize_address(
+                event_utils.get_event_type_address(event)
+            )
+            match (MARKETPLACE_SMART_CONTRACT_ADDRESSES_INV.get(contract_address)):
+                case MarketplaceName.SOUFFLE:
+                    token_data_id = souffle_parser.get_lookup_token_data_id(event)
+                case MarketplaceName.BLUEMOVE:
+                    token_data_id = bluemove_parser.get_lookup_token_data_id(event)
+                case _:
+                    token_data_id = None
+            if token_data_id:
+                token_data_ids.add(token_data_id)
+
+        for wsc in transaction_utils.get_write_set_changes(transaction):
+            write_table_item = write_set_change_utils.get_write_table_item(wsc)
+            if (
+                write_table_item
+                and MARKETPLACE_TABLE_HANDLES_INV.get(str(write_table_item.handle))
+                == MarketplaceName.BLUEMOVE
+            ):
+                token_data_id = (
+                    bluemove_parser.get_write_table_item_lookup_token_data_id(
+                        transaction, write_table_item
+                    )
+                )
+                if token_data_id:
+                    token_data_ids.add(token_data_id)
+    return token_data_ids
+
 
 class NFTMarketplaceProcesser(TransactionsProcessor):
+    def __init__(
+        self, processor_config: ProcessorConfig, use_lookup_cache: bool = True
+    ):
+        self.config = processor_config
+        if not use_lookup_cache:
+            set_lookup_cache_size(0)
+
     def name(self) -> str:
         return ProcessorName.NFT_MARKETPLACE_V1_PROCESSOR.value
 
     def schema(self) -> str:
         return NFT_MARKETPLACE_SCHEMA_NAME
 
+    def transaction_filter(self) -> TransactionFilter:
+        return TRANSACTION_FILTER
+
     def process_transactions(
         self,
         transactions: list[transaction_pb2.Transaction],
         start_version: int,
         end_version: int,
     ) -> ProcessingResult:
-        parsed_objs = []
+        parsed_objs: List[ParsedRow] = []
         start_time = perf_counter()
+        # Previous listings and bids of the whole batch are loaded up front
+        orderbook_state = OrderbookState()
+        orderbook_state.prefetch(get_lookup_token_data_ids(transactions))
         for transaction in transactions:
             user_transaction = transaction_utils.get_user_transaction(transaction)
 
@@ -60,6 +127,12 @@ class NFTMarketplaceProcesser(TransactionsProcessor):
             if not user_transaction:
                 continue
 
+            # Decoded once and shared by every parser of the transaction
+            transaction_metadata = parse_transaction_metadata(transaction)
+            # OKX, Ozozoz and ItsRare parse all events of a transaction in one call, so
+            # they're called once, on the first event of theirs
+            parsed_marketplace_names = set()
+
             events = user_transaction.events
             for event_index, event in enumerate(events):
                 contract_address = general_utils.standardize_address(
@@ -72,33 +145,60 @@ class NFTMarketplaceProcesser(TransactionsProcessor):
                 marketplace_name = MARKETPLACE_SMART_CONTRACT_ADDRESSES_INV[
                     contract_address
                 ]
+                if marketplace_name in TRANSACTION_SCOPED_MARKETPLACE_NAMES:
+                    if marketplace_name in parsed_marketplace_names:
+                        continue
+                    parsed_marketplace_names.add(marketplace_name)
 
+                num_of_parsed_objs = len(parsed_objs)
                 # TODO: Optimize this; there's too many loops
                 match (marketplace_name):
                     case MarketplaceName.TOPAZ:
                         parsed_objs.extend(
-                            topaz_parser.parse_event(transaction, event, event_index)
+                            topaz_parser.parse_event(
+                                transaction, transaction_metadata, event, event_index
+                            )
                         )
                     case MarketplaceName.SOUFFLE:
                         parsed_objs.extend(
-                            souffle_parser.parse_event(transaction, event, event_index)
+                            souffle_parser.parse_event(
+                                transaction,
+                                transaction_metadata,
+                                event,
+                                event_index,
+                                orderbook_state,
+                            )
                         )
                     case MarketplaceName.BLUEMOVE:
                         parsed_objs.extend(
-                            bluemove_parser.parse_event(transaction, event, event_index)
+                            bluemove_parser.parse_event(
+                                transaction,
+                                transaction_metadata,
+                                event,
+                                event_index,
+                                orderbook_state,
+                            )
                         )
                     case MarketplaceName.OKX:
                         parsed_objs.extend(
-                            okx_parser.parse_marketplace_events(transaction)
+                            okx_parser.parse_marketplace_events(
+                                transaction, transaction_metadata
+                            )
                         )
                     case MarketplaceName.OZOZOZ:
                         parsed_objs.extend(
-                            ozozoz_parser.parse_marketplace_events(transaction)
+                            ozozoz_parser.parse_marketplace_events(
+                                transaction, transaction_metadata
+                            )
                         )
                     case MarketplaceName.ITSRARE:
                         parsed_objs.extend(
-                            itsrare_parser.parse_marketplace_events(transaction)
+                            itsrare_parser.parse_marketplace_events(
+                                transaction, transaction_metadata
+                            )
                         )
+                # Later events of the batch see the listings and bids parsed so far
+                orderbook_state.apply(parsed_objs[num_of_parsed_objs:])
 
             write_set_changes = transaction_utils.get_write_set_changes(transaction)
             for wsc_index, wsc in enumerate(write_set_changes):
@@ -112,25 +212,37 @@ class NFTMarketplaceProcesser(TransactionsProcessor):
 
                     marketplace_name = MARKETPLACE_TABLE_HANDLES_INV[table_handle]
 
+                    num_of_parsed_objs = len(parsed_objs)
                     match (marketplace_name):
                         case MarketplaceName.TOPAZ:
                             parsed_objs.extend(
                                 topaz_parser.parse_write_table_item(
-                                    transaction, write_table_item, wsc_index
+                                    transaction,
+                                    transaction_metadata,
+                                    write_table_item,
+                                    wsc_index,
                                 )
                             )
                         case MarketplaceName.SOUFFLE:
                             parsed_objs.extend(
                                 souffle_parser.parse_write_table_item(
-                                    transaction, write_table_item, wsc_index
+                                    transaction,
+                                    transaction_metadata,
+                                    write_table_item,
+                                    wsc_index,
                                 )
                             )
                         case MarketplaceName.BLUEMOVE:
                             parsed_objs.extend(
                                 bluemove_parser.parse_write_table_item(
-                                    transaction, write_table_item, wsc_index
+                                    transaction,
+                                    transaction_metadata,
+                                    write_table_item,
+                                    wsc_index,
+                                    orderbook_state,
                                 )
                             )
+                    orderbook_state.apply(parsed_objs[num_of_parsed_objs:])
 
         # TODO: Sort by pk for multi threaded postgres insert
         processing_duration_in_secs = perf_counter() - start_time
@@ -149,17 +261,19 @@ class NFTMarketplaceProcesser(TransactionsProcessor):
 
     def insert_to_db(
         self,
-        parsed_objs: List[
-            NFTMarketplaceEvent
-            | NFTMarketplaceListing
-            | CurrentNFTMarketplaceListing
-            | NFTMarketplaceBid
-            | CurrentNFTMarketplaceBid
-            | NFTMarketplaceCollectionBid
-            | CurrentNFTMarketplaceCollectionBid
-        ],
+        parsed_objs: List[ParsedRow],
     ) -> None:
+        rows_by_model: Dict[Type[Base], List[Dict[str, Any]]] = defaultdict(list)
+        for model, row in parsed_objs:
+            rows_by_model[model].append(row)
+
         with Session() as session, session.begin():
-            # TODO: Turn this into on conflict, update, to support backfilling
-            for obj in parsed_objs:
-                session.merge(obj)
+            if self.config.db_write_mode == DBWriteMode.COPY.value:
+                # Activities are an append-only log, everything else is upserted
+                copy_rows(
+                    session,
+                    NFTMarketplaceEvent,
+                    rows_by_model.pop(NFTMarketplaceEvent, []),
+                )
+            upsert_rows_by_model(session, rows_by_model)
+        cache_current_rows(parsed_objs)
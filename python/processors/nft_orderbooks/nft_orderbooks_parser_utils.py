@@ -1,13 +1,12 @@
 import datetime
-import re
 
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
 from dataclasses import dataclass
-from typing import List
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Type
 from processors.nft_orderbooks.nft_marketplace_constants import (
     MARKETPLACE_SMART_CONTRACT_ADDRESSES,
     MARKETPLACE_ENTRY_FUNCTIONS,
-    MARKETPLACE_ADDRESS_MATCH_REGEX_STRINGS,
+    MARKETPLACE_ADDRESS_MATCH_REGEXES,
 )
 from processors.nft_orderbooks.nft_marketplace_enums import (
     MarketplaceName,
@@ -22,7 +21,11 @@ from processors.nft_orderbooks.models.nft_marketplace_bid_models import (
     CurrentNFTMarketplaceBid,
     CurrentNFTMarketplaceCollectionBid,
 )
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from utils import general_utils, transaction_utils
+from utils.lru_cache import VersionedLRUCache
+from utils.models.general_models import Base
 from utils.session import Session
 
 
@@ -37,46 +40,39 @@ class RawMarketplaceEvent:
     transaction_timestamp: datetime.datetime
 
 
+# A row of one of the orderbook tables, keyed by column name, with the model of its table. Parsers
+# emit these instead of ORM objects, and the models are only used for their tables.
+ParsedRow = Tuple[Type[Base], Dict[str, Any]]
+
+
 def get_marketplace_events(
-    transaction: transaction_pb2.Transaction, marketplaceName: MarketplaceName
+    transaction: transaction_pb2.Transaction,
+    transaction_metadata: TransactionMetadata,
+    marketplaceName: MarketplaceName,
 ) -> List[RawMarketplaceEvent]:
     # Filter out all non-user transactions
     if transaction.type != transaction_pb2.Transaction.TRANSACTION_TYPE_USER:
         return []
 
-    transaction_version = transaction.version
-    transaction_timestamp = general_utils.convert_pb_timestamp_to_datetime(
-        transaction.timestamp
-    )
-
     user_transaction = transaction_utils.get_user_transaction(transaction)
     assert user_transaction is not None
 
-    entry_function_payload = transaction_utils.get_entry_function_payload(
-        user_transaction
-    )
-    entry_function = entry_function_payload.function
-    module = entry_function.module
-    contract_addr = module.address
-    entry_function_name = f"{module.name}::{entry_function.name}"
-
+    address_match_regex = MARKETPLACE_ADDRESS_MATCH_REGEXES[marketplaceName]
     raw_marketplace_events = []
     for event_index, event in enumerate(user_transaction.events):
         event_type = event.type_str
-        event_type_match = re.search(
-            MARKETPLACE_ADDRESS_MATCH_REGEX_STRINGS[marketplaceName], event_type
-        )
+        event_type_match = address_match_regex.search(event_type)
         if event_type_match == None:
             continue
 
         raw_marketplace_event = RawMarketplaceEvent(
-            transaction_version,
+            transaction_metadata.transaction_version,
             event_index,
             event_type,
             json_data=event.data,
-            contract_address=contract_addr,
-            entry_function_name=entry_function_name,
-            transaction_timestamp=transaction_timestamp,
+            contract_address=transaction_metadata.contract_address,
+            entry_function_name=transaction_metadata.entry_function_id_str_short,
+            transaction_timestamp=transaction_metadata.transaction_timestamp,
         )
 
         raw_marketplace_events.append(raw_marketplace_event)
@@ -98,37 +94,104 @@ def parse_transaction_metadata(
     entry_function_id_str_short = transaction_utils.get_entry_function_id_str_short(
         user_transaction
     )
+    sender = transaction_utils.get_sender(user_transaction)
 
     return TransactionMetadata(
         transaction_version,
         transaction_timestamp,
         contract_address,
         entry_function_id_str_short,
+        sender,
     )
 
 
+# Current listings and bids this process looked up or wrote, so fills and cancels don't need a DB
+# round trip per event. Listings are keyed by token_data_id and bids by (token_data_id, buyer).
+# Worker processes can't see each other's writes, so they turn the caches off.
+LOOKUP_CACHE_SIZE = 100_000
+current_listings_cache: VersionedLRUCache[ListingTableMetadata] = VersionedLRUCache(
+    LOOKUP_CACHE_SIZE
+)
+current_bids_cache: VersionedLRUCache[BidMetadata] = VersionedLRUCache(
+    LOOKUP_CACHE_SIZE
+)
+
+
+def set_lookup_cache_size(max_size: int) -> None:
+    current_listings_cache.resize(max_size)
+    current_bids_cache.resize(max_size)
+
+
+# Takes a current_nft_marketplace_listings row, either parsed or read from the DB
+def get_listing_metadata(listing: Mapping[str, Any]) -> ListingTableMetadata:
+    return ListingTableMetadata(
+        creator_address=listing["creator_address"],
+        token_data_id=listing["token_data_id"],
+        token_name=listing["token_name"],
+        collection=listing["collection"],
+        collection_id=listing["collection_id"],
+        price=listing["price"],
+        amount=listing["token_amount"],
+        seller=listing["seller"],
+    )
+
+
+# Takes a current_nft_marketplace_bids row, either parsed or read from the DB
+def get_bid_metadata(bid: Mapping[str, Any]) -> BidMetadata:
+    return BidMetadata(
+        creator_address=bid["creator_address"],
+        token_data_id=bid["token_data_id"],
+        token_name=bid["token_name"],
+        collection=bid["collection"],
+        collection_id=bid["collection_id"],
+        price=bid["price"],
+        amount=bid["token_amount"],
+        buyer=bid["buyer"],
+        seller=None,
+    )
+
+
+# Write-through: called with everything the processor wrote once it's committed. Only current
+# listings and bids are cached.
+def cache_current_rows(parsed_rows: Iterable[ParsedRow]) -> None:
+    for model, row in parsed_rows:
+        if model is CurrentNFTMarketplaceListing:
+            current_listings_cache.put(
+                row["token_data_id"],
+                row["last_transaction_version"],
+                get_listing_metadata(row),
+            )
+        elif model is CurrentNFTMarketplaceBid:
+            current_bids_cache.put(
+                (row["token_data_id"], row["buyer"]),
+                row["last_transaction_version"],
+                get_bid_metadata(row),
+            )
+
+
 def lookup_current_listing_in_db(
     token_data_id: str,
 ) -> ListingTableMetadata | None:
-    listing_metadata = None
+    listing_metadata = current_listings_cache.get(token_data_id)
+    if listing_metadata is not None:
+        return listing_metadata
 
+    listings_table = CurrentNFTMarketplaceListing.__table__
     with Session() as session, session.begin():
         listing = (
-            session.query(CurrentNFTMarketplaceListing)
-            .filter(CurrentNFTMarketplaceListing.token_data_id == token_data_id)
+            session.execute(
+                select(listings_table).where(
+                    listings_table.c.token_data_id == token_data_id
+                )
+            )
+            .mappings()
             .one_or_none()
         )
 
         if listing:
-            listing_metadata = ListingTableMetadata(
-                creator_address=listing.creator_address,
-                token_data_id=listing.token_data_id,
-                token_name=listing.token_name,
-                collection=listing.collection,
-                collection_id=listing.collection_id,
-                price=listing.price,
-                amount=listing.token_amount,
-                seller=listing.seller,
+            listing_metadata = get_listing_metadata(listing)
+            current_listings_cache.put(
+                token_data_id, listing["last_transaction_version"], listing_metadata
             )
 
     return listing_metadata
@@ -138,29 +201,123 @@ def lookup_current_bid_in_db(
     token_data_id: str,
     buyer: str,
 ) -> BidMetadata | None:
-    bid_metadata = None
+    bid_metadata = current_bids_cache.get((token_data_id, buyer))
+    if bid_metadata is not None:
+        return bid_metadata
 
+    bids_table = CurrentNFTMarketplaceBid.__table__
     with Session() as session, session.begin():
         bid = (
-            session.query(CurrentNFTMarketplaceBid)
-            .filter(
-                CurrentNFTMarketplaceBid.token_data_id == token_data_id,
-                CurrentNFTMarketplaceBid.buyer == buyer,
+            session.execute(
+                select(bids_table).where(
+                    bids_table.c.token_data_id == token_data_id,
+                    bids_table.c.buyer == buyer,
+                )
             )
+            .mappings()
             .one_or_none()
         )
 
         if bid:
-            bid_metadata = BidMetadata(
-                creator_address=bid.creator_address,
-                token_data_id=bid.token_data_id,
-                token_name=bid.token_name,
-                collection=bid.collection,
-                collection_id=bid.collection_id,
-                price=bid.price,
-                amount=bid.token_amount,
-                buyer=bid.buyer,
-                seller=None,
+            bid_metadata = get_bid_metadata(bid)
+            current_bids_cache.put(
+                (token_data_id, buyer), bid["last_transaction_version"], bid_metadata
             )
 
     return bid_metadata
+
+
+# Listings and bids as of the event being parsed, for one transaction batch. The previous state of
+# every token the batch looks up is prefetched with one query per table, and the current listings
+# and bids parsed from the batch are applied on top in order. A listing placed and filled in the
+# same batch therefore resolves to the batch's own state rather than to the DB.
+class OrderbookState:
+    def __init__(self):
+        # None means the token has no listing
+        self.listings: Dict[str, Optional[ListingTableMetadata]] = {}
+        self.bids: Dict[Tuple[str, str], Optional[BidMetadata]] = {}
+        # Bids are prefetched by token, with every buyer, so a missing buyer has no bid
+        self.prefetched_bid_token_data_ids: Set[str] = set()
+
+    def prefetch(self, token_data_ids: Set[str]) -> None:
+        if not token_data_ids:
+            return
+
+        listing_token_data_ids = []
+        for token_data_id in token_data_ids:
+            listing_metadata = current_listings_cache.get(token_data_id)
+            self.listings[token_data_id] = listing_metadata
+            if listing_metadata is None:
+                listing_token_data_ids.append(token_data_id)
+
+        listings_table = CurrentNFTMarketplaceListing.__table__
+        bids_table = CurrentNFTMarketplaceBid.__table__
+        with Session() as session, session.begin():
+            if listing_token_data_ids:
+                listings = session.execute(
+                    select(listings_table).where(
+                        listings_table.c.token_data_id
+                        == any_(
+                            bindparam(
+                                "token_data_ids",
+                                listing_token_data_ids,
+                                type_=ARRAY(String),
+                            )
+                        )
+                    )
+                ).mappings()
+                for listing in listings:
+                    listing_metadata = get_listing_metadata(listing)
+                    self.listings[listing["token_data_id"]] = listing_metadata
+                    current_listings_cache.put(
+                        listing["token_data_id"],
+                        listing["last_transaction_version"],
+                        listing_metadata,
+                    )
+
+            # Oldest first, so the newest bid of a buyer wins
+            bids = session.execute(
+                select(bids_table)
+                .where(
+                    bids_table.c.token_data_id
+                    == any_(
+                        bindparam(
+                            "token_data_ids", list(token_data_ids), type_=ARRAY(String)
+                        )
+                    )
+                )
+                .order_by(bids_table.c.last_transaction_version)
+            ).mappings()
+            for bid in bids:
+                bid_metadata = get_bid_metadata(bid)
+                self.bids[(bid["token_data_id"], bid["buyer"])] = bid_metadata
+                current_bids_cache.put(
+                    (bid["token_data_id"], bid["buyer"]),
+                    bid["last_transaction_version"],
+                    bid_metadata,
+                )
+        self.prefetched_bid_token_data_ids.update(token_data_ids)
+
+    # Tokens that weren't prefetched fall back to the lookup cache and the DB
+    def lookup_listing(self, token_data_id: str) -> Optional[ListingTableMetadata]:
+        if token_data_id not in self.listings:
+            self.listings[token_data_id] = lookup_current_listing_in_db(token_data_id)
+        return self.listings[token_data_id]
+
+    def lookup_bid(self, token_data_id: str, buyer: str) -> Optional[BidMetadata]:
+        key = (token_data_id, buyer)
+        if key not in self.bids:
+            self.bids[key] = (
+                None
+                if token_data_id in self.prefetched_bid_token_data_ids
+                else lookup_current_bid_in_db(token_data_id, buyer)
+            )
+        return self.bids[key]
+
+    # Called with everything parsed from the batch so far, in order
+    def apply(self, parsed_rows: Iterable[ParsedRow]) -> None:
+        for model, row in parsed_rows:
+            if model is CurrentNFTMarketplaceListing:
+                self.listings[row["token_data_id"]] = get_listing_metadata(row)
+            elif model is CurrentNFTMarketplaceBid:
+                self.bids[(row["token_data_id"], row["buyer"])] = get_bid_metadata(row)
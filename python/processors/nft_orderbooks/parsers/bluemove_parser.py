@@ -1,12 +1,13 @@
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
-import json
-from typing import List
+from utils import json_utils
+from typing import List, Optional, Tuple
 from processors.nft_orderbooks.nft_marketplace_enums import (
     MarketplaceName,
     StandardMarketplaceEventType,
     ListingTableMetadata,
     BidMetadata,
     CollectionBidMetadata,
+    TransactionMetadata,
 )
 from processors.nft_orderbooks.nft_marketplace_constants import (
     BLUEMOVE_MARKETPLACE_EVENT_TYPES,
@@ -28,36 +29,62 @@ from processors.nft_orderbooks.models.nft_marketplace_listings_models import (
     NFTMarketplaceListing,
 )
 from processors.nft_orderbooks.nft_orderbooks_parser_utils import (
-    parse_transaction_metadata,
-    lookup_current_listing_in_db,
-    lookup_current_bid_in_db,
+    OrderbookState,
+    ParsedRow,
 )
 from utils.token_utils import CollectionDataIdType, TokenDataIdType, standardize_address
 from utils import event_utils, transaction_utils
 from utils.session import Session
 
 
-def parse_event(
-    transaction: transaction_pb2.Transaction,
-    event: transaction_pb2.Event,
-    event_index: int,
-) -> List[NFTMarketplaceEvent]:
-    parsed_objs = []
-
-    transaction_metadata = parse_transaction_metadata(transaction)
-
-    # Readable transaction event type
+# Token whose previous listing or bid parse_event looks up, if any. Lets the processor prefetch
+# the previous state of a whole batch before parsing it.
+def get_lookup_token_data_id(event: transaction_pb2.Event) -> Optional[str]:
     display_event_type = event_utils.get_event_type_short(event)
-
     if display_event_type not in BLUEMOVE_MARKETPLACE_EVENT_TYPES:
-        return []
+        return None
 
-    data = json.loads(event.data)
     standard_marketplace_event_type = standardize_marketplace_event_type(
         display_event_type
     )
+    if (
+        standard_marketplace_event_type
+        not in (
+            StandardMarketplaceEventType.LISTING_CANCEL,
+            StandardMarketplaceEventType.LISTING_FILLED,
+        )
+        and display_event_type != "offer_lib::CancelOfferEvent"
+    ):
+        return None
+
+    creator, collection, token_name = parse_token_data_id_struct(
+        json_utils.loads(event.data)
+    )
+    return TokenDataIdType(creator, collection, token_name).to_hash()
 
-    # Collection, token, and creator parsing
+
+# Same for parse_write_table_item, which looks up the previous listing of edited listings
+def get_write_table_item_lookup_token_data_id(
+    transaction: transaction_pb2.Transaction,
+    write_table_item: transaction_pb2.WriteTableItem,
+) -> Optional[str]:
+    if write_table_item.handle != BLUEMOVE_LISTINGS_TABLE_HANDLE:
+        return None
+
+    user_transaction = transaction_utils.get_user_transaction(transaction)
+    assert user_transaction
+    if not any(
+        event_utils.get_event_type_short(event) == "marketplaceV2::ChangePriceEvent"
+        for event in user_transaction.events
+    ):
+        return None
+
+    listing_metadata = parse_listing(write_table_item)
+    return listing_metadata.token_data_id if listing_metadata else None
+
+
+# Returns the creator, collection name and token name of the token an event is about
+def parse_token_data_id_struct(data: dict) -> Tuple[str, str, str]:
     token_data_id_struct1 = data.get("token_id", {}).get("token_data_id", {})
     token_data_id_struct2 = data.get("id", {}).get("token_data_id", {})
     offer_collection_item_struct = data.get("offer_collection_item", {})
@@ -77,6 +104,32 @@ def parse_event(
         or offer_collection_item_struct.get("creator_address")
         or None
     )
+    return creator, collection, token_name
+
+
+def parse_event(
+    transaction: transaction_pb2.Transaction,
+    transaction_metadata: TransactionMetadata,
+    event: transaction_pb2.Event,
+    event_index: int,
+    orderbook_state: OrderbookState,
+) -> List[ParsedRow]:
+    parsed_objs = []
+
+    # Readable transaction event type
+    display_event_type = event_utils.get_event_type_short(event)
+
+    if display_event_type not in BLUEMOVE_MARKETPLACE_EVENT_TYPES:
+        return []
+
+    data = json_utils.loads(event.data)
+    standard_marketplace_event_type = standardize_marketplace_event_type(
+        display_event_type
+    )
+
+    # Collection, token, and creator parsing
+    offer_collection_item_struct = data.get("offer_collection_item", {})
+    creator, collection, token_name = parse_token_data_id_struct(data)
 
     token_data_id_type = None
     collection_data_id_type = CollectionDataIdType(creator, collection)
@@ -131,28 +184,30 @@ def parse_event(
     )
     seller = standardize_address(seller) if seller else None
 
-    activity = NFTMarketplaceEvent(
-        transaction_version=transaction_metadata.transaction_version,
-        event_index=event_index,
-        event_type=display_event_type,
-        standard_event_type=standard_marketplace_event_type.value,
-        creator_address=collection_data_id_type.get_creator(),
-        collection=collection_data_id_type.get_name_trunc(),
-        token_name=token_data_id_type.get_name_trunc() if token_data_id_type else None,
-        token_data_id=token_data_id_type.to_hash() if token_data_id_type else None,
-        collection_id=collection_data_id_type.to_hash(),
-        price=price,
-        token_amount=amount,
-        buyer=buyer,
-        seller=seller,
-        json_data=event.data,
-        marketplace=MarketplaceName.BLUEMOVE.value,
-        contract_address=transaction_metadata.contract_address,
-        entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-        transaction_timestamp=transaction_metadata.transaction_timestamp,
-    )
-
-    parsed_objs.append(activity)
+    activity = {
+        "transaction_version": transaction_metadata.transaction_version,
+        "event_index": event_index,
+        "event_type": display_event_type,
+        "standard_event_type": standard_marketplace_event_type.value,
+        "creator_address": collection_data_id_type.get_creator(),
+        "collection": collection_data_id_type.get_name_trunc(),
+        "token_name": token_data_id_type.get_name_trunc()
+        if token_data_id_type
+        else None,
+        "token_data_id": token_data_id_type.to_hash() if token_data_id_type else None,
+        "collection_id": collection_data_id_type.to_hash(),
+        "price": price,
+        "token_amount": amount,
+        "buyer": buyer,
+        "seller": seller,
+        "json_data": event.data,
+        "marketplace": MarketplaceName.BLUEMOVE.value,
+        "contract_address": transaction_metadata.contract_address,
+        "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+        "transaction_timestamp": transaction_metadata.transaction_timestamp,
+    }
+
+    parsed_objs.append((NFTMarketplaceEvent, activity))
 
     # Handle listing cancel and fill events
     if (
@@ -168,7 +223,7 @@ def parse_event(
         # Lookup previous listing price
         previous_price = 0
         previous_seller = None
-        previous_listing_metadata = lookup_current_listing_in_db(
+        previous_listing_metadata = orderbook_state.lookup_listing(
             token_data_id_type.to_hash()
         )
         if previous_listing_metadata:
@@ -183,224 +238,216 @@ def parse_event(
         ):
             seller = previous_seller
 
-        listing = NFTMarketplaceListing(
-            transaction_version=transaction_metadata.transaction_version,
-            index=event_index * -1,
-            creator_address=standardize_address(creator),
-            token_name=token_data_id_type.get_name_trunc(),
-            token_data_id=token_data_id_type.to_hash(),
-            collection=collection_data_id_type.get_name_trunc(),
-            collection_id=collection_data_id_type.to_hash(),
-            price=previous_price,
-            token_amount=amount
+        listing = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": event_index * -1,
+            "creator_address": standardize_address(creator),
+            "token_name": token_data_id_type.get_name_trunc(),
+            "token_data_id": token_data_id_type.to_hash(),
+            "collection": collection_data_id_type.get_name_trunc(),
+            "collection_id": collection_data_id_type.to_hash(),
+            "price": previous_price,
+            "token_amount": amount
             * -1,  # Negative if listing is canceled, filled, or edited
-            seller=seller,
-            buyer=buyer,
-            event_type=standard_marketplace_event_type.value,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(listing)
-
-        current_listing = CurrentNFTMarketplaceListing(
-            token_data_id=token_data_id_type.to_hash(),
-            creator_address=standardize_address(creator),
-            token_name=token_data_id_type.get_name_trunc(),
-            collection=collection_data_id_type.get_name_trunc(),
-            collection_id=collection_data_id_type.to_hash(),
-            price=previous_price,
-            token_amount=0,  # Zero if listing is canceled or filled
-            seller=seller,
-            is_deleted=True,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(current_listing)
+            "seller": seller,
+            "buyer": buyer,
+            "event_type": standard_marketplace_event_type.value,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((NFTMarketplaceListing, listing))
+
+        current_listing = {
+            "token_data_id": token_data_id_type.to_hash(),
+            "creator_address": standardize_address(creator),
+            "token_name": token_data_id_type.get_name_trunc(),
+            "collection": collection_data_id_type.get_name_trunc(),
+            "collection_id": collection_data_id_type.to_hash(),
+            "price": previous_price,
+            "token_amount": 0,  # Zero if listing is canceled or filled
+            "seller": seller,
+            "is_deleted": True,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((CurrentNFTMarketplaceListing, current_listing))
 
     # Handle bid cancel events
     elif display_event_type == "offer_lib::CancelOfferEvent" and token_data_id_type:
         # Lookup previous bid price
         old_bid_price = 0
         if token_data_id_type and buyer:
-            old_bid_metadata = lookup_current_bid_in_db(
+            old_bid_metadata = orderbook_state.lookup_bid(
                 token_data_id_type.to_hash(), buyer
             )
             if old_bid_metadata:
                 old_bid_price = old_bid_metadata.price
 
-        bid = NFTMarketplaceBid(
-            transaction_version=transaction_metadata.transaction_version,
-            index=event_index * -1,
-            creator_address=token_data_id_type.get_creator(),
-            token_name=token_data_id_type.get_name_trunc(),
-            token_data_id=token_data_id_type.to_hash(),
-            collection=token_data_id_type.get_collection_trunc(),
-            collection_id=token_data_id_type.get_collection_data_id_hash(),
-            price=old_bid_price,
-            token_amount=-1,
-            buyer=buyer,
-            event_type=standard_marketplace_event_type.value,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        current_bid = CurrentNFTMarketplaceBid(
-            token_data_id=token_data_id_type.to_hash(),
-            creator_address=token_data_id_type.get_creator(),
-            token_name=token_data_id_type.get_name_trunc(),
-            collection=token_data_id_type.get_collection_trunc(),
-            collection_id=token_data_id_type.get_collection_data_id_hash(),
-            price=old_bid_price,
-            token_amount=0,
-            buyer=buyer,
-            is_deleted=True,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(bid)
-        parsed_objs.append(current_bid)
+        bid = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": event_index * -1,
+            "creator_address": token_data_id_type.get_creator(),
+            "token_name": token_data_id_type.get_name_trunc(),
+            "token_data_id": token_data_id_type.to_hash(),
+            "collection": token_data_id_type.get_collection_trunc(),
+            "collection_id": token_data_id_type.get_collection_data_id_hash(),
+            "price": old_bid_price,
+            "token_amount": -1,
+            "buyer": buyer,
+            "event_type": standard_marketplace_event_type.value,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        current_bid = {
+            "token_data_id": token_data_id_type.to_hash(),
+            "creator_address": token_data_id_type.get_creator(),
+            "token_name": token_data_id_type.get_name_trunc(),
+            "collection": token_data_id_type.get_collection_trunc(),
+            "collection_id": token_data_id_type.get_collection_data_id_hash(),
+            "price": old_bid_price,
+            "token_amount": 0,
+            "buyer": buyer,
+            "is_deleted": True,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((NFTMarketplaceBid, bid))
+        parsed_objs.append((CurrentNFTMarketplaceBid, current_bid))
 
     # Handle collection bid cancel events
     elif display_event_type == "offer_lib::CancelOfferCollectionEvent":
-        collection_bid = NFTMarketplaceCollectionBid(
-            transaction_version=transaction_metadata.transaction_version,
-            index=event_index * -1,
-            creator_address=collection_data_id_type.get_creator(),
-            collection=collection_data_id_type.get_name_trunc(),
-            collection_id=collection_data_id_type.to_hash(),
-            price=int(amount_per_item) if amount_per_item else None,
-            token_amount=quantity_cancel_items * -1,
-            buyer=buyer,
-            event_type=standard_marketplace_event_type.value,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-
-        current_collection_bid = CurrentNFTMarketplaceCollectionBid(
-            creator_address=collection_data_id_type.get_creator(),
-            collection=collection_data_id_type.get_name_trunc(),
-            collection_id=collection_data_id_type.to_hash(),
-            price=int(amount_per_item) if amount_per_item else None,
-            token_amount=0,
-            buyer=buyer,
-            is_deleted=True,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-
-        parsed_objs.append(collection_bid)
-        parsed_objs.append(current_collection_bid)
+        collection_bid = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": event_index * -1,
+            "creator_address": collection_data_id_type.get_creator(),
+            "collection": collection_data_id_type.get_name_trunc(),
+            "collection_id": collection_data_id_type.to_hash(),
+            "price": int(amount_per_item) if amount_per_item else None,
+            "token_amount": quantity_cancel_items * -1,
+            "buyer": buyer,
+            "event_type": standard_marketplace_event_type.value,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+
+        current_collection_bid = {
+            "creator_address": collection_data_id_type.get_creator(),
+            "collection": collection_data_id_type.get_name_trunc(),
+            "collection_id": collection_data_id_type.to_hash(),
+            "price": int(amount_per_item) if amount_per_item else None,
+            "token_amount": 0,
+            "buyer": buyer,
+            "is_deleted": True,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+
+        parsed_objs.append((NFTMarketplaceCollectionBid, collection_bid))
+        parsed_objs.append((CurrentNFTMarketplaceCollectionBid, current_collection_bid))
 
     # Handle collection bid place events
     elif display_event_type == "offer_lib::OfferCollectionEvent":
-        collection_bid = NFTMarketplaceCollectionBid(
-            transaction_version=transaction_metadata.transaction_version,
-            index=event_index * -1,
-            creator_address=collection_data_id_type.get_creator(),
-            collection=collection_data_id_type.get_name_trunc(),
-            collection_id=collection_data_id_type.to_hash(),
-            price=int(amount_per_item) if amount_per_item else None,
-            token_amount=amount,
-            buyer=buyer,
-            event_type=standard_marketplace_event_type.value,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-
-        current_collection_bid = CurrentNFTMarketplaceCollectionBid(
-            creator_address=collection_data_id_type.get_creator(),
-            collection=collection_data_id_type.get_name_trunc(),
-            collection_id=collection_data_id_type.to_hash(),
-            price=int(amount_per_item) if amount_per_item else None,
-            token_amount=amount,
-            buyer=buyer,
-            is_deleted=False,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-
-        parsed_objs.append(collection_bid)
-        parsed_objs.append(current_collection_bid)
+        collection_bid = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": event_index * -1,
+            "creator_address": collection_data_id_type.get_creator(),
+            "collection": collection_data_id_type.get_name_trunc(),
+            "collection_id": collection_data_id_type.to_hash(),
+            "price": int(amount_per_item) if amount_per_item else None,
+            "token_amount": amount,
+            "buyer": buyer,
+            "event_type": standard_marketplace_event_type.value,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+
+        current_collection_bid = {
+            "creator_address": collection_data_id_type.get_creator(),
+            "collection": collection_data_id_type.get_name_trunc(),
+            "collection_id": collection_data_id_type.to_hash(),
+            "price": int(amount_per_item) if amount_per_item else None,
+            "token_amount": amount,
+            "buyer": buyer,
+            "is_deleted": False,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+
+        parsed_objs.append((NFTMarketplaceCollectionBid, collection_bid))
+        parsed_objs.append((CurrentNFTMarketplaceCollectionBid, current_collection_bid))
 
     # Handle collection bid fill events
     elif display_event_type == "offer_lib::AcceptOfferCollectionEvent":
-        collection_bid = NFTMarketplaceCollectionBid(
-            transaction_version=transaction_metadata.transaction_version,
-            index=event_index * -1,
-            creator_address=collection_data_id_type.get_creator(),
-            collection=collection_data_id_type.get_name_trunc(),
-            collection_id=collection_data_id_type.to_hash(),
-            price=int(amount_per_item) if amount_per_item else None,
-            token_amount=-1,
-            buyer=buyer,
-            seller=seller,
-            event_type=standard_marketplace_event_type.value,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-
-        current_collection_bid = CurrentNFTMarketplaceCollectionBid(
-            creator_address=collection_data_id_type.get_creator(),
-            collection=collection_data_id_type.get_name_trunc(),
-            collection_id=collection_data_id_type.to_hash(),
-            price=int(amount_per_item) if amount_per_item else None,
-            token_amount=quantity_offer_items,
-            buyer=buyer,
-            is_deleted=quantity_offer_items == 0,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-
-        parsed_objs.append(collection_bid)
-        parsed_objs.append(current_collection_bid)
+        collection_bid = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": event_index * -1,
+            "creator_address": collection_data_id_type.get_creator(),
+            "collection": collection_data_id_type.get_name_trunc(),
+            "collection_id": collection_data_id_type.to_hash(),
+            "price": int(amount_per_item) if amount_per_item else None,
+            "token_amount": -1,
+            "buyer": buyer,
+            "seller": seller,
+            "event_type": standard_marketplace_event_type.value,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+
+        current_collection_bid = {
+            "creator_address": collection_data_id_type.get_creator(),
+            "collection": collection_data_id_type.get_name_trunc(),
+            "collection_id": collection_data_id_type.to_hash(),
+            "price": int(amount_per_item) if amount_per_item else None,
+            "token_amount": quantity_offer_items,
+            "buyer": buyer,
+            "is_deleted": quantity_offer_items == 0,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+
+        parsed_objs.append((NFTMarketplaceCollectionBid, collection_bid))
+        parsed_objs.append((CurrentNFTMarketplaceCollectionBid, current_collection_bid))
 
     return parsed_objs
 
 
 def parse_write_table_item(
     transaction: transaction_pb2.Transaction,
+    transaction_metadata: TransactionMetadata,
     write_table_item: transaction_pb2.WriteTableItem,
     wsc_index: int,
-) -> List[
-    NFTMarketplaceEvent
-    | NFTMarketplaceListing
-    | CurrentNFTMarketplaceListing
-    | NFTMarketplaceBid
-    | CurrentNFTMarketplaceBid
-    | NFTMarketplaceCollectionBid
-    | CurrentNFTMarketplaceCollectionBid
-]:
+    orderbook_state: OrderbookState,
+) -> List[ParsedRow]:
     parsed_objs = []
 
     user_transaction = transaction_utils.get_user_transaction(transaction)
     assert user_transaction
 
-    transaction_metadata = parse_transaction_metadata(transaction)
-
     table_handle = write_table_item.handle
 
     # Handle listing place and edit events
@@ -426,67 +473,68 @@ def parse_write_table_item(
         # When a listing is edited, this is represetned as a listing delete and
         # listing place in nft_marketplace_listings
         if is_edit and listing_metadata.token_data_id:
-            old_listing_metadata = lookup_current_listing_in_db(
+            old_listing_metadata = orderbook_state.lookup_listing(
                 listing_metadata.token_data_id
             )
 
             if old_listing_metadata:
-                delete_listing = NFTMarketplaceListing(
-                    transaction_version=transaction_metadata.transaction_version,
-                    index=wsc_index * -1,  # To avoid collision with place listing index
-                    creator_address=old_listing_metadata.creator_address,
-                    token_name=old_listing_metadata.token_name,
-                    token_data_id=old_listing_metadata.token_data_id,
-                    collection=old_listing_metadata.collection,
-                    collection_id=old_listing_metadata.collection_id,
-                    price=old_listing_metadata.price,
-                    token_amount=old_listing_metadata.amount * -1
+                delete_listing = {
+                    "transaction_version": transaction_metadata.transaction_version,
+                    "index": wsc_index
+                    * -1,  # To avoid collision with place listing index
+                    "creator_address": old_listing_metadata.creator_address,
+                    "token_name": old_listing_metadata.token_name,
+                    "token_data_id": old_listing_metadata.token_data_id,
+                    "collection": old_listing_metadata.collection,
+                    "collection_id": old_listing_metadata.collection_id,
+                    "price": old_listing_metadata.price,
+                    "token_amount": old_listing_metadata.amount * -1
                     if old_listing_metadata.amount
                     else None,
-                    seller=old_listing_metadata.seller,
-                    event_type=standard_marketplace_event_type.value,
-                    marketplace=MarketplaceName.BLUEMOVE.value,
-                    contract_address=transaction_metadata.contract_address,
-                    entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-                    transaction_timestamp=transaction_metadata.transaction_timestamp,
-                )
-                parsed_objs.append(delete_listing)
-
-        listing = NFTMarketplaceListing(
-            transaction_version=transaction_metadata.transaction_version,
-            index=wsc_index,
-            creator_address=listing_metadata.creator_address,
-            token_name=listing_metadata.token_name,
-            token_data_id=listing_metadata.token_data_id,
-            collection=listing_metadata.collection,
-            collection_id=listing_metadata.collection_id,
-            price=listing_metadata.price,
-            token_amount=listing_metadata.amount,
-            seller=listing_metadata.seller,
-            event_type=standard_marketplace_event_type.value,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        current_listing = CurrentNFTMarketplaceListing(
-            token_data_id=listing_metadata.token_data_id,
-            creator_address=listing_metadata.creator_address,
-            token_name=listing_metadata.token_name,
-            collection=listing_metadata.collection,
-            collection_id=listing_metadata.collection_id,
-            price=listing_metadata.price,
-            token_amount=listing_metadata.amount,
-            seller=listing_metadata.seller,
-            is_deleted=False,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(listing)
-        parsed_objs.append(current_listing)
+                    "seller": old_listing_metadata.seller,
+                    "event_type": standard_marketplace_event_type.value,
+                    "marketplace": MarketplaceName.BLUEMOVE.value,
+                    "contract_address": transaction_metadata.contract_address,
+                    "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+                    "transaction_timestamp": transaction_metadata.transaction_timestamp,
+                }
+                parsed_objs.append((NFTMarketplaceListing, delete_listing))
+
+        listing = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": wsc_index,
+            "creator_address": listing_metadata.creator_address,
+            "token_name": listing_metadata.token_name,
+            "token_data_id": listing_metadata.token_data_id,
+            "collection": listing_metadata.collection,
+            "collection_id": listing_metadata.collection_id,
+            "price": listing_metadata.price,
+            "token_amount": listing_metadata.amount,
+            "seller": listing_metadata.seller,
+            "event_type": standard_marketplace_event_type.value,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        current_listing = {
+            "token_data_id": listing_metadata.token_data_id,
+            "creator_address": listing_metadata.creator_address,
+            "token_name": listing_metadata.token_name,
+            "collection": listing_metadata.collection,
+            "collection_id": listing_metadata.collection_id,
+            "price": listing_metadata.price,
+            "token_amount": listing_metadata.amount,
+            "seller": listing_metadata.seller,
+            "is_deleted": False,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((NFTMarketplaceListing, listing))
+        parsed_objs.append((CurrentNFTMarketplaceListing, current_listing))
 
     # Handle bid place and fill events
     elif table_handle == BLUEMOVE_BIDS_TABLE_HANDLE:
@@ -508,42 +556,42 @@ def parse_write_table_item(
             amount = 1
             is_deleted = False
 
-        bid = NFTMarketplaceBid(
-            transaction_version=transaction_metadata.transaction_version,
-            index=wsc_index,
-            creator_address=bid_data.creator_address,
-            token_name=bid_data.token_name,
-            token_data_id=bid_data.token_data_id,
-            collection=bid_data.collection,
-            collection_id=bid_data.collection_id,
-            price=bid_data.price,
-            token_amount=amount,
-            buyer=bid_data.buyer,
-            seller=bid_data.seller,
-            event_type=standard_marketplace_event_type.value,
-            marketplace=MarketplaceName.BLUEMOVE.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        current_bid = CurrentNFTMarketplaceBid(
-            token_data_id=bid_data.token_data_id,
-            creator_address=bid_data.creator_address,
-            token_name=bid_data.token_name,
-            collection=bid_data.collection,
-            collection_id=bid_data.collection_id,
-            price=bid_data.price,
-            token_amount=amount,
-            buyer=bid_data.buyer,
-            is_deleted=is_deleted,
-            marketplace=standard_marketplace_event_type.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(bid)
-        parsed_objs.append(current_bid)
+        bid = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": wsc_index,
+            "creator_address": bid_data.creator_address,
+            "token_name": bid_data.token_name,
+            "token_data_id": bid_data.token_data_id,
+            "collection": bid_data.collection,
+            "collection_id": bid_data.collection_id,
+            "price": bid_data.price,
+            "token_amount": amount,
+            "buyer": bid_data.buyer,
+            "seller": bid_data.seller,
+            "event_type": standard_marketplace_event_type.value,
+            "marketplace": MarketplaceName.BLUEMOVE.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        current_bid = {
+            "token_data_id": bid_data.token_data_id,
+            "creator_address": bid_data.creator_address,
+            "token_name": bid_data.token_name,
+            "collection": bid_data.collection,
+            "collection_id": bid_data.collection_id,
+            "price": bid_data.price,
+            "token_amount": amount,
+            "buyer": bid_data.buyer,
+            "is_deleted": is_deleted,
+            "marketplace": standard_marketplace_event_type.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((NFTMarketplaceBid, bid))
+        parsed_objs.append((CurrentNFTMarketplaceBid, current_bid))
 
     # # Handle collection bid place and fill events
     # elif table_handle == BLUEMOVE_COLLECTION_BIDS_TABLE_HANDLE:
@@ -558,39 +606,39 @@ def parse_write_table_item(
     #         token_amount_change = collection_bid_metadata.amount
     #         is_current_bid_deleted = False
 
-    #     collection_bid = NFTMarketplaceCollectionBid(
-    #         transaction_version=transaction_metadata.transaction_version,
-    #         index=wsc_index,
-    #         creator_address=collection_bid_metadata.creator_address,
-    #         collection=collection_bid_metadata.collection,
-    #         collection_id=collection_bid_metadata.collection_id,
-    #         price=collection_bid_metadata.price,
-    #         token_amount=token_amount_change,
-    #         buyer=collection_bid_metadata.buyer,
-    #         seller=collection_bid_metadata.seller,
-    #         event_type=standard_marketplace_event_type.value,
-    #         marketplace=MarketplaceName.BLUEMOVE.value,
-    #         contract_address=transaction_metadata.contract_address,
-    #         entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-    #         transaction_timestamp=transaction_metadata.transaction_timestamp,
-    #     )
-    #     current_collection_bid = CurrentNFTMarketplaceCollectionBid(
-    #         creator_address=collection_bid_metadata.creator_address,
-    #         collection=collection_bid_metadata.collection,
-    #         collection_id=collection_bid_metadata.collection_id,
-    #         price=collection_bid_metadata.price,
-    #         token_amount=collection_bid_metadata.amount,
-    #         buyer=collection_bid_metadata.buyer,
-    #         is_deleted=is_current_bid_deleted,
-    #         marketplace=MarketplaceName.BLUEMOVE.value,
-    #         contract_address=transaction_metadata.contract_address,
-    #         entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-    #         last_transaction_version=transaction_metadata.transaction_version,
-    #         last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-    #     )
-
-    #     parsed_objs.append(collection_bid)
-    #     parsed_objs.append(current_collection_bid)
+    #     collection_bid = {
+    #         "transaction_version": transaction_metadata.transaction_version,
+    #         "index": wsc_index,
+    #         "creator_address": collection_bid_metadata.creator_address,
+    #         "collection": collection_bid_metadata.collection,
+    #         "collection_id": collection_bid_metadata.collection_id,
+    #         "price": collection_bid_metadata.price,
+    #         "token_amount": token_amount_change,
+    #         "buyer": collection_bid_metadata.buyer,
+    #         "seller": collection_bid_metadata.seller,
+    #         "event_type": standard_marketplace_event_type.value,
+    #         "marketplace": MarketplaceName.BLUEMOVE.value,
+    #         "contract_address": transaction_metadata.contract_address,
+    #         "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+    #         "transaction_timestamp": transaction_metadata.transaction_timestamp,
+    #     }
+    #     current_collection_bid = {
+    #         "creator_address": collection_bid_metadata.creator_address,
+    #         "collection": collection_bid_metadata.collection,
+    #         "collection_id": collection_bid_metadata.collection_id,
+    #         "price": collection_bid_metadata.price,
+    #         "token_amount": collection_bid_metadata.amount,
+    #         "buyer": collection_bid_metadata.buyer,
+    #         "is_deleted": is_current_bid_deleted,
+    #         "marketplace": MarketplaceName.BLUEMOVE.value,
+    #         "contract_address": transaction_metadata.contract_address,
+    #         "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+    #         "last_transaction_version": transaction_metadata.transaction_version,
+    #         "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+    #     }
+
+    #     parsed_objs.append((NFTMarketplaceCollectionBid, collection_bid))
+    #     parsed_objs.append((CurrentNFTMarketplaceCollectionBid, current_collection_bid))
 
     return parsed_objs
 
@@ -598,7 +646,7 @@ def parse_write_table_item(
 def parse_listing(
     write_table_item: transaction_pb2.WriteTableItem,
 ) -> ListingTableMetadata | None:
-    table_data = json.loads(write_table_item.data.value)
+    table_data = json_utils.loads(write_table_item.data.value)
 
     # Price parsing
     price = table_data.get("price", None)
@@ -637,7 +685,7 @@ def parse_listing(
 
 
 def parse_bid(write_table_item: transaction_pb2.WriteTableItem) -> BidMetadata | None:
-    data = json.loads(write_table_item.data.value)
+    data = json_utils.loads(write_table_item.data.value)
 
     # Parse seller
     seller = data.get("accept_address", None)
@@ -676,7 +724,7 @@ def parse_bid(write_table_item: transaction_pb2.WriteTableItem) -> BidMetadata |
 def parse_collection_bid(
     write_table_item: transaction_pb2.WriteTableItem,
 ) -> CollectionBidMetadata:
-    data = json.loads(write_table_item.data.value)
+    data = json_utils.loads(write_table_item.data.value)
 
     # Price and amount parsing
     price = data.get("amount_per_item", None)
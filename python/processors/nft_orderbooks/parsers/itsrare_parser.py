@@ -1,11 +1,13 @@
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
-import json
+from utils import json_utils
 from typing import List
 from processors.nft_orderbooks.nft_marketplace_enums import (
     MarketplaceName,
     StandardMarketplaceEventType,
+    TransactionMetadata,
 )
 from processors.nft_orderbooks.nft_orderbooks_parser_utils import (
+    ParsedRow,
     get_marketplace_events,
 )
 from processors.nft_orderbooks.models.nft_marketplace_activities_model import (
@@ -30,8 +32,11 @@ ITSRARE_MARKETPLACE_EVENT_TYPES = set(
 
 def parse_marketplace_events(
     transaction: transaction_pb2.Transaction,
-) -> List[NFTMarketplaceEvent]:
-    topaz_raw_events = get_marketplace_events(transaction, MarketplaceName.ITSRARE)
+    transaction_metadata: TransactionMetadata,
+) -> List[ParsedRow]:
+    topaz_raw_events = get_marketplace_events(
+        transaction, transaction_metadata, MarketplaceName.ITSRARE
+    )
     nft_activities = []
 
     for event in topaz_raw_events:
@@ -42,7 +47,7 @@ def parse_marketplace_events(
         if display_event_type not in ITSRARE_MARKETPLACE_EVENT_TYPES:
             continue
 
-        data = json.loads(event.json_data)
+        data = json_utils.loads(event.json_data)
 
         # Collection, token, and creator parsing
         token_data_id_struct = data.get("token_id", {}).get("token_data_id", {})
@@ -72,30 +77,30 @@ def parse_marketplace_events(
         buyer = data.get("buyer", None)
         seller = data.get("seller", None) or data.get("lister", None)
 
-        activity = NFTMarketplaceEvent(
-            transaction_version=event.transaction_version,
-            event_index=event.event_index,
-            event_type=display_event_type,
-            standard_event_type=standardize_marketplace_event_type(
+        activity = {
+            "transaction_version": event.transaction_version,
+            "event_index": event.event_index,
+            "event_type": display_event_type,
+            "standard_event_type": standardize_marketplace_event_type(
                 display_event_type
             ).value,
-            creator_address=standardize_address(creator),
-            collection=token_data_id_type.get_collection_trunc(),
-            token_name=token_name_trunc,
-            token_data_id=token_data_id,
-            collection_id=token_data_id_type.get_collection_data_id_hash(),
-            price=price,
-            token_amount=amount,
-            buyer=standardize_address(buyer) if buyer else None,
-            seller=standardize_address(seller) if seller else None,
-            json_data=event.json_data,
-            marketplace=MarketplaceName.ITSRARE.value,
-            contract_address=event.contract_address,
-            entry_function_id_str=event.entry_function_name,
-            transaction_timestamp=event.transaction_timestamp,
-        )
+            "creator_address": standardize_address(creator),
+            "collection": token_data_id_type.get_collection_trunc(),
+            "token_name": token_name_trunc,
+            "token_data_id": token_data_id,
+            "collection_id": token_data_id_type.get_collection_data_id_hash(),
+            "price": price,
+            "token_amount": amount,
+            "buyer": standardize_address(buyer) if buyer else None,
+            "seller": standardize_address(seller) if seller else None,
+            "json_data": event.json_data,
+            "marketplace": MarketplaceName.ITSRARE.value,
+            "contract_address": event.contract_address,
+            "entry_function_id_str": event.entry_function_name,
+            "transaction_timestamp": event.transaction_timestamp,
+        }
 
-        nft_activities.append(activity)
+        nft_activities.append((NFTMarketplaceEvent, activity))
 
     return nft_activities
 
@@ -1,14 +1,16 @@
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
-import json
+from utils import json_utils
 import re
 from typing import Dict, List, Optional, TypedDict
 from processors.nft_orderbooks.nft_marketplace_enums import (
     MarketplaceName,
     StandardMarketplaceEventType,
+    TransactionMetadata,
 )
 from processors.nft_orderbooks.models.nft_marketplace_activities_model import (
     NFTMarketplaceEvent,
 )
+from processors.nft_orderbooks.nft_orderbooks_parser_utils import ParsedRow
 from utils.token_utils import CollectionDataIdType, TokenDataIdType, standardize_address
 from utils import event_utils, general_utils, transaction_utils
 
@@ -25,14 +27,14 @@ DEPOSIT_EVENT_V2 = "0x3::token::Deposit"
 
 def parse_marketplace_events(
     transaction: transaction_pb2.Transaction,
-) -> List[NFTMarketplaceEvent]:
+    transaction_metadata: TransactionMetadata,
+) -> List[ParsedRow]:
     user_transaction = transaction_utils.get_user_transaction(transaction)
 
     if user_transaction is None:
         return []
 
-    move_module = transaction_utils.get_move_module(user_transaction)
-    contract_address = move_module.address
+    contract_address = transaction_metadata.contract_address
     if (
         contract_address
         != "0x1e6009ce9d288f3d5031c06ca0b19a334214ead798a0cb38808485bd6d997a43"
@@ -40,11 +42,9 @@ def parse_marketplace_events(
         return []
 
     nft_activities = []
-    entry_function_payload = transaction_utils.get_entry_function_payload(
-        user_transaction
-    )
-    entry_function = entry_function_payload.function
-    entry_function_name = f"{entry_function.module.name}::{entry_function.name}"
+    entry_function_name = transaction_metadata.entry_function_id_str_short
+    # Indexed on the first listing fill, and shared by every fill of the transaction
+    deposit_events: Optional[Dict[str, TokenDataIdType]] = None
 
     for event_index, event in enumerate(user_transaction.events):
         # Readable transaction event type
@@ -54,7 +54,7 @@ def parse_marketplace_events(
         if display_event_type not in OKX_MARKETPLACE_EVENT_TYPES:
             continue
 
-        data = json.loads(event.data)
+        data = json_utils.loads(event.data)
 
         # Get token metadata
         token_data_id_type = None
@@ -74,7 +74,8 @@ def parse_marketplace_events(
         ):
             # Token metadata for listing fill event exist in the deposit events
             # in the same transaction
-            deposit_events = get_token_data_from_deposit_events(user_transaction)
+            if deposit_events is None:
+                deposit_events = get_token_data_from_deposit_events(user_transaction)
             account_address = event_utils.get_account_address(event)
             if standardize_address(account_address) in deposit_events:
                 token_data_id_type = deposit_events[
@@ -110,32 +111,30 @@ def parse_marketplace_events(
         buyer = data.get("buyer", None)
         seller = data.get("id", {}).get("addr", None)
 
-        activity = NFTMarketplaceEvent(
-            transaction_version=transaction.version,
-            event_index=event_index,
-            event_type=display_event_type,
-            standard_event_type=standardize_marketplace_event_type(
+        activity = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "event_index": event_index,
+            "event_type": display_event_type,
+            "standard_event_type": standardize_marketplace_event_type(
                 display_event_type
             ).value,
-            creator_address=standardize_address(creator) if creator else None,
-            collection=collection_trunc,
-            token_name=token_name_trunc,
-            token_data_id=token_data_id,
-            collection_id=collection_data_id,
-            price=price,
-            token_amount=amount,
-            buyer=standardize_address(buyer) if buyer else None,
-            seller=standardize_address(seller) if seller else None,
-            json_data=event.data,
-            marketplace=MarketplaceName.OKX.value,
-            contract_address=contract_address,
-            entry_function_id_str=entry_function_name,
-            transaction_timestamp=general_utils.convert_pb_timestamp_to_datetime(
-                transaction.timestamp
-            ),
-        )
-
-        nft_activities.append(activity)
+            "creator_address": standardize_address(creator) if creator else None,
+            "collection": collection_trunc,
+            "token_name": token_name_trunc,
+            "token_data_id": token_data_id,
+            "collection_id": collection_data_id,
+            "price": price,
+            "token_amount": amount,
+            "buyer": standardize_address(buyer) if buyer else None,
+            "seller": standardize_address(seller) if seller else None,
+            "json_data": event.data,
+            "marketplace": MarketplaceName.OKX.value,
+            "contract_address": contract_address,
+            "entry_function_id_str": entry_function_name,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+
+        nft_activities.append((NFTMarketplaceEvent, activity))
 
     return nft_activities
 
@@ -155,7 +154,7 @@ def get_token_data_from_deposit_events(user_transaction) -> Dict[str, TokenDataI
         ):
             continue
         account_address = standardize_address(event_utils.get_account_address(event))
-        data = json.loads(event.data)
+        data = json_utils.loads(event.data)
 
         # Collection, token, and creator parsing
         token_data_id_struct = data.get("id", {}).get("token_data_id", {})
@@ -1,13 +1,15 @@
 import re
 
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
-import json
+from utils import json_utils
 from typing import List
 from processors.nft_orderbooks.nft_marketplace_enums import (
     MarketplaceName,
     StandardMarketplaceEventType,
+    TransactionMetadata,
 )
 from processors.nft_orderbooks.nft_orderbooks_parser_utils import (
+    ParsedRow,
     get_marketplace_events,
 )
 from processors.nft_orderbooks.models.nft_marketplace_activities_model import (
@@ -28,8 +30,11 @@ OZOZOZ_MARKETPLACE_EVENT_TYPES = set(
 
 def parse_marketplace_events(
     transaction: transaction_pb2.Transaction,
-) -> List[NFTMarketplaceEvent]:
-    ozozoz_raw_events = get_marketplace_events(transaction, MarketplaceName.OZOZOZ)
+    transaction_metadata: TransactionMetadata,
+) -> List[ParsedRow]:
+    ozozoz_raw_events = get_marketplace_events(
+        transaction, transaction_metadata, MarketplaceName.OZOZOZ
+    )
     nft_activities = []
 
     for event in ozozoz_raw_events:
@@ -40,7 +45,7 @@ def parse_marketplace_events(
         if display_event_type not in OZOZOZ_MARKETPLACE_EVENT_TYPES:
             continue
 
-        data = json.loads(event.json_data)
+        data = json_utils.loads(event.json_data)
 
         # Collection, token, and creator parsing
         token_data_id_struct = data.get("tokenId", {}).get("token_data_id", {})
@@ -67,30 +72,30 @@ def parse_marketplace_events(
             buyer = None
             seller = user
 
-        activity = NFTMarketplaceEvent(
-            transaction_version=event.transaction_version,
-            event_index=event.event_index,
-            event_type=display_event_type,
-            standard_event_type=standardize_marketplace_event_type(
+        activity = {
+            "transaction_version": event.transaction_version,
+            "event_index": event.event_index,
+            "event_type": display_event_type,
+            "standard_event_type": standardize_marketplace_event_type(
                 display_event_type
             ).value,
-            creator_address=standardize_address(creator),
-            collection=token_data_id_type.get_collection_trunc(),
-            token_name=token_data_id_type.get_name_trunc(),
-            token_data_id=token_data_id_type.to_hash(),
-            collection_id=token_data_id_type.get_collection_data_id_hash(),
-            price=price,
-            token_amount=amount,
-            buyer=standardize_address(buyer) if buyer else None,
-            seller=standardize_address(seller),
-            json_data=event.json_data,
-            marketplace=MarketplaceName.OZOZOZ.value,
-            contract_address=event.contract_address,
-            entry_function_id_str=event.entry_function_name,
-            transaction_timestamp=event.transaction_timestamp,
-        )
-
-        nft_activities.append(activity)
+            "creator_address": standardize_address(creator),
+            "collection": token_data_id_type.get_collection_trunc(),
+            "token_name": token_data_id_type.get_name_trunc(),
+            "token_data_id": token_data_id_type.to_hash(),
+            "collection_id": token_data_id_type.get_collection_data_id_hash(),
+            "price": price,
+            "token_amount": amount,
+            "buyer": standardize_address(buyer) if buyer else None,
+            "seller": standardize_address(seller),
+            "json_data": event.json_data,
+            "marketplace": MarketplaceName.OZOZOZ.value,
+            "contract_address": event.contract_address,
+            "entry_function_id_str": event.entry_function_name,
+            "transaction_timestamp": event.transaction_timestamp,
+        }
+
+        nft_activities.append((NFTMarketplaceEvent, activity))
 
     return nft_activities
 
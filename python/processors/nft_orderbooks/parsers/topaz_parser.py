@@ -1,4 +1,4 @@
-import json
+from utils import json_utils
 
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
 from typing import List, Optional, Tuple
@@ -14,11 +14,9 @@ from processors.nft_orderbooks.nft_marketplace_enums import (
     StandardMarketplaceEventType,
     ListingTableMetadata,
     MarketplaceEventMetadata,
+    TransactionMetadata,
     CollectionBidMetadata,
 )
-from processors.nft_orderbooks.nft_orderbooks_parser_utils import (
-    parse_transaction_metadata,
-)
 from processors.nft_orderbooks.models.nft_marketplace_activities_model import (
     NFTMarketplaceEvent,
 )
@@ -32,6 +30,7 @@ from processors.nft_orderbooks.models.nft_marketplace_listings_models import (
     CurrentNFTMarketplaceListing,
     NFTMarketplaceListing,
 )
+from processors.nft_orderbooks.nft_orderbooks_parser_utils import ParsedRow
 from utils.token_utils import CollectionDataIdType, TokenDataIdType, standardize_address
 from utils import event_utils, general_utils, transaction_utils, write_set_change_utils
 
@@ -58,24 +57,12 @@ def standardize_marketplace_event_type(
 
 def parse_event(
     transaction: transaction_pb2.Transaction,
+    transaction_metadata: TransactionMetadata,
     event: transaction_pb2.Event,
     event_index: int,
-) -> List[
-    NFTMarketplaceEvent
-    | NFTMarketplaceListing
-    | CurrentNFTMarketplaceListing
-    | NFTMarketplaceBid
-    | CurrentNFTMarketplaceBid
-    | NFTMarketplaceCollectionBid
-    | CurrentNFTMarketplaceCollectionBid
-]:
+) -> List[ParsedRow]:
     parsed_objs = []
 
-    user_transaction = transaction_utils.get_user_transaction(transaction)
-    assert user_transaction
-
-    transaction_metadata = parse_transaction_metadata(transaction)
-
     # Filter out events we don't care about
     display_event_type = event_utils.get_event_type_short(event)
 
@@ -85,169 +72,164 @@ def parse_event(
     event_metadata = parse_marketplace_event_metadata(event)
     standard_event_type = standardize_marketplace_event_type(display_event_type)
 
-    activity = NFTMarketplaceEvent(
-        transaction_version=transaction_metadata.transaction_version,
-        event_index=event_index,
-        event_type=display_event_type,
-        standard_event_type=standard_event_type.value,
-        creator_address=event_metadata.creator_address,
-        collection=event_metadata.collection,
-        token_name=event_metadata.token_name,
-        token_data_id=event_metadata.token_data_id,
-        collection_id=event_metadata.collection_id,
-        price=event_metadata.price,
-        token_amount=event_metadata.amount,
-        buyer=event_metadata.buyer,
-        seller=event_metadata.seller,
-        json_data=event.data,
-        marketplace=MarketplaceName.TOPAZ.value,
-        contract_address=transaction_metadata.contract_address,
-        entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-        transaction_timestamp=transaction_metadata.transaction_timestamp,
-    )
-
-    parsed_objs.append(activity)
+    activity = {
+        "transaction_version": transaction_metadata.transaction_version,
+        "event_index": event_index,
+        "event_type": display_event_type,
+        "standard_event_type": standard_event_type.value,
+        "creator_address": event_metadata.creator_address,
+        "collection": event_metadata.collection,
+        "token_name": event_metadata.token_name,
+        "token_data_id": event_metadata.token_data_id,
+        "collection_id": event_metadata.collection_id,
+        "price": event_metadata.price,
+        "token_amount": event_metadata.amount,
+        "buyer": event_metadata.buyer,
+        "seller": event_metadata.seller,
+        "json_data": event.data,
+        "marketplace": MarketplaceName.TOPAZ.value,
+        "contract_address": transaction_metadata.contract_address,
+        "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+        "transaction_timestamp": transaction_metadata.transaction_timestamp,
+    }
+
+    parsed_objs.append((NFTMarketplaceEvent, activity))
 
     # Handle listing cancel and listing fill events
     if display_event_type in set(["events::DelistEvent", "events::BuyEvent"]):
-        listing = NFTMarketplaceListing(
-            transaction_version=transaction_metadata.transaction_version,
-            index=event_index * -1,
-            creator_address=event_metadata.creator_address,
-            token_name=event_metadata.token_name,
-            token_data_id=event_metadata.token_data_id,
-            collection=event_metadata.collection,
-            collection_id=event_metadata.collection_id,
-            price=event_metadata.price,
-            token_amount=event_metadata.amount * -1 if event_metadata.amount else None,
-            buyer=event_metadata.buyer,
-            seller=event_metadata.seller,
-            event_type=standard_event_type.value,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        current_listing = CurrentNFTMarketplaceListing(
-            token_data_id=event_metadata.token_data_id,
-            creator_address=event_metadata.creator_address,
-            token_name=event_metadata.token_name,
-            collection=event_metadata.collection,
-            collection_id=event_metadata.collection_id,
-            price=event_metadata.price,
-            token_amount=0,
-            seller=event_metadata.seller,
-            is_deleted=True,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-
-        parsed_objs.append(listing)
-        parsed_objs.append(current_listing)
+        listing = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": event_index * -1,
+            "creator_address": event_metadata.creator_address,
+            "token_name": event_metadata.token_name,
+            "token_data_id": event_metadata.token_data_id,
+            "collection": event_metadata.collection,
+            "collection_id": event_metadata.collection_id,
+            "price": event_metadata.price,
+            "token_amount": event_metadata.amount * -1
+            if event_metadata.amount
+            else None,
+            "buyer": event_metadata.buyer,
+            "seller": event_metadata.seller,
+            "event_type": standard_event_type.value,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        current_listing = {
+            "token_data_id": event_metadata.token_data_id,
+            "creator_address": event_metadata.creator_address,
+            "token_name": event_metadata.token_name,
+            "collection": event_metadata.collection,
+            "collection_id": event_metadata.collection_id,
+            "price": event_metadata.price,
+            "token_amount": 0,
+            "seller": event_metadata.seller,
+            "is_deleted": True,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+
+        parsed_objs.append((NFTMarketplaceListing, listing))
+        parsed_objs.append((CurrentNFTMarketplaceListing, current_listing))
     # Handle cancel bid event
     elif display_event_type == "events::CancelBidEvent":
-        bid = NFTMarketplaceBid(
-            transaction_version=transaction_metadata.transaction_version,
-            index=event_index * -1,
-            creator_address=event_metadata.creator_address,
-            token_name=event_metadata.token_name,
-            token_data_id=event_metadata.token_data_id,
-            collection=event_metadata.collection,
-            collection_id=event_metadata.collection_id,
-            price=event_metadata.price,
-            token_amount=event_metadata.amount * -1 if event_metadata.amount else None,
-            seller=event_metadata.seller,
-            buyer=event_metadata.buyer,
-            event_type=standard_event_type.value,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        current_bid = CurrentNFTMarketplaceBid(
-            token_data_id=event_metadata.token_data_id,
-            creator_address=event_metadata.creator_address,
-            token_name=event_metadata.token_name,
-            collection=event_metadata.collection,
-            collection_id=event_metadata.collection_id,
-            price=event_metadata.price,
-            token_amount=0,
-            buyer=event_metadata.buyer,
-            is_deleted=True,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(bid)
-        parsed_objs.append(current_bid)
+        bid = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": event_index * -1,
+            "creator_address": event_metadata.creator_address,
+            "token_name": event_metadata.token_name,
+            "token_data_id": event_metadata.token_data_id,
+            "collection": event_metadata.collection,
+            "collection_id": event_metadata.collection_id,
+            "price": event_metadata.price,
+            "token_amount": event_metadata.amount * -1
+            if event_metadata.amount
+            else None,
+            "seller": event_metadata.seller,
+            "buyer": event_metadata.buyer,
+            "event_type": standard_event_type.value,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        current_bid = {
+            "token_data_id": event_metadata.token_data_id,
+            "creator_address": event_metadata.creator_address,
+            "token_name": event_metadata.token_name,
+            "collection": event_metadata.collection,
+            "collection_id": event_metadata.collection_id,
+            "price": event_metadata.price,
+            "token_amount": 0,
+            "buyer": event_metadata.buyer,
+            "is_deleted": True,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((NFTMarketplaceBid, bid))
+        parsed_objs.append((CurrentNFTMarketplaceBid, current_bid))
 
     return parsed_objs
 
 
 def parse_write_table_item(
     transaction: transaction_pb2.Transaction,
+    transaction_metadata: TransactionMetadata,
     write_table_item: transaction_pb2.WriteTableItem,
     wsc_index: int,
-) -> List[
-    NFTMarketplaceEvent
-    | NFTMarketplaceListing
-    | CurrentNFTMarketplaceListing
-    | NFTMarketplaceBid
-    | CurrentNFTMarketplaceBid
-    | NFTMarketplaceCollectionBid
-    | CurrentNFTMarketplaceCollectionBid
-]:
+) -> List[ParsedRow]:
     parsed_objs = []
 
     user_transaction = transaction_utils.get_user_transaction(transaction)
     assert user_transaction
 
-    transaction_metadata = parse_transaction_metadata(transaction)
-
     table_handle = write_table_item.handle
     # Handle listing place events
     if table_handle == TOPAZ_LISTINGS_TABLE_HANDLE:
         listing_data = parse_place_listing(write_table_item)
-        listing = NFTMarketplaceListing(
-            transaction_version=transaction_metadata.transaction_version,
-            index=wsc_index,
-            creator_address=listing_data.creator_address,
-            token_name=listing_data.token_name,
-            token_data_id=listing_data.token_data_id,
-            collection=listing_data.collection,
-            collection_id=listing_data.collection_id,
-            price=listing_data.price,
-            token_amount=listing_data.amount,
-            seller=listing_data.seller,
-            event_type=StandardMarketplaceEventType.LISTING_PLACE.value,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        current_listing = CurrentNFTMarketplaceListing(
-            token_data_id=listing_data.token_data_id,
-            creator_address=listing_data.creator_address,
-            token_name=listing_data.token_name,
-            collection=listing_data.collection,
-            collection_id=listing_data.collection_id,
-            price=listing_data.price,
-            token_amount=listing_data.amount,
-            seller=listing_data.seller,
-            is_deleted=False,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(listing)
-        parsed_objs.append(current_listing)
+        listing = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": wsc_index,
+            "creator_address": listing_data.creator_address,
+            "token_name": listing_data.token_name,
+            "token_data_id": listing_data.token_data_id,
+            "collection": listing_data.collection,
+            "collection_id": listing_data.collection_id,
+            "price": listing_data.price,
+            "token_amount": listing_data.amount,
+            "seller": listing_data.seller,
+            "event_type": StandardMarketplaceEventType.LISTING_PLACE.value,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        current_listing = {
+            "token_data_id": listing_data.token_data_id,
+            "creator_address": listing_data.creator_address,
+            "token_name": listing_data.token_name,
+            "collection": listing_data.collection,
+            "collection_id": listing_data.collection_id,
+            "price": listing_data.price,
+            "token_amount": listing_data.amount,
+            "seller": listing_data.seller,
+            "is_deleted": False,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((NFTMarketplaceListing, listing))
+        parsed_objs.append((CurrentNFTMarketplaceListing, current_listing))
 
     # Handle bid place and bid filled events
     elif table_handle == TOPAZ_BIDS_TABLE_HANDLE:
@@ -270,44 +252,44 @@ def parse_write_table_item(
 
         seller = None
         if event_type == StandardMarketplaceEventType.BID_FILLED:
-            seller = transaction_utils.get_sender(user_transaction)
-
-        bid = NFTMarketplaceBid(
-            transaction_version=transaction_metadata.transaction_version,
-            index=wsc_index,
-            creator_address=bid_data.creator_address,
-            token_name=bid_data.token_name,
-            token_data_id=bid_data.token_data_id,
-            collection=bid_data.collection,
-            collection_id=bid_data.collection_id,
-            price=bid_data.price,
-            token_amount=bid_amount,
-            buyer=bid_data.buyer,
-            seller=seller,
-            event_type=event_type.value,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        current_bid = CurrentNFTMarketplaceBid(
-            token_data_id=bid_data.token_data_id,
-            creator_address=bid_data.creator_address,
-            token_name=bid_data.token_name,
-            collection=bid_data.collection,
-            collection_id=bid_data.collection_id,
-            price=bid_data.price,
-            token_amount=bid_data.amount,
-            buyer=bid_data.buyer,
-            is_deleted=is_deleted,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(bid)
-        parsed_objs.append(current_bid)
+            seller = transaction_metadata.sender
+
+        bid = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": wsc_index,
+            "creator_address": bid_data.creator_address,
+            "token_name": bid_data.token_name,
+            "token_data_id": bid_data.token_data_id,
+            "collection": bid_data.collection,
+            "collection_id": bid_data.collection_id,
+            "price": bid_data.price,
+            "token_amount": bid_amount,
+            "buyer": bid_data.buyer,
+            "seller": seller,
+            "event_type": event_type.value,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        current_bid = {
+            "token_data_id": bid_data.token_data_id,
+            "creator_address": bid_data.creator_address,
+            "token_name": bid_data.token_name,
+            "collection": bid_data.collection,
+            "collection_id": bid_data.collection_id,
+            "price": bid_data.price,
+            "token_amount": bid_data.amount,
+            "buyer": bid_data.buyer,
+            "is_deleted": is_deleted,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((NFTMarketplaceBid, bid))
+        parsed_objs.append((CurrentNFTMarketplaceBid, current_bid))
 
     # Handle collection bid place and cancel and fill
     elif table_handle == TOPAZ_COLLECTION_BIDS_TABLE_HANDLE:
@@ -332,42 +314,42 @@ def parse_write_table_item(
         elif num_filled > 0:
             event_type = StandardMarketplaceEventType.BID_FILLED
             amount = -1 * num_filled
-            seller = transaction_utils.get_sender(user_transaction)
+            seller = transaction_metadata.sender
         else:
             event_type = StandardMarketplaceEventType.BID_PLACE
 
-        collection_bid = NFTMarketplaceCollectionBid(
-            transaction_version=transaction_metadata.transaction_version,
-            index=wsc_index,
-            creator_address=collection_bid_data.creator_address,
-            collection=collection_bid_data.collection,
-            collection_id=collection_bid_data.collection_id,
-            price=collection_bid_data.price,
-            token_amount=amount,
-            buyer=collection_bid_data.buyer,
-            seller=seller,
-            event_type=event_type.value,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        current_collection_bid = CurrentNFTMarketplaceCollectionBid(
-            creator_address=collection_bid_data.creator_address,
-            collection=collection_bid_data.collection,
-            collection_id=collection_bid_data.collection_id,
-            price=collection_bid_data.price,
-            token_amount=current_amount,
-            buyer=collection_bid_data.buyer,
-            is_deleted=is_deleted,
-            marketplace=MarketplaceName.TOPAZ.value,
-            contract_address=transaction_metadata.contract_address,
-            entry_function_id_str=transaction_metadata.entry_function_id_str_short,
-            last_transaction_version=transaction_metadata.transaction_version,
-            last_transaction_timestamp=transaction_metadata.transaction_timestamp,
-        )
-        parsed_objs.append(collection_bid)
-        parsed_objs.append(current_collection_bid)
+        collection_bid = {
+            "transaction_version": transaction_metadata.transaction_version,
+            "index": wsc_index,
+            "creator_address": collection_bid_data.creator_address,
+            "collection": collection_bid_data.collection,
+            "collection_id": collection_bid_data.collection_id,
+            "price": collection_bid_data.price,
+            "token_amount": amount,
+            "buyer": collection_bid_data.buyer,
+            "seller": seller,
+            "event_type": event_type.value,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        current_collection_bid = {
+            "creator_address": collection_bid_data.creator_address,
+            "collection": collection_bid_data.collection,
+            "collection_id": collection_bid_data.collection_id,
+            "price": collection_bid_data.price,
+            "token_amount": current_amount,
+            "buyer": collection_bid_data.buyer,
+            "is_deleted": is_deleted,
+            "marketplace": MarketplaceName.TOPAZ.value,
+            "contract_address": transaction_metadata.contract_address,
+            "entry_function_id_str": transaction_metadata.entry_function_id_str_short,
+            "last_transaction_version": transaction_metadata.transaction_version,
+            "last_transaction_timestamp": transaction_metadata.transaction_timestamp,
+        }
+        parsed_objs.append((NFTMarketplaceCollectionBid, collection_bid))
+        parsed_objs.append((CurrentNFTMarketplaceCollectionBid, current_collection_bid))
 
     return parsed_objs
 
@@ -375,7 +357,7 @@ def parse_write_table_item(
 def parse_place_listing(
     write_table_item: transaction_pb2.WriteTableItem,
 ) -> ListingTableMetadata:
-    table_data = json.loads(write_table_item.data.value)
+    table_data = json_utils.loads(write_table_item.data.value)
 
     # Collection, token, and creator parsing
     token_data_id_struct = table_data.get("token_id", {}).get("token_data_id", {})
@@ -416,7 +398,7 @@ def parse_place_listing(
 
 
 def parse_bid(write_table_item: transaction_pb2.WriteTableItem) -> BidMetadata:
-    data = json.loads(write_table_item.data.value)
+    data = json_utils.loads(write_table_item.data.value)
 
     # Collection, token, and creator parsing
     token_data_id_struct = data.get("token_id", {}).get("token_data_id", {})
@@ -456,7 +438,7 @@ def parse_bid(write_table_item: transaction_pb2.WriteTableItem) -> BidMetadata:
 def parse_collection_bid(
     write_table_item: transaction_pb2.WriteTableItem,
 ) -> CollectionBidMetadata:
-    data = json.loads(write_table_item.data.value)
+    data = json_utils.loads(write_table_item.data.value)
 
     # Collection creator parsing
     collection = data.get("collection_name", None)
@@ -493,7 +475,7 @@ def parse_collection_bid(
 def parse_marketplace_event_metadata(
     event: transaction_pb2.Event,
 ) -> MarketplaceEventMetadata:
-    data = json.loads(event.data)
+    data = json_utils.loads(event.data)
 
     # Collection, token, and creator parsing
     token_data_id_struct = data.get("token_id", {}).get("token_data_id", {})
@@ -0,0 +1,76 @@
+import datetime
+import unittest
+from typing import Any, List
+
+from sqlalchemy.dialects import postgresql
+
+from processors.nft_orderbooks.models.nft_marketplace_listings_models import (
+    NFTMarketplaceListing,
+)
+from utils import bulk_writer
+
+
+# Records the statements a writer executes instead of running them
+class RecordingSession:
+    def __init__(self):
+        self.statements: List[Any] = []
+
+    def execute(self, statement: Any) -> None:
+        self.statements.append(statement)
+
+
+def make_listing(index: int, **kwargs) -> NFTMarketplaceListing:
+    return NFTMarketplaceListing(
+        transaction_version=1,
+        index=index,
+        creator_address="0x1",
+        token_name="token",
+        token_data_id="0x2",
+        collection="collection",
+        collection_id="0x3",
+        price=1,
+        token_amount=1,
+        seller="0x4",
+        marketplace="bluemove",
+        contract_address="0x5",
+        entry_function_id_str="marketplaceV2::buy",
+        event_type="place_listing",
+        transaction_timestamp=datetime.datetime(2023, 1, 1),
+        **kwargs,
+    )
+
+
+class UpsertRowsTest(unittest.TestCase):
+    def test_mixed_column_batch(self):
+        session = RecordingSession()
+        objs = [make_listing(0), make_listing(1, buyer="0x6"), make_listing(2)]
+
+        bulk_writer.upsert_objects(session, objs)  # type: ignore
+
+        compiled_statements = [
+            statement.compile(dialect=postgresql.dialect())
+            for statement in session.statements
+        ]
+        self.assertEqual(len(compiled_statements), 2)
+        rows_by_index = {}
+        for compiled_statement in compiled_statements:
+            params = compiled_statement.params
+            num_of_rows = sum(1 for key in params if key.startswith("index_m"))
+            for row_number in range(num_of_rows):
+                rows_by_index[params[f"index_m{row_number}"]] = {
+                    key.rsplit("_m", 1)[0]: value
+                    for key, value in params.items()
+                    if key.endswith(f"_m{row_number}")
+                }
+        self.assertEqual(sorted(rows_by_index), [0, 1, 2])
+        self.assertEqual(rows_by_index[1]["buyer"], "0x6")
+        self.assertNotIn("buyer", rows_by_index[0])
+        self.assertNotIn("buyer", rows_by_index[2])
+        self.assertEqual(
+            bulk_writer.pop_written_row_counts(),
+            {NFTMarketplaceListing.__table__.fullname: 3},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from typing import List
+
+from utils.concurrency import AdaptiveConcurrencyController
+from utils.transactions_processor import ProcessingResult
+
+
+def make_results(
+    num_of_batches: int, db_insertion_duration_in_secs: float = 0.1
+) -> List[ProcessingResult]:
+    return [
+        ProcessingResult(
+            start_version=batch_index * 100,
+            end_version=batch_index * 100 + 99,
+            processing_duration_in_secs=0.1,
+            db_insertion_duration_in_secs=db_insertion_duration_in_secs,
+        )
+        for batch_index in range(num_of_batches)
+    ]
+
+
+class AdaptiveConcurrencyControllerTest(unittest.TestCase):
+    def test_starts_at_configured_concurrency(self):
+        controller = AdaptiveConcurrencyController("test", 1, 8)
+        self.assertEqual(controller.num_concurrent_processing_tasks, 8)
+
+    def test_converges_upward_under_flat_load(self):
+        controller = AdaptiveConcurrencyController("test", 1, 8)
+        controller.record_lock_error()
+        self.assertEqual(controller.update(make_results(8), 10, 1.0), 4)
+
+        for _ in range(10):
+            controller.update(make_results(4), 10, 1.0)
+
+        self.assertEqual(controller.num_concurrent_processing_tasks, 8)
+
+    def test_holds_without_backlog(self):
+        controller = AdaptiveConcurrencyController("test", 1, 8)
+        controller.record_lock_error()
+        controller.update(make_results(8), 10, 1.0)
+
+        for _ in range(10):
+            controller.update(make_results(4), 0, 1.0)
+
+        self.assertEqual(controller.num_concurrent_processing_tasks, 4)
+
+    def test_halves_on_db_saturation(self):
+        controller = AdaptiveConcurrencyController("test", 1, 8)
+        controller.update(make_results(8), 10, 1.0)
+
+        num_concurrent_processing_tasks = controller.update(
+            make_results(4, db_insertion_duration_in_secs=1.0), 10, 1.0
+        )
+
+        self.assertEqual(num_concurrent_processing_tasks, 4)
+
+    def test_holds_when_throughput_drops_outside_the_db(self):
+        controller = AdaptiveConcurrencyController("test", 1, 8)
+        controller.update(make_results(8), 10, 1.0)
+
+        num_concurrent_processing_tasks = controller.update(make_results(4), 10, 1.0)
+
+        self.assertEqual(num_concurrent_processing_tasks, 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import types
+import unittest
+
+from aptos_protos.aptos.transaction.v1 import transaction_pb2
+
+from processors.merkle_lt.event_decoders import EVENT_DECODERS
+from processors.merkle_lt.models import MerkleGearEquipEvent
+from processors.merkle_lt.processor import MODULE_ADDRESS, MerkleProcessor
+
+EQUIP_EVENT_TYPE = f"{MODULE_ADDRESS}::gear::EquipEvent"
+
+
+def make_transaction(*event_datas: str) -> transaction_pb2.Transaction:
+    transaction = transaction_pb2.Transaction(
+        version=100, type=transaction_pb2.Transaction.TRANSACTION_TYPE_USER
+    )
+    transaction.timestamp.seconds = 1700000000
+    transaction.user.request.sender = "0x1"
+    for event_data in event_datas:
+        event = transaction.user.events.add()
+        event.type_str = EQUIP_EVENT_TYPE
+        event.data = event_data
+        event.key.account_address = "0x2"
+    return transaction
+
+
+class MalformedPayloadTest(unittest.TestCase):
+    def test_decoder_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            EVENT_DECODERS[("gear", "EquipEvent")].decode("{not json", {})
+
+    def test_processor_skips_malformed_event(self):
+        processor = MerkleProcessor(
+            types.SimpleNamespace(debug_event_sample_rate=0.0, db_write_mode="upsert")  # type: ignore
+        )
+        rows_by_model = {}
+        processor.insert_to_db = rows_by_model.update  # type: ignore
+        valid_event_data = json.dumps(
+            {
+                "uid": "1",
+                "user": "0x3",
+                "gear_address": "0x4",
+                "durability": "100",
+            }
+        )
+
+        processor.process_transactions(
+            [make_transaction("{not json", valid_event_data)], 100, 100
+        )
+
+        rows = rows_by_model[MerkleGearEquipEvent]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["event_index"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
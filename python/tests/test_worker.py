@@ -0,0 +1,103 @@
+import asyncio
+import concurrent.futures
+import unittest
+from typing import List
+from unittest import mock
+
+from aptos_protos.aptos.transaction.v1 import transaction_pb2
+from sqlalchemy.exc import OperationalError
+
+from utils import worker
+from utils.transactions_processor import ProcessingResult
+
+
+class DeadlockDetected(Exception):
+    pgcode = "40P01"
+
+
+# Fails the first num_of_failures submissions with a deadlock, then succeeds
+class FlakyBatchExecutor:
+    def __init__(self, num_of_failures: int):
+        self.num_of_failures = num_of_failures
+        self.num_of_submissions = 0
+
+    def submit(
+        self, transactions: List[transaction_pb2.Transaction]
+    ) -> concurrent.futures.Future:
+        self.num_of_submissions += 1
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        if self.num_of_submissions <= self.num_of_failures:
+            future.set_exception(
+                OperationalError("INSERT", {}, DeadlockDetected("deadlock"))
+            )
+        else:
+            future.set_result(
+                ProcessingResult(
+                    start_version=transactions[0].version,
+                    end_version=transactions[-1].version,
+                    processing_duration_in_secs=0.1,
+                    db_insertion_duration_in_secs=0.1,
+                )
+            )
+        return future
+
+
+class RecordingProcessor:
+    def __init__(self):
+        self.checkpoints: List[int] = []
+
+    def update_last_processed_version(self, last_processed_version: int) -> None:
+        self.checkpoints.append(last_processed_version)
+
+    def transaction_filter(self):
+        return None
+
+
+async def run_consumer(
+    batch_executor: FlakyBatchExecutor, processor: RecordingProcessor
+) -> None:
+    q: asyncio.Queue = asyncio.Queue()
+    await q.put(
+        (1, 0, [transaction_pb2.Transaction(version=version) for version in range(10)])
+    )
+    await q.put(worker.END_OF_STREAM)
+    producer_task = asyncio.ensure_future(asyncio.sleep(0))
+    await worker.consumer(
+        q,
+        producer_task,
+        "localhost:50051",
+        processor,
+        1,
+        0,
+        "test",
+        batch_executor,
+        None,
+    )
+
+
+@mock.patch.object(worker, "LOCK_CONTENTION_RETRY_BACKOFF_IN_SECS", 0)
+class ConsumerLockContentionTest(unittest.TestCase):
+    def test_retries_batch_that_lost_a_lock(self):
+        batch_executor = FlakyBatchExecutor(2)
+        processor = RecordingProcessor()
+
+        asyncio.run(run_consumer(batch_executor, processor))
+
+        self.assertEqual(batch_executor.num_of_submissions, 3)
+        self.assertEqual(processor.checkpoints, [9])
+
+    def test_crashes_after_max_retries(self):
+        batch_executor = FlakyBatchExecutor(worker.LOCK_CONTENTION_MAX_RETRIES + 1)
+        processor = RecordingProcessor()
+
+        with mock.patch.object(worker, "flush_logs"), mock.patch.object(
+            worker.os, "_exit", side_effect=SystemExit
+        ) as exit_mock:
+            with self.assertRaises(SystemExit):
+                asyncio.run(run_consumer(batch_executor, processor))
+
+        exit_mock.assert_called_once_with(1)
+        self.assertEqual(
+            batch_executor.num_of_submissions, worker.LOCK_CONTENTION_MAX_RETRIES + 1
+        )
+        self.assertEqual(processor.checkpoints, [])
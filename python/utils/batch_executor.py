@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import queue
+import threading
+import traceback
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, List, Optional, Tuple
+
+from aptos_protos.aptos.indexer.v1 import raw_data_pb2
+from aptos_protos.aptos.transaction.v1 import transaction_pb2
+from utils.metrics import WORKER_BUSY_SECONDS, WORKER_PROCESSED_BATCHES_COUNTER
+from utils.transactions_processor import ProcessingResult
+
+
+# Runs transaction batches on a fixed set of long-lived workers. Every batch resolves a Future with
+# its ProcessingResult, or with the exception that stopped it.
+class BatchExecutor(ABC):
+    @abstractmethod
+    def submit(self, transactions: List[transaction_pb2.Transaction]) -> Future:
+        pass
+
+    @abstractmethod
+    def shutdown(self) -> None:
+        pass
+
+
+def record_worker_busy_time(
+    processor_name: str, worker_id: str, busy_secs: float
+) -> None:
+    WORKER_BUSY_SECONDS.labels(processor_name=processor_name, worker=worker_id).inc(
+        busy_secs
+    )
+    WORKER_PROCESSED_BATCHES_COUNTER.labels(
+        processor_name=processor_name, worker=worker_id
+    ).inc()
+
+
+# Worker threads live for the lifetime of the processor and pull batches from a shared work queue.
+# Processors still open and close a DB session per batch, so what the workers reuse between
+# batches is the engine's pooled connections, not the session.
+class ThreadBatchExecutor(BatchExecutor):
+    def __init__(
+        self,
+        processor_name: str,
+        num_workers: int,
+        task: Callable[[List[transaction_pb2.Transaction]], ProcessingResult],
+    ):
+        self.processor_name = processor_name
+        self.task = task
+        self.work_queue: queue.Queue[
+            Optional[Tuple[List[transaction_pb2.Transaction], Future]]
+        ] = queue.Queue()
+        self.workers = [
+            threading.Thread(
+                target=self.worker_loop,
+                args=(str(worker_index),),
+                name=f"{processor_name}-worker-{worker_index}",
+                daemon=True,
+            )
+            for worker_index in range(num_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, transactions: List[transaction_pb2.Transaction]) -> Future:
+        future: Future = Future()
+        self.work_queue.put((transactions, future))
+        return future
+
+    def worker_loop(self, worker_id: str) -> None:
+        while True:
+            work = self.work_queue.get()
+            # None tells the worker to shut down
+            if work is None:
+                return
+            transactions, future = work
+            start_time = perf_counter()
+            try:
+                future.set_result(self.task(transactions))
+            except Exception as e:
+                traceback.print_exc()
+                future.set_exception(e)
+            record_worker_busy_time(
+                self.processor_name, worker_id, perf_counter() - start_time
+            )
+
+    def shutdown(self) -> None:
+        for _ in self.workers:
+            self.work_queue.put(None)
+        for worker in self.workers:
+            worker.join()
+
+
+# Runs in the worker process. Reports which process ran the batch and for how long, so utilization
+# can be tracked per worker from the parent.
+def run_in_worker_process(
+    task: Callable[[bytes], ProcessingResult], serialized_transactions: bytes
+) -> Tuple[str, float, ProcessingResult]:
+    start_time = perf_counter()
+    processing_result = task(serialized_transactions)
+    return str(os.getpid()), perf_counter() - start_time, processing_result
+
+
+# Worker processes are spawned once and keep their processor and DB engine between batches.
+# Batches are shipped as serialized TransactionsResponse bytes since protobuf messages are much
+# cheaper to send across processes that way.
+class ProcessBatchExecutor(BatchExecutor):
+    def __init__(
+        self,
+        processor_name: str,
+        num_workers: int,
+        task: Callable[[bytes], ProcessingResult],
+        initializer: Callable[..., None],
+        initargs: Tuple[Any, ...],
+    ):
+        self.processor_name = processor_name
+        self.task = task
+        # Spawn rather than fork: the parent already runs grpc and twisted threads
+        self.pool = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initializer,
+            initargs=initargs,
+        )
+
+    def submit(self, transactions: List[transaction_pb2.Transaction]) -> Future:
+        serialized_transactions = raw_data_pb2.TransactionsResponse(
+            transactions=transactions
+        ).SerializeToString()
+        future: Future = Future()
+
+        def on_done(worker_future: Future) -> None:
+            exception = worker_future.exception()
+            if exception is not None:
+                future.set_exception(exception)
+                return
+            worker_id, busy_secs, processing_result = worker_future.result()
+            record_worker_busy_time(self.processor_name, worker_id, busy_secs)
+            future.set_result(processing_result)
+
+        self.pool.submit(
+            run_in_worker_process, self.task, serialized_transactions
+        ).add_done_callback(on_done)
+        return future
+
+    def shutdown(self) -> None:
+        self.pool.shutdown()
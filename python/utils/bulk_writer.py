@@ -0,0 +1,267 @@
+from collections import defaultdict
+import threading
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Type
+import io
+import json
+from sqlalchemy import Table, inspect, literal, select, text
+from sqlalchemy import column as column_clause, table as table_clause
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session as SessionType
+from utils.models.general_models import Base
+
+# Postgres caps a single statement at 65535 bind parameters
+MAX_BIND_PARAMS_PER_STATEMENT = 65535
+# Current state tables carry the version that last touched a row. Older versions never overwrite newer ones.
+LAST_TRANSACTION_VERSION_COLUMN = "last_transaction_version"
+
+
+# Rows written per table by the batch running on the current thread. Batches run on a single
+# thread from parsing to commit, in worker threads and worker processes alike.
+class WrittenRowCounts(threading.local):
+    def __init__(self):
+        self.num_of_rows_by_table: Dict[str, int] = defaultdict(int)
+
+
+written_row_counts = WrittenRowCounts()
+
+
+# Returns the rows written per table on the current thread since the last call, and resets them
+def pop_written_row_counts() -> Dict[str, int]:
+    num_of_rows_by_table = dict(written_row_counts.num_of_rows_by_table)
+    written_row_counts.num_of_rows_by_table.clear()
+    return num_of_rows_by_table
+
+
+# Turns an ORM object into a row dict. Attributes that were never set are left out so that column
+# defaults such as inserted_at still apply.
+def object_to_row(obj: Base) -> Dict[str, Any]:
+    return {
+        column_attr.key: obj.__dict__[column_attr.key]
+        for column_attr in inspect(type(obj)).column_attrs
+        if column_attr.key in obj.__dict__
+    }
+
+
+def group_objects_by_model(
+    objs: Iterable[Base],
+) -> Dict[Type[Base], List[Dict[str, Any]]]:
+    rows_by_model: Dict[Type[Base], List[Dict[str, Any]]] = defaultdict(list)
+    for obj in objs:
+        rows_by_model[type(obj)].append(object_to_row(obj))
+    return rows_by_model
+
+
+# Rows built from ORM objects leave out attributes that were never set, so rows of the same table
+# can bind different columns. Every row of a multi-row INSERT has to bind the same columns, so rows
+# are grouped by their column names, in the order the groups first show up.
+def group_rows_by_column_names(
+    rows: Sequence[Dict[str, Any]]
+) -> Dict[Tuple[str, ...], List[Dict[str, Any]]]:
+    rows_by_column_names: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(
+        list
+    )
+    for row in rows:
+        rows_by_column_names[tuple(sorted(row))].append(row)
+    return rows_by_column_names
+
+
+# A single statement can't touch the same row twice, so keep one row per primary key: the newest one
+# for current state tables, otherwise the last one. Rows come back in primary key order.
+def dedupe_and_sort_rows(
+    table: Table, rows: Sequence[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    primary_key_columns = [column.name for column in table.primary_key.columns]
+    has_last_transaction_version = LAST_TRANSACTION_VERSION_COLUMN in table.columns
+    rows_by_primary_key: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        primary_key = tuple(row[column] for column in primary_key_columns)
+        existing_row = rows_by_primary_key.get(primary_key)
+        if (
+            existing_row is not None
+            and has_last_transaction_version
+            and existing_row[LAST_TRANSACTION_VERSION_COLUMN]
+            > row[LAST_TRANSACTION_VERSION_COLUMN]
+        ):
+            continue
+        rows_by_primary_key[primary_key] = row
+    return [
+        rows_by_primary_key[primary_key] for primary_key in sorted(rows_by_primary_key)
+    ]
+
+
+# Writes ORM objects with one multi-row INSERT ... ON CONFLICT DO UPDATE per table per chunk,
+# instead of a SELECT and an INSERT/UPDATE per object with session.merge.
+def upsert_objects(session: SessionType, objs: Iterable[Base]) -> None:
+    upsert_rows_by_model(session, group_objects_by_model(objs))
+
+
+# Processors on the hot path emit plain row dicts keyed by column name instead of ORM objects,
+# which are much more expensive to construct. The models are then only used for their tables.
+def upsert_rows_by_model(
+    session: SessionType, rows_by_model: Dict[Type[Base], List[Dict[str, Any]]]
+) -> None:
+    # Always lock tables in the same order to avoid deadlocks between concurrent batches
+    for model in sorted(rows_by_model, key=lambda model: model.__table__.fullname):
+        upsert_rows(session, model, rows_by_model[model])
+
+
+# Upserts rows into the model's table, in primary key order to avoid deadlocks between concurrent batches
+def upsert_rows(
+    session: SessionType, model: Type[Base], rows: Sequence[Dict[str, Any]]
+) -> None:
+    if not rows:
+        return
+
+    table = model.__table__
+    primary_key_columns = [column.name for column in table.primary_key.columns]
+    has_last_transaction_version = LAST_TRANSACTION_VERSION_COLUMN in table.columns
+    deduped_rows = dedupe_and_sort_rows(table, rows)
+    written_row_counts.num_of_rows_by_table[table.fullname] += len(deduped_rows)
+
+    # Only the columns a row sets are written and updated, like session.merge did
+    for column_names, column_rows in group_rows_by_column_names(deduped_rows).items():
+        rows_per_chunk = max(MAX_BIND_PARAMS_PER_STATEMENT // len(column_names), 1)
+        for chunk_start in range(0, len(column_rows), rows_per_chunk):
+            insert_stmt = insert(model).values(
+                column_rows[chunk_start : chunk_start + rows_per_chunk]
+            )
+            update_columns = {
+                column_name: insert_stmt.excluded[column_name]
+                for column_name in column_names
+                if column_name not in primary_key_columns
+            }
+            if not update_columns:
+                session.execute(insert_stmt.on_conflict_do_nothing())
+                continue
+            session.execute(
+                insert_stmt.on_conflict_do_update(
+                    index_elements=primary_key_columns,
+                    set_=update_columns,
+                    where=(
+                        insert_stmt.excluded[LAST_TRANSACTION_VERSION_COLUMN]
+                        >= table.c[LAST_TRANSACTION_VERSION_COLUMN]
+                    )
+                    if has_last_transaction_version
+                    else None,
+                )
+            )
+
+
+# Writes ORM objects of append-only tables through COPY, one staging table per target table
+def copy_objects(session: SessionType, objs: Iterable[Base]) -> None:
+    copy_rows_by_model(session, group_objects_by_model(objs))
+
+
+def copy_rows_by_model(
+    session: SessionType, rows_by_model: Dict[Type[Base], List[Dict[str, Any]]]
+) -> None:
+    for model in sorted(rows_by_model, key=lambda model: model.__table__.fullname):
+        copy_rows(session, model, rows_by_model[model])
+
+
+# Streams rows into a temporary staging table with COPY FROM STDIN, then merges them into the
+# model's table with a single INSERT ... SELECT ... ON CONFLICT DO UPDATE. Much faster than
+# multi-row INSERTs for large append-only batches such as event logs.
+def copy_rows(
+    session: SessionType, model: Type[Base], rows: Sequence[Dict[str, Any]]
+) -> None:
+    if not rows:
+        return
+
+    target_table = model.__table__
+    primary_key_columns = [column.name for column in target_table.primary_key.columns]
+    deduped_rows = dedupe_and_sort_rows(target_table, rows)
+    written_row_counts.num_of_rows_by_table[target_table.fullname] += len(deduped_rows)
+    # Every column any row sets, in table order. Rows that leave one out copy NULL into it, and
+    # columns no row sets fall back to their defaults below.
+    row_column_names = set().union(*deduped_rows)
+    column_names = [
+        column.name
+        for column in target_table.columns
+        if column.name in row_column_names
+    ]
+
+    connection = session.connection()
+    preparer = connection.dialect.identifier_preparer
+    schema_translate_map = (
+        connection.get_execution_options().get("schema_translate_map") or {}
+    )
+    schema = schema_translate_map.get(target_table.schema, target_table.schema)
+    qualified_target_name = (
+        f"{preparer.quote_schema(schema)}.{preparer.quote(target_table.name)}"
+        if schema
+        else preparer.quote(target_table.name)
+    )
+    staging_table_name = f"staging_{target_table.name}"
+    quoted_column_names = ", ".join(
+        preparer.quote(column_name) for column_name in column_names
+    )
+
+    # Only the copied columns, without the target's constraints
+    connection.execute(
+        text(
+            f"CREATE TEMP TABLE {preparer.quote(staging_table_name)} ON COMMIT DROP AS "
+            f"SELECT {quoted_column_names} FROM {qualified_target_name} WITH NO DATA"
+        )
+    )
+    csv_buffer = io.StringIO()
+    for row in deduped_rows:
+        csv_buffer.write(
+            ",".join(
+                format_copy_value(row.get(column_name)) for column_name in column_names
+            )
+        )
+        csv_buffer.write("\n")
+    csv_buffer.seek(0)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {preparer.quote(staging_table_name)} ({quoted_column_names}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            csv_buffer,
+        )
+
+    staging_table = table_clause(
+        staging_table_name,
+        *[column_clause(column_name) for column_name in column_names],
+    )
+    # INSERT ... SELECT skips client-side column defaults such as inserted_at, so select them explicitly
+    default_values = {
+        column.name: column.default.arg
+        if column.default.is_clause_element
+        else literal(column.default.arg)
+        for column in target_table.columns
+        if column.name not in column_names
+        and column.default is not None
+        and (column.default.is_clause_element or column.default.is_scalar)
+    }
+    insert_stmt = insert(model).from_select(
+        column_names + list(default_values),
+        select(*staging_table.c, *default_values.values()).order_by(
+            *[staging_table.c[column_name] for column_name in primary_key_columns]
+        ),
+    )
+    update_columns = {
+        column_name: insert_stmt.excluded[column_name]
+        for column_name in column_names
+        if column_name not in primary_key_columns
+    }
+    if update_columns:
+        session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=primary_key_columns, set_=update_columns
+            )
+        )
+    else:
+        session.execute(insert_stmt.on_conflict_do_nothing())
+    # Dropped right away so the same table can be copied into again in this transaction
+    connection.execute(text(f"DROP TABLE {preparer.quote(staging_table_name)}"))
+
+
+# Formats one CSV field for COPY. An unquoted empty field is NULL, and every other value is quoted so
+# that empty strings stay empty strings.
+def format_copy_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
@@ -0,0 +1,132 @@
+import logging
+from typing import List, Optional
+from sqlalchemy.exc import DBAPIError
+from utils.metrics import CONCURRENT_PROCESSING_TASKS
+from utils.transactions_processor import ProcessingResult
+
+# Postgres error codes raised when concurrent batches contend on the same rows:
+# deadlock_detected, lock_not_available and serialization_failure
+LOCK_CONTENTION_PGCODES = {"40P01", "55P03", "40001"}
+# Throughput has to move by more than this fraction before we treat it as a real change
+THROUGHPUT_CHANGE_TOLERANCE = 0.05
+# If more than this share of batch time is spent writing, a throughput drop is blamed on the DB
+DB_SATURATION_SHARE = 0.5
+# Weight of the latest window when smoothing throughput at a fixed concurrency
+THROUGHPUT_SMOOTHING_FACTOR = 0.5
+
+
+def is_lock_contention_error(e: BaseException) -> bool:
+    if isinstance(e, DBAPIError):
+        return getattr(e.orig, "pgcode", None) in LOCK_CONTENTION_PGCODES
+    return False
+
+
+# Picks how many transaction batches to process concurrently, starting from the configured maximum.
+# After every window of batches it compares throughput against the previous windows. While there
+# is queued work and throughput holds up, it probes one more batch at a time. It halves the
+# concurrency when throughput drops while the DB dominates batch time, or on Postgres lock
+# contention.
+class AdaptiveConcurrencyController:
+    def __init__(
+        self,
+        processor_name: str,
+        min_concurrent_processing_tasks: int,
+        max_concurrent_processing_tasks: int,
+    ):
+        assert (
+            1 <= min_concurrent_processing_tasks <= max_concurrent_processing_tasks
+        ), "[Parser] Invalid concurrency bounds"
+        self.processor_name = processor_name
+        self.min_concurrent_processing_tasks = min_concurrent_processing_tasks
+        self.max_concurrent_processing_tasks = max_concurrent_processing_tasks
+        self.num_concurrent_processing_tasks = max_concurrent_processing_tasks
+        self.smoothed_throughput: Optional[float] = None
+        self.num_lock_errors = 0
+        CONCURRENT_PROCESSING_TASKS.labels(processor_name=processor_name).set(
+            self.num_concurrent_processing_tasks
+        )
+
+    # Called whenever a batch failed because it couldn't get a lock on its rows
+    def record_lock_error(self) -> None:
+        self.num_lock_errors += 1
+
+    # Called after about one window of batches has finished. Returns the concurrency to use next.
+    def update(
+        self,
+        processing_results: List[ProcessingResult],
+        queue_size: int,
+        duration_in_secs: float,
+    ) -> int:
+        num_of_transactions = sum(
+            result.end_version - result.start_version + 1
+            for result in processing_results
+        )
+        throughput = num_of_transactions / max(duration_in_secs, 1e-9)
+        processing_duration_in_secs = sum(
+            result.processing_duration_in_secs for result in processing_results
+        )
+        db_insertion_duration_in_secs = sum(
+            result.db_insertion_duration_in_secs for result in processing_results
+        )
+        total_duration_in_secs = (
+            processing_duration_in_secs + db_insertion_duration_in_secs
+        )
+        db_share = (
+            db_insertion_duration_in_secs / total_duration_in_secs
+            if total_duration_in_secs > 0
+            else 0.0
+        )
+
+        previous = self.num_concurrent_processing_tasks
+        reason = None
+        if self.num_lock_errors > 0:
+            self.set_concurrency(previous // 2)
+            reason = "lock_contention"
+        elif self.smoothed_throughput is None or queue_size == 0:
+            # Either there's no baseline yet, or the stream isn't keeping up with us and there's
+            # nothing to gain from more concurrent batches
+            pass
+        elif throughput < self.smoothed_throughput * (1 - THROUGHPUT_CHANGE_TOLERANCE):
+            # Only back off when the drop comes from the DB, otherwise it isn't ours to fix
+            if db_share > DB_SATURATION_SHARE:
+                self.set_concurrency(previous // 2)
+                reason = "db_saturated"
+        else:
+            self.set_concurrency(previous + 1)
+            reason = "probe"
+
+        if self.num_concurrent_processing_tasks != previous:
+            # Start measuring the new concurrency from this window's throughput
+            self.smoothed_throughput = throughput
+            logging.info(
+                "[Parser] Adjusted number of concurrent processing tasks",
+                extra={
+                    "processor_name": self.processor_name,
+                    "service_type": "processor",
+                    "previous_num_concurrent_processing_tasks": previous,
+                    "num_concurrent_processing_tasks": self.num_concurrent_processing_tasks,
+                    "reason": reason,
+                    "throughput": str(format(throughput, ".2f")),
+                    "db_share": str(format(db_share, ".4f")),
+                    "channel_size": queue_size,
+                    "num_lock_errors": self.num_lock_errors,
+                },
+            )
+        elif self.smoothed_throughput is None:
+            self.smoothed_throughput = throughput
+        else:
+            self.smoothed_throughput = (
+                THROUGHPUT_SMOOTHING_FACTOR * throughput
+                + (1 - THROUGHPUT_SMOOTHING_FACTOR) * self.smoothed_throughput
+            )
+        self.num_lock_errors = 0
+        return self.num_concurrent_processing_tasks
+
+    def set_concurrency(self, num_concurrent_processing_tasks: int) -> None:
+        self.num_concurrent_processing_tasks = min(
+            max(num_concurrent_processing_tasks, self.min_concurrent_processing_tasks),
+            self.max_concurrent_processing_tasks,
+        )
+        CONCURRENT_PROCESSING_TASKS.labels(processor_name=self.processor_name).set(
+            self.num_concurrent_processing_tasks
+        )
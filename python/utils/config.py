@@ -5,10 +5,29 @@ from pydantic.env_settings import SettingsSourceCallable
 from utils.session import Session
 from typing import Any, Dict, List, Optional
 import logging
+from enum import Enum
+
+
+class ExecutionMode(Enum):
+    # Process batches on threads in the main process
+    THREAD = "thread"
+    # Parse and write batches in a pool of worker processes, sidestepping the GIL
+    PROCESS = "process"
+
+
+class DBWriteMode(Enum):
+    # Multi-row INSERT ... ON CONFLICT DO UPDATE
+    UPSERT = "upsert"
+    # COPY into a staging table, then INSERT ... SELECT ... ON CONFLICT. Only used for append-only tables.
+    COPY = "copy"
 
 
 class ProcessorConfig(BaseModel):
     type: str
+    # How append-only tables are written, one of "upsert" or "copy"
+    db_write_mode: str = DBWriteMode.UPSERT.value
+    # Fraction of parsed events traced one by one when the log level is DEBUG. 0 turns tracing off
+    debug_event_sample_rate: float = 0.0
 
 
 class NFTMarketplaceV2Config(ProcessorConfig):
@@ -27,6 +46,22 @@ class ServerConfig(BaseModel):
     indexer_grpc_http2_ping_interval_in_secs: int = 30
     # HTTP2 ping timeout in seconds to detect if the connection is still alive
     indexer_grpc_http2_ping_timeout_in_secs: int = 10
+    # How batches are executed, one of "thread" or "process"
+    execution_mode: str = ExecutionMode.THREAD.value
+    # Number of transaction batches processed concurrently. Upper bound when adaptive_concurrency is on
+    num_concurrent_processing_tasks: int = 10
+    # Tune the number of concurrent batches at runtime based on throughput and DB contention
+    adaptive_concurrency: bool = False
+    # Lower bound for the number of concurrent batches when adaptive_concurrency is on
+    min_concurrent_processing_tasks: int = 1
+    # Number of concurrent GRPC streams used to backfill when ending_version is set
+    num_backfill_streams: int = 1
+    # Number of versions fetched by one backfill stream before it moves on to another shard
+    backfill_shard_size: int = 1_000_000
+    # Most "[Parser]" records below WARNING logged per message per interval. 0 turns rate limiting off
+    max_parser_log_records_per_interval: int = 0
+    # Interval of the "[Parser]" log rate limit, in seconds
+    parser_log_interval_in_secs: float = 1.0
 
 
 class Config(BaseSettings):
@@ -0,0 +1,32 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.general_utils import standardize_address
+
+
+# Every way the same module address can be written in an event type string that still
+# standardizes to it: with or without the 0x prefix, and with any number of leading zeros.
+def get_address_variants(address: str) -> List[str]:
+    address_hex = standardize_address(address).removeprefix("0x")
+    short_address_hex = address_hex.lstrip("0") or "0"
+    return [
+        prefix + short_address_hex.zfill(length)
+        for length in range(len(short_address_hex), len(address_hex) + 1)
+        for prefix in ("0x", "")
+    ]
+
+
+# Matches event type strings against a fixed set of (module address, module name, event name)
+# entries. The accepted type strings are precomputed once, so matching an event is a single
+# hash lookup instead of splitting and standardizing its type string.
+class EventTypeFilter:
+    def __init__(self, event_types: Iterable[Tuple[str, str, str]]):
+        self.event_names_by_type_str: Dict[str, Tuple[str, str]] = {}
+        for module_address, module_name, event_name in event_types:
+            for address_variant in get_address_variants(module_address):
+                self.event_names_by_type_str[
+                    f"{address_variant}::{module_name}::{event_name}"
+                ] = (module_name, event_name)
+
+    # Returns the (module name, event name) of a matching event type, or None
+    def match(self, event_type: str) -> Optional[Tuple[str, str]]:
+        return self.event_names_by_type_str.get(event_type)
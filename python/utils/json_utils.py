@@ -0,0 +1,30 @@
+import json
+from typing import Any, Callable
+
+# Event and table item payloads are decoded with the fastest JSON library that's installed. orjson
+# and msgspec are optional, the stdlib decoder is the fallback. All of them take str or bytes.
+# orjson only handles 64-bit integers, which is fine since Move serializes u64 and wider as strings.
+# Like json.loads, every backend raises ValueError on invalid input.
+loads: Callable[[str | bytes], Any]
+try:
+    import orjson
+
+    JSON_BACKEND = "orjson"
+    loads = orjson.loads
+except ImportError:
+    try:
+        import msgspec
+
+        JSON_BACKEND = "msgspec"
+
+        # msgspec's errors aren't ValueErrors
+        def decode_with_msgspec(data: str | bytes) -> Any:
+            try:
+                return msgspec.json.decode(data)
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+
+        loads = decode_with_msgspec
+    except ImportError:
+        JSON_BACKEND = "json"
+        loads = json.loads
@@ -21,8 +21,19 @@ The resulting log message will be in JSON format:
     }
 """
 
+import atexit
 import logging
 import json
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from time import monotonic
+from typing import Dict, List, Optional
+
+# Messages logged for every transaction batch start with this prefix
+PARSER_LOG_PREFIX = "[Parser]"
+# Records written to stdout with a single write and flush
+MAX_RECORDS_PER_WRITE = 1000
 
 
 class CustomLogger(logging.Logger):
@@ -72,3 +83,146 @@ class JsonFormatter(logging.Formatter):
             "line_no": record.lineno,
         }
         return json.dumps(log_data)
+
+
+# Lets at most max_records_per_interval records with the same message through per interval, and
+# drops the rest before they're queued. Only applies to "[Parser]" records below WARNING, which
+# are logged for every batch. The first record let through in the next interval reports how many
+# records were dropped.
+class ParserRateLimitFilter(logging.Filter):
+    def __init__(self, max_records_per_interval: int, interval_in_secs: float):
+        super().__init__()
+        self.max_records_per_interval = max_records_per_interval
+        self.interval_in_secs = interval_in_secs
+        # Message -> [interval start, records let through, records dropped]
+        self.intervals: Dict[str, List] = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if (
+            record.levelno >= logging.WARNING
+            or not isinstance(record.msg, str)
+            or not record.msg.startswith(PARSER_LOG_PREFIX)
+        ):
+            return True
+
+        now = monotonic()
+        with self.lock:
+            interval = self.intervals.get(record.msg)
+            if interval is None or now - interval[0] >= self.interval_in_secs:
+                num_of_dropped_records = interval[2] if interval else 0
+                self.intervals[record.msg] = [now, 1, 0]
+            elif interval[1] < self.max_records_per_interval:
+                num_of_dropped_records = 0
+                interval[1] += 1
+            else:
+                interval[2] += 1
+                return False
+
+        if num_of_dropped_records:
+            record.fields = {
+                **record.__dict__.get("fields", {}),
+                "num_of_dropped_records": num_of_dropped_records,
+            }
+        return True
+
+
+# Hands records to the background writer without formatting them. Only the message arguments are
+# merged in on the calling thread, since they may be mutated afterwards. JsonFormatter never
+# writes exc_info, so it's dropped instead of formatting the traceback.
+class JsonQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+
+# Drains the log queue on a background thread. Every record that piled up since the last write is
+# formatted and written to the stream at once, with a single flush.
+class BatchingQueueListener(QueueListener):
+    def _monitor(self) -> None:
+        while True:
+            records = [self.dequeue(True)]
+            while len(records) < MAX_RECORDS_PER_WRITE:
+                try:
+                    records.append(self.dequeue(False))
+                except queue.Empty:
+                    break
+
+            is_stopping = any(record is self._sentinel for record in records)
+            self.write_records(
+                [record for record in records if record is not self._sentinel]
+            )
+            if is_stopping:
+                break
+
+    def write_records(self, records: List[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            lines = []
+            for record in records:
+                if self.respect_handler_level and record.levelno < handler.level:
+                    continue
+                try:
+                    lines.append(handler.format(record))
+                except Exception:
+                    handler.handleError(record)
+            if not lines:
+                continue
+
+            handler.acquire()
+            try:
+                handler.stream.write("\n".join(lines) + handler.terminator)
+                handler.flush()
+            except Exception:
+                handler.handleError(records[-1])
+            finally:
+                handler.release()
+
+
+# Background writer of the current process, started by configure_logger
+queue_listener: Optional[BatchingQueueListener] = None
+
+
+# Writes out every queued record and stops the background writer. Runs at exit, and has to be
+# called before os._exit, which skips atexit hooks.
+def flush_logs() -> None:
+    global queue_listener
+    if queue_listener is not None:
+        queue_listener.stop()
+        queue_listener = None
+
+
+# Configure the root logger to emit JSON to stdout. Called by the main entrypoint and by every
+# worker process, since spawned processes don't inherit the parent's logging setup.
+# Logging threads only put records on a queue; formatting and writing happen on a background
+# thread, which is stopped and drained at exit. Repetitive "[Parser]" records can be rate limited to
+# max_parser_records_per_interval per message per interval. Rate limiting is off by default (0).
+def configure_logger(
+    max_parser_records_per_interval: int = 0,
+    parser_log_interval_in_secs: float = 1.0,
+) -> None:
+    logger = CustomLogger("default_python_logger")
+    logger.setLevel(logging.INFO)
+
+    # Create a stream handler for stdout, only used by the background writer
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = JsonQueueHandler(log_queue)
+    if max_parser_records_per_interval > 0:
+        queue_handler.addFilter(
+            ParserRateLimitFilter(
+                max_parser_records_per_interval, parser_log_interval_in_secs
+            )
+        )
+    global queue_listener
+    queue_listener = BatchingQueueListener(log_queue, stream_handler)
+    queue_listener.start()
+    atexit.register(flush_logs)
+
+    # Add the queue handler to the logger
+    logger.addHandler(queue_handler)
+    logging.root = logger
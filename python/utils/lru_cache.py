@@ -0,0 +1,42 @@
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+# Bounded cache of current state rows that evicts the least recently used entry once it's full.
+# Every entry remembers the last transaction version that wrote it, and like the upserts of current
+# state tables, an older version never replaces a newer one. Shared by worker threads, so every
+# access takes the lock. A max_size of 0 turns the cache off.
+class VersionedLRUCache(Generic[V]):
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict[Hashable, Tuple[int, V]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, last_transaction_version: int, value: V) -> None:
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > last_transaction_version:
+                return
+            self.entries[key] = (last_transaction_version, value)
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def resize(self, max_size: int) -> None:
+        with self.lock:
+            self.max_size = max_size
+            while len(self.entries) > max(max_size, 0):
+                self.entries.popitem(last=False)
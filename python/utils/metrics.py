@@ -1,4 +1,7 @@
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
+
+# Batches range from a few KiB when caught up to hundreds of MiB during backfills
+BATCH_SIZE_IN_BYTES_BUCKETS = [16 * 1024 * 4**exponent for exponent in range(9)]
 
 PROCESSED_TRANSACTIONS_COUNTER = Counter(
     "indexer_processor_processed_transactions",
@@ -11,3 +14,98 @@ LATEST_PROCESSED_VERSION = Gauge(
     "Latest processed version",
     ["processor_name"],
 )
+
+CONCURRENT_PROCESSING_TASKS = Gauge(
+    "indexer_processor_concurrent_processing_tasks",
+    "Number of transaction batches processed concurrently",
+    ["processor_name"],
+)
+
+# rate() of this gives the utilization of each worker
+WORKER_BUSY_SECONDS = Counter(
+    "indexer_processor_worker_busy_seconds",
+    "Seconds each worker spent processing transaction batches",
+    ["processor_name", "worker"],
+)
+
+WORKER_PROCESSED_BATCHES_COUNTER = Counter(
+    "indexer_processor_worker_processed_batches",
+    "Number of transaction batches processed by each worker",
+    ["processor_name", "worker"],
+)
+
+# rate() of skipped over rate() of filtered transactions gives the skip ratio
+FILTERED_TRANSACTIONS_COUNTER = Counter(
+    "indexer_processor_filtered_transactions",
+    "Number of transactions checked by the processor's transaction filter",
+    ["processor_name"],
+)
+
+SKIPPED_TRANSACTIONS_COUNTER = Counter(
+    "indexer_processor_skipped_transactions",
+    "Number of transactions skipped by the processor's transaction filter",
+    ["processor_name"],
+)
+
+TRANSACTION_SKIP_RATIO = Gauge(
+    "indexer_processor_transaction_skip_ratio",
+    "Share of transactions skipped by the transaction filter in the latest processed batches",
+    ["processor_name"],
+)
+
+# Pipeline stages, in the order a batch goes through them
+FETCH_DURATION_IN_SECS = Histogram(
+    "indexer_processor_fetch_duration_in_secs",
+    "Time spent waiting for one batch of transactions from the GRPC stream",
+    ["processor_name"],
+)
+
+FETCHED_BATCH_SIZE_IN_BYTES = Histogram(
+    "indexer_processor_fetched_batch_size_in_bytes",
+    "Size of the batches of transactions received from the GRPC stream",
+    ["processor_name"],
+    buckets=BATCH_SIZE_IN_BYTES_BUCKETS,
+)
+
+CHANNEL_SIZE = Gauge(
+    "indexer_processor_channel_size",
+    "Number of fetched batches waiting to be processed",
+    ["processor_name"],
+)
+
+IN_FLIGHT_BATCHES = Gauge(
+    "indexer_processor_in_flight_batches",
+    "Number of batches handed to workers that haven't been checkpointed yet",
+    ["processor_name"],
+)
+
+PROCESSING_DURATION_IN_SECS = Histogram(
+    "indexer_processor_processing_duration_in_secs",
+    "Time spent parsing one batch of transactions",
+    ["processor_name"],
+)
+
+DB_INSERTION_DURATION_IN_SECS = Histogram(
+    "indexer_processor_db_insertion_duration_in_secs",
+    "Time spent writing the rows of one batch of transactions",
+    ["processor_name"],
+)
+
+# From the batch being handed to a worker until it's checkpointed, including the wait for earlier batches
+BATCH_LATENCY_IN_SECS = Histogram(
+    "indexer_processor_batch_latency_in_secs",
+    "Time from dispatching a batch of transactions to checkpointing it",
+    ["processor_name"],
+)
+
+CHECKPOINT_DURATION_IN_SECS = Histogram(
+    "indexer_processor_checkpoint_duration_in_secs",
+    "Time spent saving the latest processed version",
+    ["processor_name"],
+)
+
+WRITTEN_ROWS_COUNTER = Counter(
+    "indexer_processor_written_rows",
+    "Number of rows written to each table",
+    ["processor_name", "table_name"],
+)
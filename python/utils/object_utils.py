@@ -2,6 +2,8 @@ from utils.general_utils import standardize_address
 from typing import Optional
 from typing_extensions import TypedDict
 
+OBJECT_CORE_TYPE = "0x1::object::ObjectCore"
+
 
 class ObjectCore(TypedDict):
     allow_ungated_transfer: bool
@@ -10,7 +12,7 @@ class ObjectCore(TypedDict):
 
 
 def get_object_core(move_resource_type: str, data: dict) -> Optional[ObjectCore]:
-    if move_resource_type != "0x1::object::ObjectCore":
+    if move_resource_type != OBJECT_CORE_TYPE:
         return None
 
     return {
@@ -0,0 +1,36 @@
+from typing import Iterable
+
+from aptos_protos.aptos.transaction.v1 import transaction_pb2
+from utils.event_filter import get_address_variants
+
+
+# Cheap check a processor runs on a whole transaction before looking at it in detail. It only
+# keeps user transactions that emit an event from one of the contract addresses, or write to one of
+# the table handles, the processor declared. Everything else can't produce any rows and is skipped.
+class TransactionFilter:
+    def __init__(
+        self, contract_addresses: Iterable[str], table_handles: Iterable[str] = ()
+    ):
+        # str.startswith with a tuple checks every prefix without splitting the type string
+        self.event_type_prefixes = tuple(
+            f"{address_variant}::"
+            for contract_address in contract_addresses
+            for address_variant in get_address_variants(contract_address)
+        )
+        self.table_handles = frozenset(table_handles)
+
+    def includes(self, transaction: transaction_pb2.Transaction) -> bool:
+        if transaction.type != transaction_pb2.Transaction.TRANSACTION_TYPE_USER:
+            return False
+        for event in transaction.user.events:
+            if event.type_str.startswith(self.event_type_prefixes):
+                return True
+        if self.table_handles:
+            for write_set_change in transaction.info.changes:
+                if (
+                    write_set_change.type
+                    == transaction_pb2.WriteSetChange.TYPE_WRITE_TABLE_ITEM
+                    and write_set_change.write_table_item.handle in self.table_handles
+                ):
+                    return True
+        return False
@@ -2,13 +2,15 @@ import argparse
 import grpc
 import json
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from utils.models.general_models import NextVersionToProcess
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
 from utils.config import Config
 from utils.models.general_models import Base
 from utils.session import Session
+from utils.transaction_filter import TransactionFilter
 from abc import ABC, abstractmethod
+from typing import Dict, Optional
 from sqlalchemy.dialects.postgresql import insert
 
 
@@ -18,6 +20,10 @@ class ProcessingResult:
     end_version: int
     processing_duration_in_secs: float
     db_insertion_duration_in_secs: float
+    # Transactions of the batch that the processor's transaction filter skipped
+    num_of_skipped_transactions: int = 0
+    # Rows the bulk writers wrote for the batch, by table name
+    num_of_written_rows_by_table: Dict[str, int] = field(default_factory=dict)
 
 
 class TransactionsProcessor(ABC):
@@ -35,6 +41,11 @@ class TransactionsProcessor(ABC):
     def schema(self) -> str:
         pass
 
+    # Transactions that don't pass this filter are skipped before `process_transactions` sees them.
+    # Processors that only care about a few contracts should return one.
+    def transaction_filter(self) -> Optional[TransactionFilter]:
+        return None
+
     # Process all transactions within a block and processes it.
     # This method will be called from `process_transaction_with_status`
     # In case a transaction cannot be processed, we will fail the entire block.
@@ -1,25 +1,45 @@
-import argparse
 import grpc
-import json
 
 from aptos_protos.aptos.indexer.v1 import raw_data_pb2, raw_data_pb2_grpc
 from aptos_protos.aptos.transaction.v1 import transaction_pb2
-from utils.config import Config, NFTMarketplaceV2Config
+from utils.batch_executor import (
+    BatchExecutor,
+    ProcessBatchExecutor,
+    ThreadBatchExecutor,
+)
+from utils.concurrency import AdaptiveConcurrencyController, is_lock_contention_error
+from utils.config import Config, ExecutionMode, NFTMarketplaceV2Config
+from utils.logging import configure_logger, flush_logs
 from utils.models.general_models import Base
 from utils.session import Session
-from utils.metrics import PROCESSED_TRANSACTIONS_COUNTER, LATEST_PROCESSED_VERSION
-from sqlalchemy import DDL, create_engine
+from utils.bulk_writer import pop_written_row_counts
+from utils.metrics import (
+    BATCH_LATENCY_IN_SECS,
+    CHANNEL_SIZE,
+    CHECKPOINT_DURATION_IN_SECS,
+    DB_INSERTION_DURATION_IN_SECS,
+    FETCH_DURATION_IN_SECS,
+    FETCHED_BATCH_SIZE_IN_BYTES,
+    FILTERED_TRANSACTIONS_COUNTER,
+    IN_FLIGHT_BATCHES,
+    LATEST_PROCESSED_VERSION,
+    PROCESSED_TRANSACTIONS_COUNTER,
+    PROCESSING_DURATION_IN_SECS,
+    SKIPPED_TRANSACTIONS_COUNTER,
+    TRANSACTION_SKIP_RATIO,
+    WRITTEN_ROWS_COUNTER,
+)
+from sqlalchemy import DDL, Engine, create_engine
 from sqlalchemy import event
-from typing import Iterator, List, Optional
+from typing import AsyncIterator, Deque, List, Optional, Tuple
 from prometheus_client.twisted import MetricsResource
 from twisted.web.server import Site
 from twisted.web.resource import Resource
 from twisted.internet import reactor
 import threading
-import sys
+from utils.transaction_filter import TransactionFilter
 from utils.transactions_processor import TransactionsProcessor, ProcessingResult
-from time import perf_counter, sleep
-import traceback
+from time import perf_counter
 from utils.processor_name import ProcessorName
 from processors.example_event_processor.processor import ExampleEventProcessor
 from processors.nft_orderbooks.nft_marketplace_processor import NFTMarketplaceProcesser
@@ -27,9 +47,11 @@ from processors.nft_marketplace_v2.processor import NFTMarketplaceV2Processor
 from processors.coin_flip.processor import CoinFlipProcessor
 from processors.aptos_ambassador_token.processor import AptosAmbassadorTokenProcessor
 from processors.merkle_lt.processor import MerkleProcessor
+from collections import deque
+from dataclasses import dataclass
 import asyncio
 import logging
-import queue
+import functools
 import os
 
 INDEXER_GRPC_BLOB_STORAGE_SIZE = 1000
@@ -41,9 +63,206 @@ FETCHER_QUEUE_SIZE = 50
 MIN_SEC_BETWEEN_GRPC_RECONNECTS = 15
 # We will try to reconnect to GRPC 5 times in case upstream connection is being updated
 RECONNECTION_MAX_RETRIES = 5
+# A batch that loses a lock to a concurrent batch is retried this many times before we crash
+LOCK_CONTENTION_MAX_RETRIES = 5
+# Wait before the first retry of such a batch, doubled on every further retry
+LOCK_CONTENTION_RETRY_BACKOFF_IN_SECS = 0.5
 
 PROCESSOR_SERVICE_TYPE = "processor"
 
+# Sent by the producer after its last batch. Nothing else is sent on the channel afterwards.
+END_OF_STREAM = None
+
+# Processor owned by the current worker process. Only set in process execution mode.
+worker_process_processor: Optional[TransactionsProcessor] = None
+
+
+# Instantiate the correct processor based on config
+def get_processor(config: Config) -> TransactionsProcessor:
+    processor_config = config.server_config.processor_config
+    match processor_config.type:
+        case ProcessorName.EXAMPLE_EVENT_PROCESSOR.value:
+            return ExampleEventProcessor()
+        case ProcessorName.NFT_MARKETPLACE_V1_PROCESSOR.value:
+            # Worker processes don't see each other's writes, so they can't share lookup caches
+            return NFTMarketplaceProcesser(
+                processor_config,
+                use_lookup_cache=config.server_config.execution_mode
+                != ExecutionMode.PROCESS.value,
+            )
+        case ProcessorName.NFT_MARKETPLACE_V2_PROCESSOR.value:
+            assert isinstance(processor_config, NFTMarketplaceV2Config)
+            return NFTMarketplaceV2Processor(processor_config)
+        case ProcessorName.COIN_FLIP.value:
+            return CoinFlipProcessor()
+        case ProcessorName.EXAMPLE_AMBASSADOR_TOKEN_PROCESSOR.value:
+            return AptosAmbassadorTokenProcessor()
+        case ProcessorName.MERKLE_PROCESSOR.value:
+            return MerkleProcessor(processor_config)
+        case _:
+            raise Exception(
+                "Invalid processor name"
+                "\n[ERROR]: The specified processor name was invalid or not found.\n"
+                "         - If you are using a custom processor, make sure to add it to the ProcessorName enum in utils/processor_name.py.\n"
+                "         - Ensure the get_processor function in utils/worker.py uses the new enum value.\n"
+            )
+
+
+# Bind the global Session to an engine that writes into the processor's schema. The pool should
+# hold a connection for every worker thread so that each one keeps reusing its own.
+def init_db_session(
+    postgres_connection_string: str, schema_name: str, pool_size: int = 5
+) -> Engine:
+    engine = create_engine(postgres_connection_string, pool_size=pool_size)
+    engine = engine.execution_options(schema_translate_map={"per_schema": schema_name})
+    Session.configure(bind=engine)
+    return engine
+
+
+def log_processing_result(
+    processor_name: str,
+    processing_result: ProcessingResult,
+    size_in_bytes: int,
+) -> None:
+    start_version = processing_result.start_version
+    end_version = processing_result.end_version
+    num_of_transactions = str(end_version - start_version + 1)
+    start_version_str = str(start_version)
+    end_version_str = str(end_version)
+    processing_duration_in_secs = format(
+        processing_result.processing_duration_in_secs, ".8f"
+    )
+    db_insertion_duration_in_secs = format(
+        processing_result.db_insertion_duration_in_secs, ".8f"
+    )
+    duration_in_secs = format(
+        processing_result.processing_duration_in_secs
+        + processing_result.db_insertion_duration_in_secs,
+        ".8f",
+    )
+    logging.info(
+        "[Parser] DB insertion time of one batch of transactions",
+        extra={
+            "processor_name": processor_name,
+            "start_version": start_version_str,
+            "end_version": end_version_str,
+            "service_type": PROCESSOR_SERVICE_TYPE,
+            "num_of_transactions": num_of_transactions,
+            "duration_in_secs": db_insertion_duration_in_secs,
+            "size_in_bytes": str(size_in_bytes),
+        },
+    )
+    logging.info(
+        "[Parser] Parsing time of one batch of transactions",
+        extra={
+            "processor_name": processor_name,
+            "start_version": start_version_str,
+            "end_version": end_version_str,
+            "service_type": PROCESSOR_SERVICE_TYPE,
+            "num_of_transactions": num_of_transactions,
+            "duration_in_secs": processing_duration_in_secs,
+            "size_in_bytes": str(size_in_bytes),
+        },
+    )
+    logging.info(
+        "[Parser] Processor finished processing one batch of transaction",
+        extra={
+            "processor_name": processor_name,
+            "start_version": start_version_str,
+            "end_version": end_version_str,
+            "service_type": PROCESSOR_SERVICE_TYPE,
+            "num_of_transactions": num_of_transactions,
+            "processing_duration_in_secs": processing_duration_in_secs,
+            "db_insertion_duration_in_secs": db_insertion_duration_in_secs,
+            "duration_in_secs": duration_in_secs,
+            "size_in_bytes": str(size_in_bytes),
+            "step": "2",
+        },
+    )
+
+
+# Runs once in every worker process of the process pool. Each worker builds its own processor
+# and its own DB engine, so parsing and DB writes happen entirely inside the worker.
+def init_worker_process(config: Config) -> None:
+    global worker_process_processor
+    configure_logger(
+        config.server_config.max_parser_log_records_per_interval,
+        config.server_config.parser_log_interval_in_secs,
+    )
+    worker_process_processor = get_processor(config)
+    init_db_session(
+        config.server_config.postgres_connection_string,
+        worker_process_processor.schema(),
+    )
+
+
+# Runs one batch of transactions through the processor and logs how long it took
+def process_transaction_batch(
+    processor: TransactionsProcessor, transactions: List[transaction_pb2.Transaction]
+) -> ProcessingResult:
+    start_version = transactions[0].version
+    end_version = transactions[-1].version
+    # The producer may already have dropped transactions in between, so count the version range
+    num_of_transactions = end_version - start_version + 1
+
+    start_time = perf_counter()
+    transaction_filter = processor.transaction_filter()
+    if transaction_filter is not None:
+        transactions = [
+            transaction
+            for transaction in transactions
+            if transaction_filter.includes(transaction)
+        ]
+    filtering_duration_in_secs = perf_counter() - start_time
+
+    # Drop counts left over from a batch that failed on this thread
+    pop_written_row_counts()
+    processing_result = processor.process_transactions(
+        transactions, start_version, end_version
+    )
+    processing_result.num_of_written_rows_by_table = pop_written_row_counts()
+    processing_result.processing_duration_in_secs += filtering_duration_in_secs
+    processing_result.num_of_skipped_transactions = num_of_transactions - len(
+        transactions
+    )
+    log_processing_result(
+        processor.name(),
+        processing_result,
+        sum(obj.ByteSize() for obj in transactions),
+    )
+    return processing_result
+
+
+# Entry point of a process pool task, run with the processor owned by the worker process
+def process_serialized_transactions(serialized_transactions: bytes) -> ProcessingResult:
+    assert (
+        worker_process_processor is not None
+    ), "[Parser] Worker process was not initialized"
+    transactions = raw_data_pb2.TransactionsResponse.FromString(
+        serialized_transactions
+    ).transactions
+    return process_transaction_batch(worker_process_processor, transactions)
+
+
+# Drops the transactions the processor's filter doesn't need before a batch is queued. The first and
+# last transactions are always kept so the batch still spans its whole version range, and the
+# checkpoint moves past the skipped ones. Kept transactions are copied into a new response, since
+# with upb holding on to any of them would keep the whole original response alive.
+def filter_transactions_response(
+    response: raw_data_pb2.TransactionsResponse, transaction_filter: TransactionFilter
+) -> raw_data_pb2.TransactionsResponse:
+    last_index = len(response.transactions) - 1
+    return raw_data_pb2.TransactionsResponse(
+        transactions=[
+            transaction
+            for index, transaction in enumerate(response.transactions)
+            if index == 0
+            or index == last_index
+            or transaction_filter.includes(transaction)
+        ],
+        chain_id=response.chain_id,
+    )
+
 
 def get_grpc_stream(
     indexer_grpc_data_service_address: str,
@@ -53,7 +272,7 @@ def get_grpc_stream(
     starting_version: int,
     ending_version: Optional[int],
     processor_name: str,
-) -> Iterator[raw_data_pb2.TransactionsResponse]:
+) -> AsyncIterator[raw_data_pb2.TransactionsResponse]:
     logging.info(
         "[Parser] Setting up rpc channel",
         extra={
@@ -79,7 +298,7 @@ def get_grpc_stream(
         ),
     ]
 
-    channel = grpc.secure_channel(
+    channel = grpc.aio.secure_channel(
         indexer_grpc_data_service_address,
         options=options,
         credentials=grpc.ssl_channel_credentials(),
@@ -106,11 +325,12 @@ def get_grpc_stream(
             starting_version=starting_version, transactions_count=transactions_count
         )
         responses = stub.GetTransactions(request, metadata=metadata)
-        return iter(responses)
+        return aiter(responses)
     except Exception as e:
         logging.exception(
             "[Parser] Failed to get grpc response. Is the server running?"
         )
+        flush_logs()
         os._exit(1)
 
 
@@ -118,10 +338,10 @@ def get_grpc_stream(
 # The number of batches depends on our config
 # There could be several special scenarios:
 # 1. If we lose the connection, we will try reconnecting X times within Y seconds before crashing.
-# 2. If we specified an end version and we hit that, we will stop fetching, but we will make sure that
-# all existing transactions are processed
-def producer(
-    q: queue.Queue,
+# 2. If we specified an end version and we hit that, we will stop fetching and close the channel by
+# sending END_OF_STREAM after the last batch. The consumer finishes whatever is left before it exits.
+async def producer(
+    q: asyncio.Queue,
     indexer_grpc_data_service_address: str,
     indexer_grpc_data_stream_api_key: str,
     indexer_grpc_http2_ping_interval: int,
@@ -130,6 +350,7 @@ def producer(
     ending_version: Optional[int],
     processor_name: str,
     batch_start_version: int,
+    transaction_filter: Optional[TransactionFilter] = None,
 ):
     last_insertion_time = perf_counter()
     next_version_to_fetch = batch_start_version
@@ -160,7 +381,7 @@ def producer(
         is_success = False
         try:
             start_time = perf_counter()
-            response = next(response_stream)
+            response = await anext(response_stream)
             reconnection_retries = 0
             batch_start_version = response.transactions[0].version
             batch_end_version = response.transactions[-1].version
@@ -168,6 +389,12 @@ def producer(
             size_in_bytes = response.ByteSize()
             chain_id = response.chain_id
             assert chain_id is not None, "[Parser] Chain Id doesn't exist"
+            FETCH_DURATION_IN_SECS.labels(processor_name=processor_name).observe(
+                perf_counter() - start_time
+            )
+            FETCHED_BATCH_SIZE_IN_BYTES.labels(processor_name=processor_name).observe(
+                size_in_bytes
+            )
             logging.info(
                 "[Parser] Received transactions from GRPC. Sending transactions to channel.",
                 extra={
@@ -184,10 +411,15 @@ def producer(
                     "service_type": PROCESSOR_SERVICE_TYPE,
                 },
             )
-            q.put((chain_id, size_in_bytes, response.transactions))
+            transactions = response.transactions
+            if transaction_filter is not None:
+                transactions = filter_transactions_response(
+                    response, transaction_filter
+                ).transactions
+            await q.put((chain_id, size_in_bytes, transactions))
             last_insertion_time = perf_counter()
             is_success = True
-        except StopIteration:
+        except StopAsyncIteration:
             logging.info(
                 "[Parser] Stream ended",
                 extra={
@@ -237,18 +469,7 @@ def producer(
                 },
             )
 
-            # Wait for the fetched transactions to finish processing before closing the channel
-            while True:
-                logging.info(
-                    "[Parser] Waiting for channel to be empty",
-                    extra={
-                        "processor_name": processor_name,
-                        "channel_size": q.qsize(),
-                        "service_type": PROCESSOR_SERVICE_TYPE,
-                    },
-                )
-                if q.qsize() == 0:
-                    break
+            await q.put(END_OF_STREAM)
             logging.info(
                 "[Parser] The stream is ended",
                 extra={
@@ -277,6 +498,7 @@ def producer(
                             "service_type": PROCESSOR_SERVICE_TYPE,
                         },
                     )
+                    flush_logs()
                     os._exit(1)
             reconnection_retries += 1
             last_reconnection_time = perf_counter()
@@ -303,149 +525,366 @@ def producer(
             )
 
 
-# This is the consumer side of the channel. These are the major states:
-# 1. We're backfilling so we should expect many concurrent threads to process transactions
-# 2. We're caught up so we should expect a single thread to process transactions
-# 3. We have received either an empty batch or a batch with a gap. We should panic.
-# 4. We have not received anything in X seconds, we should panic.
-# 5. If it's the wrong chain, panic.
-def consumer(
-    q: queue.Queue,
-    producer_thread: threading.Thread,
-    indexer_grpc_data_stream_endpoint: str,
-    processor: TransactionsProcessor,
-    num_concurrent_processing_tasks: int,
+# Backfills a bounded [starting_version, ending_version] range over several GRPC streams at once.
+# The range is split into shards of backfill_shard_size versions. Up to num_backfill_streams shards
+# are fetched concurrently, each by its own producer into its own bounded buffer, and batches are
+# forwarded to the channel strictly in shard order so the consumer sees the same stream as before.
+async def backfill_producer(
+    q: asyncio.Queue,
+    indexer_grpc_data_service_address: str,
+    indexer_grpc_data_stream_api_key: str,
+    indexer_grpc_http2_ping_interval: int,
+    indexer_grpc_http2_ping_timeout: int,
     starting_version: int,
+    ending_version: int,
     processor_name: str,
+    num_backfill_streams: int,
+    backfill_shard_size: int,
+    transaction_filter: Optional[TransactionFilter] = None,
 ):
-    asyncio.run(
-        consumer_impl(
-            q,
-            producer_thread,
-            indexer_grpc_data_stream_endpoint,
-            processor,
-            num_concurrent_processing_tasks,
-            starting_version,
+    shards = [
+        (
+            shard_start_version,
+            min(shard_start_version + backfill_shard_size - 1, ending_version),
+        )
+        for shard_start_version in range(
+            starting_version, ending_version + 1, backfill_shard_size
+        )
+    ]
+    logging.info(
+        "[Parser] Starting backfill",
+        extra={
+            "processor_name": processor_name,
+            "stream_address": indexer_grpc_data_service_address,
+            "starting_version": starting_version,
+            "ending_version": ending_version,
+            "num_shards": len(shards),
+            "num_backfill_streams": num_backfill_streams,
+            "service_type": PROCESSOR_SERVICE_TYPE,
+        },
+    )
+
+    # Fetches one shard into its buffer. The shard's producer ends it with END_OF_STREAM.
+    async def fetch_shard(
+        shard_queue: asyncio.Queue, shard_start_version: int, shard_end_version: int
+    ) -> None:
+        await producer(
+            shard_queue,
+            indexer_grpc_data_service_address,
+            indexer_grpc_data_stream_api_key,
+            indexer_grpc_http2_ping_interval,
+            indexer_grpc_http2_ping_timeout,
+            shard_start_version,
+            shard_end_version,
             processor_name,
+            shard_start_version,
+            transaction_filter,
         )
+
+    # Shards that are being fetched or still have buffered batches, in shard order
+    shard_fetchers: Deque[Tuple[asyncio.Task, asyncio.Queue, int, int]] = deque()
+    next_shard_index = 0
+    while shard_fetchers or next_shard_index < len(shards):
+        while len(shard_fetchers) < num_backfill_streams and next_shard_index < len(
+            shards
+        ):
+            shard_start_version, shard_end_version = shards[next_shard_index]
+            shard_queue: asyncio.Queue = asyncio.Queue(
+                max(FETCHER_QUEUE_SIZE // num_backfill_streams, 1)
+            )
+            shard_fetcher = asyncio.create_task(
+                fetch_shard(shard_queue, shard_start_version, shard_end_version)
+            )
+            shard_fetchers.append(
+                (shard_fetcher, shard_queue, shard_start_version, shard_end_version)
+            )
+            next_shard_index += 1
+
+        _, shard_queue, shard_start_version, shard_end_version = shard_fetchers[0]
+        item = await shard_queue.get()
+        if item is not END_OF_STREAM:
+            await q.put(item)
+            continue
+
+        shard_fetchers.popleft()
+        logging.info(
+            "[Parser] Finished backfill shard",
+            extra={
+                "processor_name": processor_name,
+                "shard_start_version": shard_start_version,
+                "shard_end_version": shard_end_version,
+                "service_type": PROCESSOR_SERVICE_TYPE,
+            },
+        )
+
+    await q.put(END_OF_STREAM)
+    logging.info(
+        "[Parser] The stream is ended",
+        extra={
+            "processor_name": processor_name,
+            "service_type": PROCESSOR_SERVICE_TYPE,
+        },
+    )
+
+
+# Records the per-stage metrics of one finished batch. Runs in the main process, since metrics
+# recorded in worker processes are never exported.
+def record_batch_metrics(
+    processor_name: str,
+    processing_result: ProcessingResult,
+    batch_latency_in_secs: float,
+) -> None:
+    PROCESSING_DURATION_IN_SECS.labels(processor_name=processor_name).observe(
+        processing_result.processing_duration_in_secs
+    )
+    DB_INSERTION_DURATION_IN_SECS.labels(processor_name=processor_name).observe(
+        processing_result.db_insertion_duration_in_secs
+    )
+    BATCH_LATENCY_IN_SECS.labels(processor_name=processor_name).observe(
+        batch_latency_in_secs
     )
+    num_of_written_rows_by_table = processing_result.num_of_written_rows_by_table
+    for table_name, num_of_rows in num_of_written_rows_by_table.items():
+        WRITTEN_ROWS_COUNTER.labels(
+            processor_name=processor_name, table_name=table_name
+        ).inc(num_of_rows)
 
 
-async def consumer_impl(
-    q: queue.Queue,
-    producer_thread: threading.Thread,
+# A transaction batch that has been handed to a worker and hasn't been checkpointed yet
+@dataclass
+class InFlightBatch:
+    transactions: List[transaction_pb2.Transaction]
+    size_in_bytes: int
+    dispatch_time: float
+    future: asyncio.Future
+    num_of_retries: int = 0
+
+
+# Resubmits a batch once the backoff has passed, without blocking the event loop meanwhile
+async def submit_batch_after_backoff(
+    batch_executor: BatchExecutor,
+    transactions: List[transaction_pb2.Transaction],
+    backoff_in_secs: float,
+) -> ProcessingResult:
+    await asyncio.sleep(backoff_in_secs)
+    return await asyncio.wrap_future(batch_executor.submit(transactions))
+
+
+# This is the consumer side of the channel. These are the major states:
+# 1. We're backfilling so we should expect many concurrent threads to process transactions
+# 2. We're caught up so we should expect a single thread to process transactions
+# 3. We have received either an empty batch or a batch with a gap. We should panic.
+# 4. We have not received anything in X seconds, we should panic.
+# 5. If it's the wrong chain, panic.
+async def consumer(
+    q: asyncio.Queue,
+    producer_task: asyncio.Task,
     indexer_grpc_data_stream_endpoint: str,
     processor: TransactionsProcessor,
     num_concurrent_processing_tasks: int,
     starting_version: int,
     processor_name: str,
+    batch_executor: BatchExecutor,
+    concurrency_controller: Optional[AdaptiveConcurrencyController],
 ):
     chain_id = None
-    batch_start_version = starting_version
+    last_fetched_version = starting_version - 1
+    last_processed_version = starting_version - 1
+    # Batches in the order they were fetched. We keep up to num_concurrent_processing_tasks of them
+    # in flight at all times, and only checkpoint a batch once every batch before it has finished.
+    in_flight: Deque[InFlightBatch] = deque()
+    # Pending read from the channel, only started while the window has room
+    channel_get: Optional[asyncio.Task] = None
+    # Results gathered for the next concurrency controller update
+    controller_results: List[ProcessingResult] = []
+    controller_window_start_time = perf_counter()
 
-    while True:
-        start_time = perf_counter()
+    # Set once the producer has closed the channel
+    is_stream_ended = False
 
-        # Check if producer task is done
-        if not producer_thread.is_alive():
+    while True:
+        # Once the channel is closed, finish the batches in flight and stop
+        if is_stream_ended and not in_flight:
             logging.info(
                 "[Parser] Channel closed; stream ended.",
                 extra={
                     "processor_name": processor_name,
+                    "last_processed_version": last_processed_version,
                     "service_type": PROCESSOR_SERVICE_TYPE,
                 },
             )
-            os._exit(0)
-
-        # Fetch transaction batches from channel to process
-        transaction_batches = []
-        last_fetched_version = batch_start_version - 1
-        total_size = 0
-        for task_index in range(num_concurrent_processing_tasks):
-            if task_index == 0:
-                # If we're the first task, we should wait until we get data.
-                chain_id, size_in_bytes, transactions = q.get()
-            else:
-                # If we're not the first task, we should poll to see if we get any data.
-                try:
-                    chain_id, size_in_bytes, transactions = q.get_nowait()
-                except queue.Empty:
-                    # Channel is empty and send is not dropped which we definitely expect. Wait for a bit and continue polling.
-                    continue
-
-            # TODO: Check chain_id saved in DB
-            total_size += size_in_bytes
-            current_fetched_version = transactions[0].version
-            if last_fetched_version + 1 != current_fetched_version:
-                logging.warning(
-                    "[Parser] Received batch with gap from GRPC stream",
-                    extra={
-                        "processor_name": processor_name,
-                        "last_fetched_version": last_fetched_version,
-                        "current_fetched_version": current_fetched_version,
-                        "service_type": PROCESSOR_SERVICE_TYPE,
-                    },
-                )
-                # Gaps are possible because we skipped versions
-                # os._exit(1)
-            last_fetched_version = transactions[-1].version
-            transaction_batches.append(transactions)
+            return
 
-        processor_threads = []
-        for transactions in transaction_batches:
-            thread = IndexerProcessorServer.WorkerThread(
-                processor, transactions=transactions, size_in_bytes=total_size
+        if concurrency_controller is not None:
+            num_concurrent_processing_tasks = (
+                concurrency_controller.num_concurrent_processing_tasks
             )
-            processor_threads.append(thread)
-            thread.start()
 
-        for thread in processor_threads:
-            thread.join()
+        if (
+            not is_stream_ended
+            and channel_get is None
+            and len(in_flight) < num_concurrent_processing_tasks
+        ):
+            channel_get = asyncio.ensure_future(q.get())
 
-        processing_time = perf_counter()
-        task_count = len(processor_threads)
-        processed_versions: List[ProcessingResult] = []
-        for thread in processor_threads:
-            if thread.exception:
-                logging.warning(
-                    "[Parser] Error processing transaction batch",
-                    extra={"processor_name": processor_name},
-                )
-                os._exit(1)
+        # Wait until a batch finishes, a new batch arrives or the producer stops
+        waiting_for: List[asyncio.Future] = [batch.future for batch in in_flight]
+        if channel_get is not None:
+            waiting_for.append(channel_get)
+        if not producer_task.done():
+            waiting_for.append(producer_task)
+        await asyncio.wait(waiting_for, return_when=asyncio.FIRST_COMPLETED)
 
-            processed_versions.append(thread.processing_result)
+        # The producer only returns after closing the channel, so surface anything that killed it
+        if producer_task.done() and producer_task.exception() is not None:
+            raise producer_task.exception()
 
-        # Make sure there are no gaps and advance states
-        prev_start = None
-        prev_end = None
-        for result in processed_versions:
-            if prev_start is None or prev_end is None:
-                prev_start = result.start_version
-                prev_end = result.end_version
+        if channel_get is not None and channel_get.done():
+            item = channel_get.result()
+            channel_get = None
+            CHANNEL_SIZE.labels(processor_name=processor_name).set(q.qsize())
+            if item is END_OF_STREAM:
+                is_stream_ended = True
             else:
-                if prev_end + 1 != result.start_version:
+                chain_id, size_in_bytes, transactions = item
+
+                # TODO: Check chain_id saved in DB
+                current_fetched_version = transactions[0].version
+                if last_fetched_version + 1 != current_fetched_version:
                     logging.warning(
-                        "[Parser] Gaps in processing stream",
+                        "[Parser] Received batch with gap from GRPC stream",
                         extra={
                             "processor_name": processor_name,
-                            "stream_address": indexer_grpc_data_stream_endpoint,
-                            "processed_versions": processed_versions,
+                            "last_fetched_version": last_fetched_version,
+                            "current_fetched_version": current_fetched_version,
                             "service_type": PROCESSOR_SERVICE_TYPE,
                         },
                     )
-                    # Gaps are possible because we skip versions
+                    # Gaps are possible because we skipped versions
                     # os._exit(1)
-                prev_start = result.start_version
-                prev_end = result.end_version
+                last_fetched_version = transactions[-1].version
+                in_flight.append(
+                    InFlightBatch(
+                        transactions,
+                        size_in_bytes,
+                        perf_counter(),
+                        asyncio.wrap_future(batch_executor.submit(transactions)),
+                    )
+                )
+                IN_FLIGHT_BATCHES.labels(processor_name=processor_name).set(
+                    len(in_flight)
+                )
+
+        for batch in in_flight:
+            if not batch.future.done() or batch.future.exception() is None:
+                continue
+            exception = batch.future.exception()
+            if (
+                is_lock_contention_error(exception)
+                and batch.num_of_retries < LOCK_CONTENTION_MAX_RETRIES
+            ):
+                # The batch lost a lock to a concurrent batch. Writes are idempotent, so retry it.
+                if concurrency_controller is not None:
+                    concurrency_controller.record_lock_error()
+                backoff_in_secs = LOCK_CONTENTION_RETRY_BACKOFF_IN_SECS * (
+                    2**batch.num_of_retries
+                )
+                batch.num_of_retries += 1
+                logging.warning(
+                    "[Parser] Transaction batch lost a lock to a concurrent batch. Retrying",
+                    extra={
+                        "processor_name": processor_name,
+                        "start_version": batch.transactions[0].version,
+                        "end_version": batch.transactions[-1].version,
+                        "num_of_retries": batch.num_of_retries,
+                        "backoff_in_secs": backoff_in_secs,
+                        "error": str(exception),
+                        "service_type": PROCESSOR_SERVICE_TYPE,
+                    },
+                )
+                batch.future = asyncio.ensure_future(
+                    submit_batch_after_backoff(
+                        batch_executor, batch.transactions, backoff_in_secs
+                    )
+                )
+                continue
+            logging.warning(
+                "[Parser] Error processing transaction batch",
+                extra={
+                    "processor_name": processor_name,
+                    "num_of_retries": batch.num_of_retries,
+                    "error": str(exception),
+                },
+            )
+            flush_logs()
+            os._exit(1)
+
+        # Checkpoint the longest run of finished batches at the head of the window
+        finished_batches: List[InFlightBatch] = []
+        while in_flight and in_flight[0].future.done():
+            finished_batches.append(in_flight.popleft())
+        if not finished_batches:
+            continue
+
+        processing_time = perf_counter()
+        processed_versions: List[ProcessingResult] = [
+            batch.future.result() for batch in finished_batches
+        ]
+
+        # Make sure there are no gaps and advance states
+        prev_end = last_processed_version
+        for result in processed_versions:
+            if prev_end + 1 != result.start_version:
+                logging.warning(
+                    "[Parser] Gaps in processing stream",
+                    extra={
+                        "processor_name": processor_name,
+                        "stream_address": indexer_grpc_data_stream_endpoint,
+                        "processed_versions": processed_versions,
+                        "service_type": PROCESSOR_SERVICE_TYPE,
+                    },
+                )
+                # Gaps are possible because we skip versions
+                # os._exit(1)
+            prev_end = result.end_version
 
         processed_start_version = processed_versions[0].start_version
         processed_end_version = processed_versions[-1].end_version
-        batch_start_version = processed_end_version + 1
+        last_processed_version = processed_end_version
 
-        processor.update_last_processed_version(processed_end_version)
+        for batch, result in zip(finished_batches, processed_versions):
+            record_batch_metrics(
+                processor_name, result, perf_counter() - batch.dispatch_time
+            )
+        IN_FLIGHT_BATCHES.labels(processor_name=processor_name).set(len(in_flight))
+
+        # The checkpoint is a blocking DB write, keep it off the event loop
+        checkpoint_start_time = perf_counter()
+        await asyncio.to_thread(
+            processor.update_last_processed_version, processed_end_version
+        )
+        CHECKPOINT_DURATION_IN_SECS.labels(processor_name=processor_name).observe(
+            perf_counter() - checkpoint_start_time
+        )
         PROCESSED_TRANSACTIONS_COUNTER.labels(processor_name=processor_name).inc(
             processed_end_version - processed_start_version + 1
         )
+        if processor.transaction_filter() is not None:
+            num_of_filtered_transactions = (
+                processed_end_version - processed_start_version + 1
+            )
+            num_of_skipped_transactions = sum(
+                result.num_of_skipped_transactions for result in processed_versions
+            )
+            FILTERED_TRANSACTIONS_COUNTER.labels(processor_name=processor_name).inc(
+                num_of_filtered_transactions
+            )
+            SKIPPED_TRANSACTIONS_COUNTER.labels(processor_name=processor_name).inc(
+                num_of_skipped_transactions
+            )
+            TRANSACTION_SKIP_RATIO.labels(processor_name=processor_name).set(
+                num_of_skipped_transactions / num_of_filtered_transactions
+            )
         LATEST_PROCESSED_VERSION.labels(processor_name=processor_name).set(
             processed_end_version
         )
@@ -454,22 +893,38 @@ async def consumer_impl(
             extra={
                 "processor_name": processor_name,
                 "service_type": PROCESSOR_SERVICE_TYPE,
-                "start_version": processed_versions[0].start_version,
-                "end_version": processed_versions[-1].end_version,
-                "num_of_transactions": processed_versions[-1].end_version
+                "start_version": processed_start_version,
+                "end_version": processed_end_version,
+                "num_of_transactions": processed_end_version
                 + 1
-                - processed_versions[0].start_version,
-                "duration_in_secs": str(format(perf_counter() - start_time, ".8f")),
-                "task_count": task_count,
+                - processed_start_version,
+                "duration_in_secs": str(
+                    format(perf_counter() - finished_batches[0].dispatch_time, ".8f")
+                ),
+                "task_count": len(finished_batches),
+                "in_flight_task_count": len(in_flight),
                 "processing_duration": str(
                     format(perf_counter() - processing_time, ".8f")
                 ),
-                "service_type": PROCESSOR_SERVICE_TYPE,
-                "size_in_bytes": str(total_size),
+                "size_in_bytes": str(
+                    sum(batch.size_in_bytes for batch in finished_batches)
+                ),
                 "step": "3",
             },
         )
 
+        if concurrency_controller is not None:
+            # Measure over roughly one window's worth of batches
+            controller_results.extend(processed_versions)
+            if len(controller_results) >= num_concurrent_processing_tasks:
+                concurrency_controller.update(
+                    controller_results,
+                    q.qsize(),
+                    perf_counter() - controller_window_start_time,
+                )
+                controller_results = []
+                controller_window_start_time = perf_counter()
+
 
 class IndexerProcessorServer:
     config: Config
@@ -486,126 +941,14 @@ class IndexerProcessorServer:
         )
 
         # Instantiate the correct processor based on config
-        processor_config = self.config.server_config.processor_config
-        match processor_config.type:
-            case ProcessorName.EXAMPLE_EVENT_PROCESSOR.value:
-                self.processor = ExampleEventProcessor()
-            case ProcessorName.NFT_MARKETPLACE_V1_PROCESSOR.value:
-                self.processor = NFTMarketplaceProcesser()
-            case ProcessorName.NFT_MARKETPLACE_V2_PROCESSOR.value:
-                assert isinstance(processor_config, NFTMarketplaceV2Config)
-                self.processor = NFTMarketplaceV2Processor(processor_config)
-            case ProcessorName.COIN_FLIP.value:
-                self.processor = CoinFlipProcessor()
-            case ProcessorName.EXAMPLE_AMBASSADOR_TOKEN_PROCESSOR.value:
-                self.processor = AptosAmbassadorTokenProcessor()
-            case ProcessorName.MERKLE_PROCESSOR.value:
-                self.processor = MerkleProcessor() 
-            case _:
-                raise Exception(
-                    "Invalid processor name"
-                    "\n[ERROR]: The specified processor name was invalid or not found.\n"
-                    "         - If you are using a custom processor, make sure to add it to the ProcessorName enum in utils/processor_name.py.\n"
-                    "         - Ensure the IndexerProcessorServer constructor in utils/worker.py uses the new enum value.\n"
-                )
-
-        # TODO: Move this to a config
-        self.num_concurrent_processing_tasks = 10
-
-    class WorkerThread(
-        threading.Thread,
-    ):
-        processing_result: ProcessingResult
-        exception: Exception | None
-
-        def __init__(
-            self,
-            processor: TransactionsProcessor,
-            transactions: List[transaction_pb2.Transaction],
-            size_in_bytes: int,
-        ):
-            threading.Thread.__init__(self)
-            self.processor = processor
-            self.transactions = transactions
-            self.processing_result = ProcessingResult(
-                transactions[0].version, transactions[-1].version, 0.0, 0.0
-            )
-            self.exception = None
-
-        def run(self):
-            start_version = self.transactions[0].version
-            end_version = self.transactions[-1].version
-
-            try:
-                self.processing_result = self.processor.process_transactions(
-                    self.transactions, start_version, end_version
-                )
-                num_of_transactions = str(end_version - start_version + 1)
-                processor_name = self.processor.name()
-                start_version_str = str(start_version)
-                end_version_str = str(end_version)
-                processing_duration_in_secs = format(
-                    self.processing_result.processing_duration_in_secs, ".8f"
-                )
-                db_insertion_duration_in_secs = format(
-                    self.processing_result.db_insertion_duration_in_secs, ".8f"
-                )
-                duration_in_secs = format(
-                    self.processing_result.processing_duration_in_secs
-                    + self.processing_result.db_insertion_duration_in_secs,
-                    ".8f",
-                )
-                size_in_bytes = str(sum(obj.ByteSize() for obj in self.transactions))
-                logging.info(
-                    "[Parser] DB insertion time of one batch of transactions",
-                    extra={
-                        "processor_name": processor_name,
-                        "start_version": start_version_str,
-                        "end_version": end_version_str,
-                        "service_type": PROCESSOR_SERVICE_TYPE,
-                        "num_of_transactions": num_of_transactions,
-                        "duration_in_secs": db_insertion_duration_in_secs,
-                        "size_in_bytes": str(size_in_bytes),
-                    },
-                )
-                logging.info(
-                    "[Parser] Parsing time of one batch of transactions",
-                    extra={
-                        "processor_name": processor_name,
-                        "start_version": start_version_str,
-                        "end_version": end_version_str,
-                        "service_type": PROCESSOR_SERVICE_TYPE,
-                        "num_of_transactions": num_of_transactions,
-                        "duration_in_secs": processing_duration_in_secs,
-                        "size_in_bytes": str(size_in_bytes),
-                    },
-                )
-                logging.info(
-                    "[Parser] Processor finished processing one batch of transaction",
-                    extra={
-                        "processor_name": processor_name,
-                        "start_version": start_version_str,
-                        "end_version": end_version_str,
-                        "service_type": PROCESSOR_SERVICE_TYPE,
-                        "num_of_transactions": num_of_transactions,
-                        "processing_duration_in_secs": processing_duration_in_secs,
-                        "db_insertion_duration_in_secs": db_insertion_duration_in_secs,
-                        "duration_in_secs": duration_in_secs,
-                        "size_in_bytes": str(size_in_bytes),
-                        "step": "2",
-                    },
-                )
-            except Exception as e:
-                import traceback
+        self.processor = get_processor(self.config)
 
-                traceback.print_exc()
-                self.exception = e
+        self.num_concurrent_processing_tasks = (
+            self.config.server_config.num_concurrent_processing_tasks
+        )
 
     def run(self):
         processor_name = self.config.server_config.processor_config.type
-        indexer_grpc_address = (
-            self.config.server_config.indexer_grpc_data_service_address
-        )
 
         # Run DB migrations
         logging.info(
@@ -626,64 +969,143 @@ class IndexerProcessorServer:
 
         self.start_health_and_monitoring_ports()
 
+        batch_executor: BatchExecutor
+        if self.config.server_config.execution_mode == ExecutionMode.PROCESS.value:
+            logging.info(
+                "[Parser] Starting worker processes",
+                extra={
+                    "processor_name": processor_name,
+                    "num_worker_processes": self.num_concurrent_processing_tasks,
+                    "service_type": PROCESSOR_SERVICE_TYPE,
+                },
+            )
+            batch_executor = ProcessBatchExecutor(
+                processor_name,
+                self.num_concurrent_processing_tasks,
+                process_serialized_transactions,
+                init_worker_process,
+                (self.config,),
+            )
+        else:
+            batch_executor = ThreadBatchExecutor(
+                processor_name,
+                self.num_concurrent_processing_tasks,
+                functools.partial(process_transaction_batch, self.processor),
+            )
+
         # Get starting version from DB
         starting_version = self.config.get_starting_version(self.processor.name())
         ending_version = self.config.server_config.ending_version
 
-        # Create a transaction fetcher thread that will continuously fetch transactions from the GRPC stream
+        concurrency_controller = None
+        if self.config.server_config.adaptive_concurrency:
+            concurrency_controller = AdaptiveConcurrencyController(
+                processor_name,
+                self.config.server_config.min_concurrent_processing_tasks,
+                self.num_concurrent_processing_tasks,
+            )
+
+        asyncio.run(
+            self.run_ingestion(
+                starting_version,
+                ending_version,
+                batch_executor,
+                concurrency_controller,
+            )
+        )
+        # Only reached for bounded runs, once every batch up to ending_version is checkpointed
+        batch_executor.shutdown()
+        logging.info(
+            "[Parser] Processor finished",
+            extra={
+                "processor_name": processor_name,
+                "ending_version": ending_version,
+                "service_type": PROCESSOR_SERVICE_TYPE,
+            },
+        )
+
+    # Fetching from GRPC and dispatching to the workers share one event loop. The bounded channel
+    # applies backpressure to the fetcher when the workers fall behind.
+    async def run_ingestion(
+        self,
+        starting_version: int,
+        ending_version: Optional[int],
+        batch_executor: BatchExecutor,
+        concurrency_controller: Optional[AdaptiveConcurrencyController],
+    ) -> None:
+        processor_name = self.config.server_config.processor_config.type
+        indexer_grpc_address = (
+            self.config.server_config.indexer_grpc_data_service_address
+        )
+
+        # Create a transaction fetcher task that will continuously fetch transactions from the GRPC stream
         # and write into a channel. Each item is of type (chain_id, vec of transactions)
         logging.info(
             "[Parser] Starting fetcher task",
             extra={
                 "processor_name": processor_name,
-                "stream_address": self.config.server_config.indexer_grpc_data_service_address,
+                "stream_address": indexer_grpc_address,
                 "start_version": starting_version,
                 "service_type": PROCESSOR_SERVICE_TYPE,
             },
         )
 
-        q = queue.Queue(FETCHER_QUEUE_SIZE)
-        producer_thread = threading.Thread(
-            target=producer,
-            daemon=True,
-            args=(
-                q,
-                indexer_grpc_address,
-                self.config.server_config.auth_token,
-                self.config.server_config.indexer_grpc_http2_ping_interval_in_secs,
-                self.config.server_config.indexer_grpc_http2_ping_timeout_in_secs,
-                starting_version,
-                ending_version,
-                processor_name,
-                starting_version,
-            ),
-        )
-        producer_thread.start()
-
-        consumer_thread = threading.Thread(
-            target=consumer,
-            daemon=True,
-            args=(
-                q,
-                producer_thread,
-                indexer_grpc_address,
-                self.processor,
-                self.num_concurrent_processing_tasks,
-                starting_version,
-                processor_name,
-            ),
-        )
-        consumer_thread.start()
+        q: asyncio.Queue = asyncio.Queue(FETCHER_QUEUE_SIZE)
+        # The data service has no server-side filtering, so drop what the processor doesn't need
+        # before it's queued
+        transaction_filter = self.processor.transaction_filter()
+        num_backfill_streams = self.config.server_config.num_backfill_streams
+        if ending_version is not None and num_backfill_streams > 1:
+            producer_task = asyncio.create_task(
+                backfill_producer(
+                    q,
+                    indexer_grpc_address,
+                    self.config.server_config.auth_token,
+                    self.config.server_config.indexer_grpc_http2_ping_interval_in_secs,
+                    self.config.server_config.indexer_grpc_http2_ping_timeout_in_secs,
+                    starting_version,
+                    ending_version,
+                    processor_name,
+                    num_backfill_streams,
+                    self.config.server_config.backfill_shard_size,
+                    transaction_filter,
+                )
+            )
+        else:
+            producer_task = asyncio.create_task(
+                producer(
+                    q,
+                    indexer_grpc_address,
+                    self.config.server_config.auth_token,
+                    self.config.server_config.indexer_grpc_http2_ping_interval_in_secs,
+                    self.config.server_config.indexer_grpc_http2_ping_timeout_in_secs,
+                    starting_version,
+                    ending_version,
+                    processor_name,
+                    starting_version,
+                    transaction_filter,
+                )
+            )
 
-        producer_thread.join()
-        consumer_thread.join()
+        await consumer(
+            q,
+            producer_task,
+            indexer_grpc_address,
+            self.processor,
+            self.num_concurrent_processing_tasks,
+            starting_version,
+            processor_name,
+            batch_executor,
+            concurrency_controller,
+        )
 
     def init_db_tables(self, schema_name: str) -> None:
-        engine = create_engine(self.config.server_config.postgres_connection_string)
-        engine = engine.execution_options(
-            schema_translate_map={"per_schema": schema_name}
+        engine = init_db_session(
+            self.config.server_config.postgres_connection_string,
+            schema_name,
+            # Worker threads plus the consumer, which writes checkpoints
+            pool_size=self.num_concurrent_processing_tasks + 1,
         )
-        Session.configure(bind=engine)
         Base.metadata.create_all(engine, checkfirst=True)
 
     def start_health_and_monitoring_ports(self) -> None: